@@ -1,15 +1,128 @@
+import logging
+
 from django.contrib import admin
-from .models import Profile
+from django.contrib.auth import get_user_model
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.db.models import Q
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.html import format_html, format_html_join
+from core.bulk import run_bulk_action
+from core.paginator import EstimatedCountPaginator
+from search import fts
+from .models import Document, Profile
+from .signals import driver_approved
+
+logger = logging.getLogger(__name__)
+
+
+def approve_driver_profiles(profiles, actor):
+    """Approve the pending driver profiles in one chunk; return how many changed.
+
+    Signals and the approval emails (one batch per chunk) go out on commit.
+    """
+    pending = [p for p in profiles if p.role == 'driver' and not p.is_driver_approved]
+    if not pending:
+        return 0
+    Profile.objects.filter(pk__in=[p.pk for p in pending]).update(is_driver_approved=True, updated_at=timezone.now())
+    for profile in pending:
+        profile.is_driver_approved = True
+
+    def after_commit():
+        for profile in pending:
+            driver_approved.send(sender=Profile, profile=profile, approved_by=actor)
+        messages = [
+            (
+                'Your WiYone Cab driver account is approved',
+                f'Hello {profile.full_name or profile.user.username}, your driver account has been '
+                'approved. You can now sign in and accept rides.',
+                None,
+                [profile.user.email],
+            )
+            for profile in pending if profile.user.email
+        ]
+        if messages:
+            try:
+                send_mass_mail(messages, fail_silently=False)
+            except Exception:
+                logger.exception('Could not send %d driver approval email(s)', len(messages))
+    transaction.on_commit(after_commit)
+    return len(pending)
+
 
 @admin.register(Profile)
 class ProfileAdmin(admin.ModelAdmin):
-    list_display = ('user', 'full_name', 'role', 'phone', 'city', 'is_driver_approved')
+    list_display = ('user', 'full_name', 'role', 'phone', 'city', 'is_driver_approved',
+                    'rides_requested', 'rides_driven', 'last_active')
+    # counters come from the denormalized RideStats row, joined rather than aggregated
+    list_select_related = ('user', 'user__ride_stats')
     list_filter = ('role', 'is_driver_approved')
-    search_fields = ('user__username', 'full_name', 'phone', 'id_number')
+    # prefix match on names and phone numbers, exact match on ID numbers, all backed by case-insensitive indexes
+    search_fields = ('^user__username', '^full_name', '^phone', '=id_number')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     actions = ['approve_drivers']
+    readonly_fields = ('document_previews',)
+
+    def _stats(self, obj):
+        return getattr(obj.user, 'ride_stats', None)
+
+    @admin.display(description='Rides requested', ordering='user__ride_stats__rides_requested')
+    def rides_requested(self, obj):
+        stats = self._stats(obj)
+        return stats.rides_requested if stats else 0
+
+    @admin.display(description='Rides driven', ordering='user__ride_stats__rides_driven')
+    def rides_driven(self, obj):
+        stats = self._stats(obj)
+        return stats.rides_driven if stats else 0
+
+    @admin.display(description='Last active', ordering='user__ride_stats__last_active')
+    def last_active(self, obj):
+        stats = self._stats(obj)
+        return stats.last_active if stats else None
+
+    @admin.display(description='Document previews')
+    def document_previews(self, obj):
+        names = [f.name for f in (obj.id_document, obj.driver_license) if f]
+        documents = Document.objects.filter(file__in=names) if names else []
+        links = []
+        for document in documents:
+            url = reverse('document_file', args=[document.sha256])
+            if document.thumbnail:
+                label = format_html('<img src="{}?thumbnail=1" alt="" style="max-height:160px">', url)
+            else:
+                label = f'{document.content_type or "file"}, {document.size // 1024} KB'
+            links.append(format_html('<a href="{}" target="_blank">{}</a>', url, label))
+        return format_html_join(' ', '{}', ((link,) for link in links)) or '-'
+
+    def get_search_results(self, request, queryset, search_term):
+        # username via an IN subquery instead of a join so every OR branch is index-backed;
+        # words anywhere in name/phone come from the full-text index
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        users = get_user_model().objects.filter(username__istartswith=term).values('pk')
+        text_hits = [pk for pk, _ in fts.search('users', term, limit=1000)]
+        return queryset.filter(
+            Q(user__in=users) | Q(full_name__istartswith=term)
+            | Q(phone__istartswith=term) | Q(id_number__iexact=term)
+            | Q(pk__in=text_hits)
+        ), False
 
     def approve_drivers(self, request, queryset):
-        """Admin action to approve selected driver profiles."""
-        updated = queryset.update(is_driver_approved=True)
-        self.message_user(request, f"Approved {updated} profiles as drivers.")
+        """Admin action to approve selected driver profiles, in chunked transactions."""
+        run_bulk_action(self, request, queryset, Profile.objects.select_related('user'),
+                        approve_driver_profiles, 'approved')
     approve_drivers.short_description = 'Approve selected drivers'
+
+
+@admin.register(Document)
+class DocumentAdmin(admin.ModelAdmin):
+    list_display = ('sha256', 'content_type', 'size', 'thumbnail', 'created')
+    search_fields = ('=sha256',)
+    readonly_fields = ('sha256', 'file', 'size', 'content_type', 'thumbnail', 'created')
+
+    def has_add_permission(self, request):
+        return False
@@ -0,0 +1,270 @@
+"""JWT authentication that does not hit the database on every request.
+
+Tokens issued by ``/api/token/`` carry the claims the API's permission
+checks need (username, role, driver approval, staff flag) and the user's city,
+which picks the database for their rides (``core.cities``). On a request,
+``CachedJWTAuthentication`` builds an unsaved ``User`` (with its
+``profile``) from:
+
+1. the per-process user state LRU, if it holds a fresh entry for the user;
+2. otherwise the token's own claims, if the token was issued within the
+   last ``USER_STATE_TTL`` seconds (its claims are then as fresh as a cache
+   entry would be);
+3. otherwise one ``values()`` query, whose result is cached.
+
+Role or approval changes therefore reach the API within ``USER_STATE_TTL``
+at most (immediately in the process that saved them). Revoked tokens are
+rejected through ``revocations``, an in-memory set of blocklisted JTIs that
+is topped up from ``RevokedToken`` every ``BLOCKLIST_REFRESH_INTERVAL``.
+
+The user object is for identity, FK assignment and permission checks only;
+never ``save()`` it.
+"""
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.instrumentation import record_cache
+from .models import Profile, RevokedToken
+
+User = get_user_model()
+
+UserState = namedtuple('UserState', 'username is_active is_staff is_superuser role approved city')
+
+# token claim -> UserState field
+STATE_CLAIMS = {
+    'username': 'username',
+    'staff': 'is_staff',
+    'superuser': 'is_superuser',
+    'role': 'role',
+    'approved': 'approved',
+    'city': 'city',
+}
+
+
+def fast_path_settings():
+    defaults = {
+        'USER_STATE_TTL': 60,
+        'USER_STATE_MAXSIZE': 10000,
+        'BLOCKLIST_REFRESH_INTERVAL': 5,
+    }
+    defaults.update(getattr(settings, 'JWT_FAST_PATH', {}))
+    return defaults
+
+
+class UserStateCache:
+    """Thread-safe LRU of ``UserState`` by user id, entries expiring after ``ttl`` seconds."""
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        state = self._get(user_id)
+        record_cache(state is not None)
+        return state
+
+    def _get(self, user_id):
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            expires, state = entry
+            if expires < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return state
+
+    def put(self, user_id, state):
+        with self._lock:
+            self._entries[user_id] = (time.monotonic() + self.ttl, state)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+class RevocationIndex:
+    """In-memory set of revoked token JTIs, synced incrementally from ``RevokedToken``."""
+
+    def __init__(self, refresh_interval):
+        self.refresh_interval = refresh_interval
+        self._expiry = {}  # jti -> expiry timestamp
+        self._max_id = 0
+        self._next_refresh = 0.0
+        self._lock = threading.Lock()
+
+    def __contains__(self, jti):
+        if time.monotonic() >= self._next_refresh:
+            self.refresh()
+        return jti in self._expiry
+
+    def refresh(self):
+        now = timezone.now()
+        with self._lock:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            rows = (RevokedToken.objects.filter(pk__gt=self._max_id, expires_at__gt=now)
+                    .values_list('pk', 'jti', 'expires_at'))
+            for pk, jti, expires_at in rows:
+                self._max_id = max(self._max_id, pk)
+                self._expiry[jti] = expires_at.timestamp()
+            cutoff = now.timestamp()
+            for jti in [j for j, exp in self._expiry.items() if exp <= cutoff]:
+                del self._expiry[jti]
+
+    def add(self, jti, expires_at):
+        with self._lock:
+            self._expiry[jti] = expires_at.timestamp()
+
+    def reset(self):
+        with self._lock:
+            self._expiry.clear()
+            self._max_id = 0
+            self._next_refresh = 0.0
+
+
+_config = fast_path_settings()
+user_states = UserStateCache(_config['USER_STATE_MAXSIZE'], _config['USER_STATE_TTL'])
+revocations = RevocationIndex(_config['BLOCKLIST_REFRESH_INTERVAL'])
+
+
+def load_user_state(user_id):
+    """Read a user's auth state in one query and cache it; None if the user does not exist."""
+    row = (User.objects.filter(pk=user_id)
+           .values_list('username', 'is_active', 'is_staff', 'is_superuser',
+                        'profile__role', 'profile__is_driver_approved', 'profile__city')
+           .first())
+    if row is None:
+        return None
+    state = UserState(*row)
+    user_states.put(user_id, state)
+    return state
+
+
+def current_user_state(user_id):
+    return user_states.get(user_id) or load_user_state(user_id)
+
+
+def stamp_claims(token, state):
+    for claim, field in STATE_CLAIMS.items():
+        token[claim] = getattr(state, field)
+
+
+def _state_from_claims(token):
+    try:
+        values = {field: token[claim] for claim, field in STATE_CLAIMS.items()}
+    except KeyError:
+        return None
+    return UserState(is_active=True, **values)
+
+
+def user_from_state(user_id, state):
+    user = User(id=user_id, username=state.username, is_active=state.is_active,
+                is_staff=state.is_staff, is_superuser=state.is_superuser)
+    user._state.adding = False
+    user._state.db = 'default'
+    if state.role is not None:
+        profile = Profile(user_id=user_id, role=state.role, is_driver_approved=bool(state.approved),
+                          city=state.city or '')
+        profile._state.adding = False
+        profile._state.db = 'default'
+        user.profile = profile
+    return user
+
+
+def revoke(token):
+    """Blocklist a validated token (access or refresh) until it expires."""
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = datetime.fromtimestamp(token['exp'], tz=dt_timezone.utc)
+    RevokedToken.objects.filter(expires_at__lte=timezone.now()).delete()
+    RevokedToken.objects.get_or_create(jti=jti, defaults={'expires_at': expires_at})
+    revocations.add(jti, expires_at)
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token whose access tokens carry current user state claims."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        profile = getattr(user, 'profile', None)
+        stamp_claims(token, UserState(
+            username=user.get_username(), is_active=user.is_active, is_staff=user.is_staff,
+            is_superuser=user.is_superuser, role=getattr(profile, 'role', None),
+            approved=getattr(profile, 'is_driver_approved', False),
+            city=getattr(profile, 'city', None),
+        ))
+        return token
+
+    @property
+    def access_token(self):
+        access = super().access_token
+        # re-read state so a refreshed access token never carries stale claims
+        state = current_user_state(User._meta.pk.to_python(self[api_settings.USER_ID_CLAIM]))
+        if state is not None:
+            stamp_claims(access, state)
+        return access
+
+
+class ClaimsTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = ClaimsRefreshToken
+
+
+class ClaimsTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = ClaimsRefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if refresh.get(api_settings.JTI_CLAIM) in revocations:
+            raise InvalidToken('Token has been revoked')
+        return super().validate(attrs)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` without the per-request user query (see module docstring)."""
+
+    def get_validated_token(self, raw_token):
+        token = super().get_validated_token(raw_token)
+        if token.get(api_settings.JTI_CLAIM) in revocations:
+            raise InvalidToken('Token has been revoked')
+        return token
+
+    def get_user(self, validated_token):
+        try:
+            # simplejwt stores the id as a string; the user's pk must compare equal to FK values
+            user_id = User._meta.pk.to_python(validated_token[api_settings.USER_ID_CLAIM])
+        except (KeyError, ValidationError):
+            raise InvalidToken('Token contained no recognizable user identification')
+
+        state = user_states.get(user_id)
+        if state is None and time.time() - validated_token.get('iat', 0) <= user_states.ttl:
+            state = _state_from_claims(validated_token)
+        if state is None:
+            state = load_user_state(user_id)
+        if state is None:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not state.is_active:
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user_from_state(user_id, state)
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:10
+
+from django.conf import settings
+from django.db import migrations
+
+from core import db_indexes
+
+PROFILE_INDEXES = [
+    ('profile_full_name_ci_idx', 'full_name'),
+    ('profile_phone_ci_idx', 'phone'),
+    ('profile_id_number_ci_idx', 'id_number'),
+]
+USER_INDEXES = [
+    ('user_username_ci_idx', 'username'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    profile_table = apps.get_model('accounts', 'Profile')._meta.db_table
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    db_indexes.create_ci_indexes(schema_editor, profile_table, PROFILE_INDEXES)
+    db_indexes.create_ci_indexes(schema_editor, user_table, USER_INDEXES)
+
+
+def drop_indexes(apps, schema_editor):
+    db_indexes.drop_indexes(schema_editor, PROFILE_INDEXES + USER_INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_profile_driver_license_profile_full_name_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        # after auth's own table rebuilds, which would drop the username index on SQLite
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
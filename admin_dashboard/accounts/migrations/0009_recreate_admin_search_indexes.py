@@ -0,0 +1,38 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:20
+
+from django.conf import settings
+from django.db import migrations
+
+from core import db_indexes
+
+# On SQLite, 0008 rebuilt accounts_profile, and databases migrated before 0005
+# depended on auth 0012 may have had auth_user rebuilt after it: both dropped
+# indexes 0005 created
+PROFILE_INDEXES = [
+    ('profile_full_name_ci_idx', 'full_name'),
+    ('profile_phone_ci_idx', 'phone'),
+    ('profile_id_number_ci_idx', 'id_number'),
+]
+USER_INDEXES = [
+    ('user_username_ci_idx', 'username'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    profile_table = apps.get_model('accounts', 'Profile')._meta.db_table
+    user_table = apps.get_model(settings.AUTH_USER_MODEL)._meta.db_table
+    db_indexes.create_ci_indexes(schema_editor, profile_table, PROFILE_INDEXES)
+    db_indexes.create_ci_indexes(schema_editor, user_table, USER_INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0008_profile_replication'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        # 0005 drops them when unapplied
+        migrations.RunPython(create_indexes, migrations.RunPython.noop),
+    ]
@@ -33,5 +33,38 @@ class Profile(models.Model):
     driver_license = models.FileField(upload_to='licenses/', blank=True, null=True)
     is_driver_approved = models.BooleanField(default=False)
 
+    # Replication with the mobile app's Supabase schema (see replication.bridge):
+    # the Supabase users/profiles id, and the change-log timestamp
+    supabase_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True, db_index=True)
+
     def __str__(self):
         return f"{self.user.username} ({self.role})"
+
+
+class Document(models.Model):
+    """An uploaded identity document, stored once per distinct content.
+
+    Files live at a path derived from their SHA-256 (see ``accounts.uploads``),
+    so profiles uploading the same bytes share one stored file. ``thumbnail``
+    is filled in by a background job for image uploads.
+    """
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='documents/', max_length=200, unique=True)
+    size = models.PositiveBigIntegerField()
+    content_type = models.CharField(max_length=100, blank=True)
+    thumbnail = models.FileField(upload_to='thumbnails/', max_length=200, blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f'{self.sha256[:12]} ({self.size} bytes)'
+
+
+class RevokedToken(models.Model):
+    """A JWT revoked before its expiry, by JTI. Rows are useless once ``expires_at`` passes."""
+    jti = models.CharField(max_length=64, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    created = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
@@ -1,17 +1,19 @@
 from django.contrib.auth import get_user_model
 from rest_framework import serializers
+from core.instrumentation import InstrumentedSerializerMixin
 from .models import Profile
+from .uploads import attach_documents
 
 User = get_user_model()
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ('id', 'username', 'email')
 
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     user = UserSerializer(read_only=True)
 
     class Meta:
@@ -67,9 +69,6 @@ class RegistrationSerializer(serializers.Serializer):
             profile.id_type = id_type
         if id_number:
             profile.id_number = id_number
-        if id_document:
-            profile.id_document = id_document
-        if driver_license:
-            profile.driver_license = driver_license
+        attach_documents(profile, id_document, driver_license)
         profile.save()
         return user
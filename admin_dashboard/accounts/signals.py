@@ -1,11 +1,14 @@
 from django.db.models.signals import post_save
-from django.dispatch import receiver
+from django.dispatch import Signal, receiver
 from django.contrib.auth import get_user_model
 
 from .models import Profile
 
 User = get_user_model()
 
+# Sent for each driver profile an admin approves. Arguments: profile, approved_by.
+driver_approved = Signal()
+
 
 @receiver(post_save, sender=User)
 def create_user_profile(sender, instance, created, **kwargs):
@@ -16,3 +19,17 @@ def create_user_profile(sender, instance, created, **kwargs):
 def save_user_profile(sender, instance, **kwargs):
     if hasattr(instance, 'profile'):
         instance.profile.save()
+
+
+@receiver(post_save, sender=User)
+@receiver(post_save, sender=Profile)
+def invalidate_user_state(sender, instance, **kwargs):
+    # drop this process's cached auth state; other processes catch up within its TTL
+    from .authentication import user_states
+    user_states.invalidate(instance.pk if sender is User else instance.user_id)
+
+
+@receiver(driver_approved)
+def invalidate_approved_driver_state(sender, profile, **kwargs):
+    from .authentication import user_states
+    user_states.invalidate(profile.user_id)
@@ -0,0 +1,43 @@
+import shutil
+import tempfile
+
+from django.contrib.auth.models import User
+from django.core.files.base import ContentFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from .models import Document
+
+
+class DocumentFileTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media)
+        self.enterContext(override_settings(MEDIA_ROOT=media))
+        self.client.force_login(User.objects.create_user('staff', password='x', is_staff=True))
+
+    def document(self, name, content_type, body=b'data'):
+        document = Document(sha256=name.ljust(64, '0'), size=len(body), content_type=content_type)
+        document.file.save(name, ContentFile(body), save=False)
+        document.save()
+        return reverse('document_file', args=[document.sha256])
+
+    def test_images_and_pdfs_are_served_inline(self):
+        for name, content_type in (('id.png', 'image/png'), ('license.pdf', 'application/pdf')):
+            response = self.client.get(self.document(name, content_type))
+            self.assertEqual(response['Content-Type'], content_type)
+            self.assertNotIn('attachment', response.get('Content-Disposition', ''))
+            self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+    def test_other_types_are_downloaded(self):
+        for name, content_type in (('id.html', 'text/html'), ('id.svg', 'image/svg+xml'), ('id.bin', '')):
+            response = self.client.get(self.document(name, content_type, b'<script>alert(1)</script>'))
+            self.assertEqual(response['Content-Type'], 'application/octet-stream')
+            self.assertTrue(response['Content-Disposition'].startswith('attachment'))
+            self.assertEqual(response['X-Content-Type-Options'], 'nosniff')
+
+    def test_staff_only(self):
+        url = self.document('id.png', 'image/png')
+        self.client.force_login(User.objects.create_user('rider', password='x'))
+        self.assertEqual(self.client.get(url).status_code, 302)
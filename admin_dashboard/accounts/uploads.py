@@ -0,0 +1,118 @@
+"""Upload pipeline for driver ID and license documents.
+
+* ``HashingUploadHandler`` spools uploads to a temporary file in chunks (never
+  holding a whole photo in memory) and hashes them as the bytes arrive.
+* ``store_document`` saves each distinct content once, under a path derived
+  from its SHA-256, through the default storage backend. Uploading an
+  already-stored document costs one indexed lookup and no write.
+* Image thumbnails for the admin are generated after commit on the
+  background pool (``core.tasks``), so registration never waits for them.
+  Pillow is optional; without it documents simply have no preview.
+"""
+import hashlib
+import logging
+import mimetypes
+import os
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+
+from core import tasks
+from .models import Document
+
+logger = logging.getLogger(__name__)
+
+THUMBNAIL_SIZE = (320, 320)
+
+
+class HashingUploadHandler(TemporaryFileUploadHandler):
+    """Stream every upload to a temporary file, computing its SHA-256 on the way."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self._sha256 = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self._sha256.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        uploaded.sha256 = self._sha256.hexdigest()
+        return uploaded
+
+
+def content_hash(uploaded):
+    """SHA-256 of an uploaded file, reusing the one computed during upload if any."""
+    digest = getattr(uploaded, 'sha256', None)
+    if digest:
+        return digest
+    sha = hashlib.sha256()
+    for chunk in uploaded.chunks():
+        sha.update(chunk)
+    uploaded.seek(0)
+    return sha.hexdigest()
+
+
+def document_path(digest, filename):
+    ext = os.path.splitext(filename or '')[1].lower()[:10]
+    return f'documents/{digest[:2]}/{digest}{ext}'
+
+
+def store_document(uploaded):
+    """Store ``uploaded`` unless identical content already exists; return its Document."""
+    digest = content_hash(uploaded)
+    existing = Document.objects.filter(sha256=digest).first()
+    if existing is not None:
+        return existing
+
+    content_type = getattr(uploaded, 'content_type', '') or mimetypes.guess_type(uploaded.name or '')[0] or ''
+    # streamed from the temp file in chunks; FileSystemStorage moves it into place
+    name = default_storage.save(document_path(digest, uploaded.name), uploaded)
+    try:
+        with transaction.atomic():
+            document = Document.objects.create(
+                sha256=digest, file=name, size=uploaded.size, content_type=content_type[:100])
+    except IntegrityError:
+        # a concurrent upload of the same bytes won the race
+        default_storage.delete(name)
+        return Document.objects.get(sha256=digest)
+
+    if content_type.startswith('image/'):
+        transaction.on_commit(lambda: tasks.submit(make_thumbnail, document.pk))
+    return document
+
+
+def attach_documents(profile, id_document=None, driver_license=None):
+    """Point the profile's document fields at deduplicated stored files."""
+    if id_document:
+        profile.id_document.name = store_document(id_document).file.name
+    if driver_license:
+        profile.driver_license.name = store_document(driver_license).file.name
+
+
+def make_thumbnail(document_pk):
+    """Write a compressed JPEG preview for an image document (background job)."""
+    try:
+        from PIL import Image, ImageOps
+    except ImportError:
+        logger.info('Pillow is not installed; skipping document thumbnails')
+        return None
+
+    document = Document.objects.get(pk=document_pk)
+    if document.thumbnail:
+        return document.thumbnail.name
+    with default_storage.open(document.file.name, 'rb') as source:
+        image = Image.open(source)
+        image.draft('RGB', THUMBNAIL_SIZE)  # lets JPEG decode at reduced size
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        image.thumbnail(THUMBNAIL_SIZE)
+        buffer = BytesIO()
+        image.save(buffer, 'JPEG', quality=getattr(settings, 'DOCUMENT_THUMBNAIL_QUALITY', 70), optimize=True)
+    name = default_storage.save(f'thumbnails/{document.sha256[:2]}/{document.sha256}.jpg', ContentFile(buffer.getvalue()))
+    Document.objects.filter(pk=document.pk).update(thumbnail=name)
+    return name
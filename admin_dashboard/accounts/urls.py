@@ -1,5 +1,5 @@
 from django.urls import path
-from .views import RegisterView, register_page, rider_dashboard, driver_dashboard, pending_approval
+from .views import RegisterView, register_page, rider_dashboard, driver_dashboard, pending_approval, document_file
 
 urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
@@ -7,4 +7,5 @@ urlpatterns = [
     path('rider/', rider_dashboard, name='rider_dashboard'),
     path('driver/', driver_dashboard, name='driver_dashboard'),
     path('pending/', pending_approval, name='pending_approval'),
+    path('documents/<str:sha256>/', document_file, name='document_file'),
 ]
@@ -1,13 +1,32 @@
+import os
+
 from django.contrib.auth import get_user_model
-from django.shortcuts import render, redirect
+from django.contrib.admin.views.decorators import staff_member_required
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.shortcuts import get_object_or_404, render, redirect
 from django.contrib.auth.decorators import login_required
+from django.utils.cache import patch_cache_control
 from django.utils.decorators import method_decorator
 from rest_framework import generics, permissions
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.views.decorators.http import condition
 from .serializers import RegistrationSerializer, UserSerializer, ProfileSerializer
-from .models import Profile
+from .models import Document, Profile
+from .authentication import revoke
+from .uploads import attach_documents
 
 User = get_user_model()
 
+DOCUMENT_CACHE_SECONDS = 60 * 60 * 24 * 365
+# content types the uploader claims are only trusted for these; anything else
+# (HTML, SVG...) would run as script on the admin's origin, so it is downloaded
+INLINE_DOCUMENT_TYPES = ('image/jpeg', 'image/png', 'application/pdf')
+
 
 class RegisterView(generics.CreateAPIView):
     """API registration endpoint that creates a User and Profile with role."""
@@ -16,6 +35,25 @@ class RegisterView(generics.CreateAPIView):
     permission_classes = [permissions.AllowAny]
 
 
+class RevokeTokenView(APIView):
+    """Log out an API client: blocklist the given refresh token and the access token in use."""
+    permission_classes = [permissions.IsAuthenticated]
+
+    def post(self, request):
+        raw = request.data.get('refresh')
+        if raw:
+            try:
+                refresh = RefreshToken(raw)
+            except TokenError as exc:
+                raise InvalidToken(exc.args[0])
+            if str(refresh.get(jwt_settings.USER_ID_CLAIM)) != str(request.user.pk):
+                return Response({'detail': 'Token belongs to another user.'}, status=403)
+            revoke(refresh)
+        if request.auth is not None and hasattr(request.auth, 'payload'):
+            revoke(request.auth)
+        return Response({'detail': 'Token revoked.'})
+
+
 from django.views.decorators.csrf import ensure_csrf_cookie
 
 
@@ -82,10 +120,7 @@ def register_page(request):
             profile.id_type = id_type
         if id_number:
             profile.id_number = id_number
-        if id_document:
-            profile.id_document = id_document
-        if driver_license:
-            profile.driver_license = driver_license
+        attach_documents(profile, id_document, driver_license)
         # drivers require admin approval before access
         if role == 'driver':
             profile.is_driver_approved = False
@@ -107,8 +142,8 @@ def rider_dashboard(request):
     profile = getattr(request.user, 'profile', None)
     if profile and profile.role != 'rider':
         return redirect('login')
-    rides = request.user.ride_requests.all()
-    return render(request, 'core/rider_dashboard.html', {'rides': rides})
+    from rides.dashboard import rider_context
+    return render(request, 'core/rider_dashboard.html', rider_context(request.user))
 
 
 @login_required
@@ -120,14 +155,38 @@ def driver_dashboard(request):
     # If driver is not yet approved by admin, send to pending page
     if profile and not profile.is_driver_approved:
         return redirect('pending_approval')
-    from rides.models import RideRequest
-    # Use `status='requested'` for available/unassigned rides (model has no `completed` boolean)
-    available = RideRequest.objects.filter(driver__isnull=True, status='requested')
-    assigned = RideRequest.objects.filter(driver=request.user)
-    return render(request, 'core/driver_dashboard.html', {'available': available, 'assigned': assigned})
+    from rides.dashboard import driver_context
+    return render(request, 'core/driver_dashboard.html', driver_context(request.user))
 
 
 @login_required
 def pending_approval(request):
     # Simple page informing driver their account is awaiting admin approval
     return render(request, 'core/pending_approval.html')
+
+
+def _document_etag(request, sha256):
+    # stored files are content-addressed, so the hash is a strong validator
+    return f'{sha256}-thumb' if request.GET.get('thumbnail') else sha256
+
+
+@staff_member_required
+@condition(etag_func=_document_etag)
+def document_file(request, sha256):
+    """Serve an uploaded ID/license document (or its preview) to staff, cacheably."""
+    document = get_object_or_404(Document, sha256=sha256)
+    if request.GET.get('thumbnail'):
+        if not document.thumbnail:
+            raise Http404('No preview for this document')
+        field, content_type = document.thumbnail, 'image/jpeg'
+    else:
+        field, content_type = document.file, document.content_type
+    if content_type in INLINE_DOCUMENT_TYPES:
+        response = FileResponse(default_storage.open(field.name, 'rb'), content_type=content_type)
+    else:
+        response = FileResponse(default_storage.open(field.name, 'rb'), as_attachment=True,
+                                filename=os.path.basename(field.name), content_type='application/octet-stream')
+    response['X-Content-Type-Options'] = 'nosniff'
+    # private: identity documents must never land in shared caches
+    patch_cache_control(response, private=True, max_age=DOCUMENT_CACHE_SECONDS, immutable=True)
+    return response
@@ -3,6 +3,11 @@ ASGI config for admin_dashboard project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Like ``admin_dashboard.wsgi`` it warms up at import (``core.warmup``), so a
+server that preloads the application before forking, e.g.
+``gunicorn --preload -k uvicorn.workers.UvicornWorker admin_dashboard.asgi``,
+starts every worker warm. ``admin_dashboard.settings_api`` serves the API only.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -14,3 +19,7 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'admin_dashboard.settings')
 
 application = get_asgi_application()
+
+from core.warmup import warm  # noqa: E402  (needs the app registry populated above)
+
+warm()
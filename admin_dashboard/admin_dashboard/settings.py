@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -42,20 +43,28 @@ INSTALLED_APPS = [
     'rest_framework_simplejwt',
     'accounts',
     'rides',
+    'search',
+    'geo',
+    'replication',
 ]
 
 MIDDLEWARE = [
+    'core.middleware.InstrumentationMiddleware',
+    'core.middleware.SlowQueryLogMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'core.middleware.CityMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
 ROOT_URLCONF = 'admin_dashboard.urls'
 
+# No 'loaders' option: Django wraps the filesystem/app loaders in the cached
+# loader, so each template is compiled once per process.
 TEMPLATES = [
     {
         'BACKEND': 'django.template.backends.django.DjangoTemplates',
@@ -84,6 +93,36 @@ DATABASES = {
     }
 }
 
+# Cities and the database holding each one's rides (see core.cities). Extra
+# cities with their own SQLite shard: CITY_DATABASES="bo=/data/bo.sqlite3,...",
+# then `python manage.py migrate --database city_bo`. Give a city its shard
+# before it has rides; existing rides are not moved.
+CITIES = {
+    'kenema': {'NAME': 'Kenema', 'DATABASE': 'default'},
+}
+DEFAULT_CITY = 'kenema'
+for _entry in filter(None, os.environ.get('CITY_DATABASES', '').split(',')):
+    _city, _path = (part.strip() for part in _entry.split('=', 1))
+    DATABASES[f'city_{_city}'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': _path}
+    CITIES[_city] = {'NAME': _city.replace('-', ' ').title(), 'DATABASE': f'city_{_city}'}
+# The mobile app's Supabase Postgres, for replication (see replication.bridge).
+# Apply replication/sql/supabase_changelog.sql there first. For local testing,
+# point SUPABASE_SQLITE at a stand-in file instead and create its tables with
+# `python manage.py run_replication --create-tables`.
+if os.environ.get('SUPABASE_DB_HOST'):
+    DATABASES['supabase'] = {
+        'ENGINE': 'django.db.backends.postgresql',
+        'HOST': os.environ['SUPABASE_DB_HOST'],
+        'PORT': os.environ.get('SUPABASE_DB_PORT', '5432'),
+        'NAME': os.environ.get('SUPABASE_DB_NAME', 'postgres'),
+        'USER': os.environ.get('SUPABASE_DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('SUPABASE_DB_PASSWORD', ''),
+        'OPTIONS': {'sslmode': os.environ.get('SUPABASE_DB_SSLMODE', 'require')},
+    }
+elif os.environ.get('SUPABASE_SQLITE'):
+    DATABASES['supabase'] = {'ENGINE': 'django.db.backends.sqlite3', 'NAME': os.environ['SUPABASE_SQLITE']}
+DATABASE_ROUTERS = ['replication.routers.SupabaseRouter', 'core.routers.CityRouter']
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
@@ -121,6 +160,15 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# Uploaded ID/license documents (see accounts.uploads). Files go through the
+# default storage backend; configure STORAGES['default'] to use another one.
+MEDIA_ROOT = os.environ.get('MEDIA_ROOT', BASE_DIR / 'media')
+MEDIA_URL = 'media/'
+# Stream uploads to temporary files in chunks, hashing them as they arrive,
+# instead of buffering small uploads in memory.
+FILE_UPLOAD_HANDLERS = ['accounts.uploads.HashingUploadHandler']
+DOCUMENT_THUMBNAIL_QUALITY = 70
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -131,10 +179,12 @@ LOGIN_REDIRECT_URL = '/admin/'
 
 # Django REST Framework configuration
 REST_FRAMEWORK = {
+    # Bearer tokens first so API calls never load the session; session/basic
+    # are only consulted for requests without an Authorization: Bearer header.
     'DEFAULT_AUTHENTICATION_CLASSES': (
+        'accounts.authentication.CachedJWTAuthentication',
         'rest_framework.authentication.SessionAuthentication',
         'rest_framework.authentication.BasicAuthentication',
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
@@ -146,4 +196,131 @@ from datetime import timedelta
 SIMPLE_JWT = {
     'ACCESS_TOKEN_LIFETIME': timedelta(minutes=60),
     'AUTH_HEADER_TYPES': ('Bearer',),
+    # tokens carry role/approval claims for accounts.authentication.CachedJWTAuthentication
+    'TOKEN_OBTAIN_SERIALIZER': 'accounts.authentication.ClaimsTokenObtainPairSerializer',
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.authentication.ClaimsTokenRefreshSerializer',
+}
+
+# JWT fast path: how long cached user state (role, approval, active flag) is
+# trusted, and how often revoked token JTIs are re-read from the database.
+JWT_FAST_PATH = {
+    'USER_STATE_TTL': int(os.environ.get('JWT_USER_STATE_TTL', '60')),
+    'USER_STATE_MAXSIZE': 10000,
+    'BLOCKLIST_REFRESH_INTERVAL': 5,
+}
+
+# Per-request instrumentation (Server-Timing headers, /metrics, sampled cProfile).
+# Disabled by default; the middleware removes itself when ENABLED is false.
+INSTRUMENTATION = {
+    'ENABLED': os.environ.get('DJANGO_INSTRUMENTATION', '') == '1',
+    # Fraction of requests (0.0-1.0) to run under cProfile
+    'PROFILE_SAMPLE_RATE': float(os.environ.get('DJANGO_PROFILE_SAMPLE_RATE', '0')),
+    'PROFILE_DIR': BASE_DIR / 'profiles',
+    # Log a warning when a request repeats identical queries this many times
+    'DUPLICATE_QUERY_WARNING': 5,
+    # Client addresses allowed to scrape /metrics (comma-separated in the env);
+    # an empty list denies everyone
+    'METRICS_ALLOWED_IPS': os.environ.get('DJANGO_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(','),
+}
+
+# Slow-query log: queries over THRESHOLD_MS are logged with their view,
+# fingerprint and EXPLAIN plan and aggregated in the admin (Core > Slow queries).
+SLOW_QUERY_LOG = {
+    'ENABLED': os.environ.get('DJANGO_SLOW_QUERY_LOG', '') == '1',
+    'THRESHOLD_MS': float(os.environ.get('DJANGO_SLOW_QUERY_MS', '100')),
+    'EXPLAIN': True,
+}
+
+# Scheduled rides: release into the available pool LEAD_TIME before pickup.
+# Run the dispatcher with `python manage.py run_dispatcher`.
+RIDE_DISPATCH = {
+    'LEAD_TIME': timedelta(minutes=10),
+    'HORIZON': timedelta(hours=1),
+    'RESYNC_INTERVAL': timedelta(minutes=5),
+    'POLL_INTERVAL': timedelta(seconds=5),
+}
+
+# How long a ride may wait in 'requested' before the reaper cancels it,
+# per transport type. Run with `python manage.py reap_rides --loop`.
+RIDE_REQUEST_TTL = {
+    'taxi': timedelta(minutes=30),
+    'bike': timedelta(minutes=20),
+    'default': timedelta(minutes=30),
+}
+
+# Completed/cancelled rides older than this move to the ArchivedRide table
+# (`python manage.py archive_rides`).
+RIDE_ARCHIVE_AFTER_DAYS = 30
+
+# Admin bulk actions run in chunked transactions; selections of at least
+# BACKGROUND_THRESHOLD rows run on the in-process background pool. Workers
+# stamp their jobs every HEARTBEAT_INTERVAL; a running job not stamped for
+# STALE_AFTER (its worker was recycled or crashed) is marked failed.
+BULK_ACTIONS = {
+    'CHUNK_SIZE': int(os.environ.get('BULK_CHUNK_SIZE', '500')),
+    'BACKGROUND_THRESHOLD': int(os.environ.get('BULK_BACKGROUND_THRESHOLD', '5000')),
+    'HEARTBEAT_INTERVAL': timedelta(seconds=30),
+    'STALE_AFTER': timedelta(minutes=2),
 }
+BACKGROUND_WORKERS = int(os.environ.get('BACKGROUND_WORKERS', '2'))
+
+# Offline routing for trip estimates and pickup ETAs. Build the graph with
+# `python manage.py build_road_graph <extract.osm>`; routing is off while
+# GRAPH_PATH is unset.
+ROUTING = {
+    'GRAPH_PATH': os.environ.get('ROAD_GRAPH_PATH') or None,
+    'CACHE_SIZE': 4096,
+    'MAX_SNAP_METERS': 1000,
+    'ACCESS_SPEED_KMH': 15,
+    # the driver feed (?near=) routes to at most NEARBY_CANDIDATES rides within NEARBY_RADIUS_M
+    'NEARBY_RADIUS_M': 15000,
+    'NEARBY_CANDIDATES': 200,
+}
+
+# Offline geocoding of ride origins/destinations against the Place gazetteer
+# (`python manage.py load_gazetteer`, backfill with `geocode_rides`).
+GEOCODER = {
+    'CACHE_SIZE': 10000,
+    'MIN_SIMILARITY': 0.5,
+    'RELOAD_INTERVAL': 300,
+}
+
+# How long batch operation results are kept for replay (`prune_idempotency_keys`).
+IDEMPOTENCY_KEY_TTL = timedelta(days=7)
+
+# Shared cache for dashboard fragments and their versions. The default
+# per-process memory cache is fine for a single worker; point several
+# workers at one backend (e.g. Redis or Memcached) so invalidation reaches all.
+# core.cache.InstrumentedCache wraps it to count hits and misses (INSTRUMENTATION).
+CACHES = {
+    'default': {
+        'BACKEND': 'core.cache.InstrumentedCache',
+        'LOCATION': os.environ.get('DJANGO_CACHE_LOCATION', ''),
+        'OPTIONS': {
+            'BACKEND': os.environ.get('DJANGO_CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        },
+    }
+}
+
+# Rider/driver dashboards: ride lists render from cached fragments (see
+# rides.dashboard) and show INITIAL_RIDES rows before "Load more".
+DASHBOARD = {
+    'FRAGMENT_TTL': 300,
+    'INITIAL_RIDES': 20,
+}
+
+# Two-way replication with the mobile app's Supabase schema
+# (`python manage.py run_replication`). Each pass re-reads OVERLAP before its
+# cursors to catch transactions that committed late; a stream whose changes
+# waited longer than LAG_WARNING is logged.
+REPLICATION = {
+    'DATABASE': 'supabase',
+    'BATCH_SIZE': int(os.environ.get('REPLICATION_BATCH_SIZE', '500')),
+    'POLL_INTERVAL': timedelta(seconds=1),
+    'OVERLAP': timedelta(seconds=5),
+    'LAG_WARNING': timedelta(seconds=10),
+}
+
+# Import views, build URL/serializer/template caches when the WSGI/ASGI module
+# loads (core.warmup), so preforked workers start warm. DJANGO_WARMUP=0 skips it.
+WARMUP_ON_START = os.environ.get('DJANGO_WARMUP', '1') == '1'
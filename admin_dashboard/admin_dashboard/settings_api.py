@@ -0,0 +1,24 @@
+"""Settings for API-only workers.
+
+Same configuration as ``admin_dashboard.settings`` minus the admin, messages,
+static files and template engines, with a URLconf holding just the JSON API
+(``admin_dashboard.urls_api``), so these workers skip admin autodiscovery,
+the web views and template setup. (DRF's schema module still imports the
+admin package itself.) Serve the admin and the HTML pages from workers on the full settings
+and route ``/api/`` and ``/metrics`` to workers started with
+``DJANGO_SETTINGS_MODULE=admin_dashboard.settings_api``.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import INSTALLED_APPS, MIDDLEWARE, REST_FRAMEWORK
+
+WEB_ONLY_APPS = ('django.contrib.admin', 'django.contrib.messages', 'django.contrib.staticfiles')
+INSTALLED_APPS = [app for app in INSTALLED_APPS if app not in WEB_ONLY_APPS]
+MIDDLEWARE = [entry for entry in MIDDLEWARE if entry != 'django.contrib.messages.middleware.MessageMiddleware']
+
+ROOT_URLCONF = 'admin_dashboard.urls_api'
+# JSON only: no browsable API, so no template engine to configure
+TEMPLATES = []
+REST_FRAMEWORK = {
+    **REST_FRAMEWORK,
+    'DEFAULT_RENDERER_CLASSES': ('rest_framework.renderers.JSONRenderer',),
+}
@@ -0,0 +1,27 @@
+"""Settings for the test suite.
+
+Same configuration as ``admin_dashboard.settings`` plus a second city, Bo,
+with its own database and a SQLite stand-in for the mobile app's Supabase
+database, so the sharding (``core.cities``) and replication
+(``replication.bridge``) tests run::
+
+    python manage.py test --settings=admin_dashboard.settings_test
+
+The test runner gives every alias its own in-memory database. Under the
+plain settings those tests are skipped unless ``CITY_DATABASES``/
+``SUPABASE_SQLITE`` configure the same aliases.
+"""
+from .settings import *  # noqa: F401,F403
+from .settings import CITIES, DATABASES
+
+DATABASES = {
+    **DATABASES,
+    'city_bo': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+    'supabase': {'ENGINE': 'django.db.backends.sqlite3', 'NAME': ':memory:'},
+}
+CITIES = {
+    **CITIES,
+    'bo': {'NAME': 'Bo', 'DATABASE': 'city_bo'},
+}
+# nothing to warm for a test run
+WARMUP_ON_START = False
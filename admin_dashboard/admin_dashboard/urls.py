@@ -16,22 +16,29 @@ Including another URLconf
 """
 from django.contrib import admin
 from django.urls import path, include
-from core.views import RoleLoginView
+from core.views import RoleLoginView, metrics, switch_city
 from django.contrib.auth.views import LogoutView
 from rest_framework_simplejwt.views import (
     TokenObtainPairView,
     TokenRefreshView,
 )
+from accounts.views import RevokeTokenView
 
 urlpatterns = [
+    path('admin/city/<slug:city>/', switch_city, name='switch_city'),
     path('admin/', admin.site.urls),
     # Render the login page at the site root
     path('', RoleLoginView.as_view(template_name='core/login.html'), name='login'),
     path('accounts/logout/', LogoutView.as_view(next_page='/'), name='logout'),
     # API endpoints
     path('api/accounts/', include('accounts.urls')),
+    path('api/search/', include('search.urls')),
+    path('api/geo/', include('geo.urls')),
     path('api/', include('rides.urls')),
     # JWT token endpoints
     path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
     path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/revoke/', RevokeTokenView.as_view(), name='token_revoke'),
+    # Instrumentation counters (404 unless INSTRUMENTATION['ENABLED'])
+    path('metrics', metrics, name='metrics'),
 ]
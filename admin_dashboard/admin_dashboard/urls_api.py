@@ -0,0 +1,26 @@
+"""URL configuration for API-only workers (``admin_dashboard.settings_api``).
+
+The JSON API from ``admin_dashboard.urls`` without the admin, the web login
+and the HTML dashboards, so these workers never import them.
+"""
+from django.urls import path, include
+from rest_framework_simplejwt.views import (
+    TokenObtainPairView,
+    TokenRefreshView,
+)
+from accounts.views import RegisterView, RevokeTokenView
+from core.views import metrics
+from rides.urls import router
+
+urlpatterns = [
+    path('api/accounts/register/', RegisterView.as_view(), name='register'),
+    path('api/search/', include('search.urls')),
+    path('api/geo/', include('geo.urls')),
+    path('api/', include(router.urls)),
+    # JWT token endpoints
+    path('api/token/', TokenObtainPairView.as_view(), name='token_obtain_pair'),
+    path('api/token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('api/token/revoke/', RevokeTokenView.as_view(), name='token_revoke'),
+    # Instrumentation counters (404 unless INSTRUMENTATION['ENABLED'])
+    path('metrics', metrics, name='metrics'),
+]
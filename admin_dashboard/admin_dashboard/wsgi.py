@@ -3,6 +3,14 @@ WSGI config for admin_dashboard project.
 
 It exposes the WSGI callable as a module-level variable named ``application``.
 
+The callable is created and warmed up (``core.warmup``) at import, so load it
+once in a preforking server's master and let workers inherit it::
+
+    gunicorn --preload admin_dashboard.wsgi
+
+API-only workers can use the lighter ``admin_dashboard.settings_api`` profile
+by setting ``DJANGO_SETTINGS_MODULE`` accordingly.
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/wsgi/
 """
@@ -14,3 +22,7 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'admin_dashboard.settings')
 
 application = get_wsgi_application()
+
+from core.warmup import warm  # noqa: E402  (needs the app registry populated above)
+
+warm()
@@ -0,0 +1,40 @@
+from django.contrib import admin
+from .bulk import fail_stale_jobs
+from .models import BulkJob, SlowQuery
+
+
+@admin.register(SlowQuery)
+class SlowQueryAdmin(admin.ModelAdmin):
+    list_display = ('view', 'short_sql', 'calls', 'avg_ms_display', 'max_ms', 'last_seen')
+    list_filter = ('view',)
+    search_fields = ('view', 'normalized_sql')
+    ordering = ('-total_ms',)
+    readonly_fields = [f.name for f in SlowQuery._meta.fields]
+
+    def short_sql(self, obj):
+        return obj.normalized_sql[:120]
+    short_sql.short_description = 'SQL'
+
+    def avg_ms_display(self, obj):
+        return f'{obj.avg_ms:.1f}'
+    avg_ms_display.short_description = 'Avg ms'
+
+    def has_add_permission(self, request):
+        return False
+
+
+@admin.register(BulkJob)
+class BulkJobAdmin(admin.ModelAdmin):
+    list_display = ('id', 'action', 'requested_by', 'status', 'processed', 'total', 'changed', 'created',
+                    'finished_at', 'worker')
+    list_filter = ('status', 'action')
+    list_select_related = ('requested_by',)
+    readonly_fields = [f.name for f in BulkJob._meta.fields]
+
+    def changelist_view(self, request, extra_context=None):
+        # show jobs orphaned by a stopped worker as failed rather than running forever
+        fail_stale_jobs()
+        return super().changelist_view(request, extra_context)
+
+    def has_add_permission(self, request):
+        return False
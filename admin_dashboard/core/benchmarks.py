@@ -0,0 +1,259 @@
+"""Benchmark cases for the API and dashboard hot paths.
+
+Each case is a pair of callables: ``setup(ctx)`` prepares whatever a single
+iteration needs (untimed) and ``run(ctx, arg)`` performs the request being
+measured. ``ctx`` is a :class:`BenchContext` holding the seeded dataset and
+pre-authenticated clients.
+
+Used by the ``benchmark`` management command; see that command for options.
+"""
+import itertools
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+
+BENCH_PASSWORD = 'bench-pass-123'
+
+User = get_user_model()
+
+
+class BenchContext:
+    """Seeded dataset plus clients shared by all cases."""
+
+    def __init__(self, riders, drivers, rides):
+        from accounts.authentication import ClaimsRefreshToken
+
+        self.riders = riders
+        self.drivers = drivers
+        self.rides = rides
+        self.rider = riders[0]
+        self.driver = drivers[0]
+        self.counter = itertools.count()
+
+        self.rider_refresh = ClaimsRefreshToken.for_user(self.rider)
+        self.driver_refresh = ClaimsRefreshToken.for_user(self.driver)
+        self.rider_api = Client(HTTP_AUTHORIZATION=f'Bearer {self.rider_refresh.access_token}')
+        self.driver_api = Client(HTTP_AUTHORIZATION=f'Bearer {self.driver_refresh.access_token}')
+        self.anon = Client()
+        self.rider_web = Client()
+        self.rider_web.force_login(self.rider)
+        self.driver_web = Client()
+        self.driver_web.force_login(self.driver)
+
+    def next_id(self):
+        return next(self.counter)
+
+
+def seed(num_rides=1000, num_riders=100, num_drivers=20):
+    """Create riders, approved drivers and a mix of rides; return a BenchContext.
+
+    Rows are bulk inserted, so the ``post_save`` profile signal does not fire
+    and profiles are created explicitly.
+    """
+    from accounts.models import Profile
+    from rides.models import RideRequest
+
+    password = make_password(BENCH_PASSWORD)
+    users = [User(username=f'bench-rider-{i}', password=password) for i in range(num_riders)]
+    users += [User(username=f'bench-driver-{i}', password=password) for i in range(num_drivers)]
+    User.objects.bulk_create(users, batch_size=500)
+    users = list(User.objects.filter(username__startswith='bench-').order_by('id'))
+    riders = [u for u in users if u.username.startswith('bench-rider-')]
+    drivers = [u for u in users if u.username.startswith('bench-driver-')]
+
+    profiles = [Profile(user=u, role='rider', full_name=u.username, phone='000') for u in riders]
+    profiles += [
+        Profile(user=u, role='driver', full_name=u.username, phone='000', is_driver_approved=True)
+        for u in drivers
+    ]
+    Profile.objects.bulk_create(profiles, batch_size=500)
+
+    # Spread rides across riders; roughly a fifth each requested/assigned/cancelled,
+    # the remaining two fifths completed.
+    statuses = ('requested', 'assigned', 'completed', 'completed', 'cancelled')
+    rides = []
+    for i in range(num_rides):
+        status = statuses[i % len(statuses)]
+        rides.append(RideRequest(
+            # consecutive blocks per rider so every rider gets every status
+            rider=riders[(i // len(statuses)) % len(riders)],
+            driver=None if status == 'requested' else drivers[i % len(drivers)],
+            origin=f'Origin {i % 97}',
+            destination=f'Destination {i % 89}',
+            status=status,
+        ))
+    RideRequest.objects.bulk_create(rides, batch_size=500)
+    return BenchContext(riders, drivers, rides)
+
+
+def _new_ride(ctx, **kwargs):
+    from rides.models import RideRequest
+
+    fields = {'rider': ctx.rider, 'origin': 'Bench origin', 'destination': 'Bench destination'}
+    fields.update(kwargs)
+    return RideRequest.objects.create(**fields)
+
+
+def _noop(ctx):
+    return None
+
+
+# --- cases -----------------------------------------------------------------
+
+def run_create_ride(ctx, _):
+    return ctx.rider_web.post('/api/rides/create/', {'origin': 'Bench origin', 'destination': 'Bench destination'})
+
+
+def run_available(ctx, _):
+    return ctx.driver_api.get('/api/rides/available/')
+
+
+def setup_accept(ctx):
+    return _new_ride(ctx)
+
+
+def run_accept(ctx, ride):
+    return ctx.driver_api.post(f'/api/rides/{ride.pk}/accept/')
+
+
+def setup_complete(ctx):
+    return _new_ride(ctx, driver=ctx.driver, status='assigned')
+
+
+def run_complete(ctx, ride):
+    return ctx.rider_api.post(f'/api/rides/{ride.pk}/complete/')
+
+
+def setup_status(ctx):
+    return ctx.rides[ctx.next_id() % len(ctx.rides)]
+
+
+def run_status(ctx, ride):
+    return ctx.rider_api.get(f'/api/rides/{ride.pk}/status/')
+
+
+def run_list(ctx, _):
+    return ctx.rider_api.get('/api/rides/')
+
+
+def run_history(ctx, _):
+    return ctx.rider_api.get('/api/rides/history/')
+
+
+def run_token_obtain(ctx, _):
+    return ctx.anon.post('/api/token/', {'username': ctx.rider.username, 'password': BENCH_PASSWORD})
+
+
+def run_token_refresh(ctx, _):
+    return ctx.anon.post('/api/token/refresh/', {'refresh': str(ctx.rider_refresh)})
+
+
+def setup_register(ctx):
+    return f'bench-new-{ctx.next_id()}'
+
+
+def run_register(ctx, username):
+    return ctx.anon.post('/api/accounts/register/', {'username': username, 'password': BENCH_PASSWORD})
+
+
+def run_rider_dashboard(ctx, _):
+    return ctx.rider_web.get('/api/accounts/rider/')
+
+
+def run_driver_dashboard(ctx, _):
+    return ctx.driver_web.get('/api/accounts/driver/')
+
+
+# name -> (setup, run, expected status codes)
+CASES = {
+    'create_ride': (_noop, run_create_ride, (302,)),
+    'available': (_noop, run_available, (200,)),
+    'accept': (setup_accept, run_accept, (200,)),
+    'complete': (setup_complete, run_complete, (200,)),
+    'status': (setup_status, run_status, (200,)),
+    'list': (_noop, run_list, (200,)),
+    'history': (_noop, run_history, (200,)),
+    'token_obtain': (_noop, run_token_obtain, (200,)),
+    'token_refresh': (_noop, run_token_refresh, (200,)),
+    'register': (setup_register, run_register, (201,)),
+    'rider_dashboard': (_noop, run_rider_dashboard, (200,)),
+    'driver_dashboard': (_noop, run_driver_dashboard, (200,)),
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(0, min(len(sorted_values) - 1, round(pct / 100.0 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[rank]
+
+
+def run_case(ctx, name, iterations=50, warmup=5):
+    """Time ``iterations`` runs of a case and return a result dict.
+
+    Latency and query counts come from the timed runs; allocations are
+    measured in one extra run under ``tracemalloc`` so tracing does not
+    distort the latency numbers.
+    """
+    setup, run, expected = CASES[name]
+
+    for _ in range(warmup):
+        _check(name, run(ctx, setup(ctx)), expected)
+
+    timings = []
+    queries = []
+    for _ in range(iterations):
+        arg = setup(ctx)
+        with CaptureQueriesContext(connection) as captured:
+            start = time.perf_counter()
+            response = run(ctx, arg)
+            elapsed = time.perf_counter() - start
+        _check(name, response, expected)
+        timings.append(elapsed * 1000.0)
+        queries.append(len(captured.captured_queries))
+
+    arg = setup(ctx)
+    tracemalloc.start()
+    try:
+        _check(name, run(ctx, arg), expected)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    stats = snapshot.statistics('filename')
+
+    timings.sort()
+    return {
+        'iterations': iterations,
+        'latency_ms': {
+            'min': timings[0],
+            'mean': statistics.fmean(timings),
+            'p50': percentile(timings, 50),
+            'p90': percentile(timings, 90),
+            'p95': percentile(timings, 95),
+            'p99': percentile(timings, 99),
+            'max': timings[-1],
+        },
+        'queries': {
+            'min': min(queries),
+            'mean': statistics.fmean(queries),
+            'max': max(queries),
+        },
+        'allocations': {
+            'peak_bytes': peak,
+            'retained_bytes': sum(s.size for s in stats),
+            'retained_blocks': sum(s.count for s in stats),
+        },
+    }
+
+
+def _check(name, response, expected):
+    if response.status_code not in expected:
+        raise AssertionError(f'{name}: unexpected status {response.status_code}')
@@ -0,0 +1,175 @@
+"""Chunked, transactional bulk operations for admin actions.
+
+``run_bulk_action`` splits the selected rows into chunks of
+``BULK_ACTIONS['CHUNK_SIZE']`` and runs ``process_chunk`` on each inside its
+own transaction with the rows locked, so a large selection never holds one
+long table-wide lock. Selections of ``BULK_ACTIONS['BACKGROUND_THRESHOLD']``
+rows or more run on the background pool instead; their progress is recorded
+on a :class:`core.models.BulkJob` visible in the admin.
+
+``process_chunk(rows, actor)`` returns how many rows it changed and should
+defer signals and notifications with ``transaction.on_commit`` so they go
+out once per committed chunk.
+
+Background jobs die with their web worker (recycling, deploys, crashes).
+While a process holds jobs, a heartbeat thread stamps them every
+``HEARTBEAT_INTERVAL``; :func:`fail_stale_jobs` marks running jobs whose
+heartbeat is older than ``STALE_AFTER`` as failed. It runs whenever the
+bulk job admin is opened and from ``manage.py fail_stale_bulk_jobs``.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import DatabaseError, connections, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from . import tasks
+from .models import BulkJob
+
+logger = logging.getLogger(__name__)
+
+
+# background jobs of this process, stamped by the heartbeat thread
+_owned = set()
+_owned_lock = threading.Lock()
+_heartbeat = None
+
+
+def bulk_settings():
+    defaults = {
+        'CHUNK_SIZE': 500,
+        'BACKGROUND_THRESHOLD': 5000,
+        'HEARTBEAT_INTERVAL': timedelta(seconds=30),
+        'STALE_AFTER': timedelta(minutes=2),
+    }
+    defaults.update(getattr(settings, 'BULK_ACTIONS', {}))
+    return defaults
+
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+def _beat(interval):
+    while True:
+        time.sleep(interval)
+        with _owned_lock:
+            job_ids = list(_owned)
+        if not job_ids:
+            continue
+        try:
+            BulkJob.objects.filter(pk__in=job_ids, status='running').update(heartbeat_at=timezone.now())
+        except DatabaseError:
+            logger.exception('Could not record the heartbeat of bulk jobs %s', job_ids)
+        finally:
+            connections.close_all()
+
+
+def _own(job_id):
+    """Keep stamping ``job_id`` from this process until :func:`_release`."""
+    global _heartbeat
+    with _owned_lock:
+        _owned.add(job_id)
+        # started lazily, so a preforking server's master never runs it
+        if _heartbeat is None or not _heartbeat.is_alive():
+            interval = bulk_settings()['HEARTBEAT_INTERVAL'].total_seconds()
+            _heartbeat = threading.Thread(target=_beat, args=(interval,), name='bulk-heartbeat', daemon=True)
+            _heartbeat.start()
+
+
+def _release(job_id):
+    with _owned_lock:
+        _owned.discard(job_id)
+
+
+def fail_stale_jobs(now=None):
+    """Mark running jobs whose worker stopped stamping them as failed; return how many."""
+    now = now or timezone.now()
+    cutoff = now - bulk_settings()['STALE_AFTER']
+    stale = BulkJob.objects.filter(
+        Q(heartbeat_at__lt=cutoff) | Q(heartbeat_at__isnull=True, created__lt=cutoff), status='running')
+    failed = 0
+    for job in stale:
+        last_seen = job.heartbeat_at or job.created
+        failed += BulkJob.objects.filter(pk=job.pk, status='running').update(
+            status='failed', finished_at=now,
+            error=f'Worker {job.worker or "(unknown)"} stopped (last heartbeat {last_seen:%Y-%m-%d %H:%M:%S} UTC) '
+                  f'after {job.processed} of {job.total} rows.')
+    if failed:
+        logger.warning('Marked %d bulk job(s) failed: their workers stopped', failed)
+    return failed
+
+
+def run_in_chunks(base_queryset, pks, process_chunk, actor, chunk_size=None, job=None):
+    """Apply ``process_chunk`` to ``pks`` chunk by chunk; return the total changed."""
+    chunk_size = chunk_size or bulk_settings()['CHUNK_SIZE']
+    changed = 0
+    for start in range(0, len(pks), chunk_size):
+        chunk = pks[start:start + chunk_size]
+        locked = base_queryset.select_for_update(of=('self',)).filter(pk__in=chunk)
+        # the rows may live on another database than default (see core.cities)
+        with transaction.atomic(using=locked.db):
+            rows = list(locked)
+            n = process_chunk(rows, actor)
+        changed += n
+        if job is not None:
+            BulkJob.objects.filter(pk=job.pk).update(
+                processed=F('processed') + len(chunk), changed=F('changed') + n)
+        logger.info('%s: %d/%d processed, %d changed',
+                    job.action if job else 'bulk action', start + len(chunk), len(pks), changed)
+    return changed
+
+
+def _run_job(job_id, base_queryset, pks, process_chunk, actor, chunk_size):
+    try:
+        job = BulkJob.objects.get(pk=job_id)
+        run_in_chunks(base_queryset, pks, process_chunk, actor, chunk_size, job)
+    except Exception as exc:
+        BulkJob.objects.filter(pk=job_id).update(status='failed', error=str(exc), finished_at=timezone.now())
+        raise
+    else:
+        BulkJob.objects.filter(pk=job_id).update(status='done', finished_at=timezone.now())
+    finally:
+        _release(job_id)
+
+
+def _start_job(job, *args):
+    _own(job.pk)
+    try:
+        tasks.submit(_run_job, job.pk, *args)
+    except Exception:
+        _release(job.pk)
+        raise
+
+
+def run_bulk_action(modeladmin, request, queryset, base_queryset, process_chunk, verb):
+    """Run an admin action in chunks, in the background for large selections.
+
+    ``verb`` completes the user message, e.g. ``'approved'`` gives
+    "Approved 12 of 15 selected rows."
+    """
+    config = bulk_settings()
+    pks = list(queryset.order_by('pk').values_list('pk', flat=True))
+    # keep the selection's database when the job runs outside this request
+    base_queryset = base_queryset.using(queryset.db)
+    if len(pks) >= config['BACKGROUND_THRESHOLD']:
+        action = request.POST.get('action', 'bulk action')
+        job = BulkJob.objects.create(action=action, requested_by=request.user, total=len(pks),
+                                     worker=worker_name(), heartbeat_at=timezone.now())
+        # start only once the job row is committed so the worker can see it
+        transaction.on_commit(lambda: _start_job(
+            job, base_queryset, pks, process_chunk, request.user, config['CHUNK_SIZE']))
+        modeladmin.message_user(
+            request,
+            f'{len(pks)} rows queued as background job #{job.pk}; follow its progress under Core › Bulk jobs.')
+        return None
+
+    changed = run_in_chunks(base_queryset, pks, process_chunk, request.user, config['CHUNK_SIZE'])
+    modeladmin.message_user(request, f'{verb.capitalize()} {changed} of {len(pks)} selected rows.')
+    return changed
@@ -0,0 +1,75 @@
+"""Cache backend that counts hits and misses for per-request instrumentation."""
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.module_loading import import_string
+
+from .instrumentation import record_cache
+
+_MISSING = object()
+
+
+class InstrumentedCache(BaseCache):
+    """Delegate to the backend named in ``OPTIONS['BACKEND']``, recording each lookup.
+
+    Hits and misses of ``get``/``get_many`` (and so of ``{% cache %}``
+    fragments) go to :func:`core.instrumentation.record_cache`, which shows
+    them in ``Server-Timing`` and ``/metrics``; outside an instrumented request
+    that is a no-op. The other settings are the wrapped backend's::
+
+        'default': {
+            'BACKEND': 'core.cache.InstrumentedCache',
+            'LOCATION': 'redis://127.0.0.1:6379',
+            'OPTIONS': {'BACKEND': 'django.core.cache.backends.redis.RedisCache'},
+        }
+    """
+
+    def __init__(self, location, params):
+        options = dict(params.get('OPTIONS') or {})
+        backend = options.pop('BACKEND', 'django.core.cache.backends.locmem.LocMemCache')
+        params = {**params, 'OPTIONS': options}
+        super().__init__(params)
+        self.cache = import_string(backend)(location, params)
+
+    def get(self, key, default=None, version=None):
+        value = self.cache.get(key, _MISSING, version=version)
+        record_cache(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def get_many(self, keys, version=None):
+        keys = list(keys)
+        found = self.cache.get_many(keys, version=version)
+        for key in keys:
+            record_cache(key in found)
+        return found
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.cache.add(key, value, timeout=timeout, version=version)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.cache.set(key, value, timeout=timeout, version=version)
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.cache.set_many(data, timeout=timeout, version=version)
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        return self.cache.touch(key, timeout=timeout, version=version)
+
+    def delete(self, key, version=None):
+        return self.cache.delete(key, version=version)
+
+    def delete_many(self, keys, version=None):
+        return self.cache.delete_many(keys, version=version)
+
+    def has_key(self, key, version=None):
+        return self.cache.has_key(key, version=version)
+
+    def incr(self, key, delta=1, version=None):
+        return self.cache.incr(key, delta, version=version)
+
+    def decr(self, key, delta=1, version=None):
+        return self.cache.decr(key, delta, version=version)
+
+    def clear(self):
+        return self.cache.clear()
+
+    def close(self, **kwargs):
+        return self.cache.close(**kwargs)
@@ -0,0 +1,148 @@
+"""City-aware partitioning of ride data.
+
+Every city in ``CITIES`` names the database alias that holds its rides (live
+and archived) and batch idempotency keys; users, profiles and everything
+else stay on ``default``. Several cities may share one alias.
+``core.routers.CityRouter`` sends queries on those models to the alias of:
+
+* the row's own ``city``, when Django passes the instance (saves, related
+  lookups);
+* otherwise the *current city*, set per request by ``CityMiddleware`` from
+  the user's profile (staff choose the city they administer) or explicitly
+  with :func:`use_city`;
+* otherwise ``DEFAULT_CITY``.
+
+Users belong to the city named by ``Profile.city``, so a rider's rides and
+a driver's available feed live on the same shard. Work that spans cities
+(admin overviews, maintenance jobs) runs once per city or per shard through
+:func:`for_each_city` / :func:`for_each_shard`, in parallel, and merges the
+results.
+"""
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connections
+
+# models whose rows live on their city's database
+SHARDED_MODELS = {'rides.riderequest', 'rides.archivedride', 'rides.idempotencykey'}
+
+# session key holding the city a staff member is administering
+ADMIN_CITY_SESSION_KEY = 'admin_city'
+
+_current = contextvars.ContextVar('current_city', default=None)
+
+
+def city_settings():
+    """``{slug: {'NAME': ..., 'DATABASE': ...}}`` for every configured city."""
+    return getattr(settings, 'CITIES', {}) or {'default': {'NAME': 'Default', 'DATABASE': 'default'}}
+
+
+def default_city():
+    configured = city_settings()
+    city = getattr(settings, 'DEFAULT_CITY', None)
+    return city if city in configured else next(iter(configured))
+
+
+def city_name(city):
+    return city_settings().get(city, {}).get('NAME', city)
+
+
+def normalize_city(value):
+    """Slug of the configured city matching ``value`` (slug or name, any case), else None."""
+    value = (value or '').strip().lower()
+    if not value:
+        return None
+    for slug, config in city_settings().items():
+        if value == slug or value == config.get('NAME', '').lower():
+            return slug
+    return None
+
+
+def city_db(city):
+    """Database alias holding ``city``'s rides; unknown cities use the default city's."""
+    configured = city_settings()
+    config = configured.get(city) or configured[default_city()]
+    return config.get('DATABASE', 'default')
+
+
+def shard_aliases():
+    """Every database alias holding ride data, in configuration order."""
+    return list(dict.fromkeys(config.get('DATABASE', 'default') for config in city_settings().values()))
+
+
+def cities_on(alias):
+    return [city for city, config in city_settings().items() if config.get('DATABASE', 'default') == alias]
+
+
+def city_for_user(user):
+    """The configured city of ``user``'s profile, or None for anonymous users and unknown cities."""
+    if user is None or not user.is_authenticated:
+        return None
+    profile = getattr(user, 'profile', None)
+    return normalize_city(getattr(profile, 'city', ''))
+
+
+# -- current city ----------------------------------------------------------
+
+def activate(city):
+    """Make ``city`` current; it may be a zero-argument callable resolved on first use."""
+    return _current.set(city)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def current_city():
+    """The current city slug (see module docstring); never None."""
+    city = _current.get()
+    if callable(city):
+        city = city()
+        if city is not None:
+            _current.set(city)
+    return city or default_city()
+
+
+@contextmanager
+def use_city(city):
+    token = activate(city)
+    try:
+        yield city
+    finally:
+        deactivate(token)
+
+
+# -- fan-out ---------------------------------------------------------------
+
+def _call(fn, target, city):
+    try:
+        with use_city(city):
+            return fn(target)
+    finally:
+        connections.close_all()
+
+
+def _fan_out(fn, targets):
+    """``{target: fn(target)}``, running each call on its own thread when there are several.
+
+    ``targets`` maps each target to the city made current while it runs.
+    """
+    if len(targets) == 1:
+        ((target, city),) = targets.items()
+        with use_city(city):
+            return {target: fn(target)}
+    with ThreadPoolExecutor(max_workers=len(targets), thread_name_prefix='fan-out') as pool:
+        futures = {target: pool.submit(_call, fn, target, city) for target, city in targets.items()}
+        return {target: future.result() for target, future in futures.items()}
+
+
+def for_each_city(fn, cities=None):
+    """Run ``fn(city)`` for every city (or those in ``cities``) in parallel, each with its city current."""
+    return _fan_out(fn, {city: city for city in (cities or city_settings())})
+
+
+def for_each_shard(fn):
+    """Run ``fn(alias)`` once per database alias holding ride data, in parallel."""
+    return _fan_out(fn, {alias: cities_on(alias)[0] for alias in shard_aliases()})
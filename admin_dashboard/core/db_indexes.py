@@ -0,0 +1,33 @@
+"""Case-insensitive indexes for the admin's prefix/exact searches, used by migrations.
+
+``indexes`` are ``[(index name, column)]``. Only SQLite and Postgres get
+indexes; other backends fall back to table scans.
+
+Django doesn't know about these indexes, and on SQLite any migration that
+rebuilds the table (adding a unique or non-null column, altering a field...)
+drops them. Such a migration needs a follow-up that calls
+:func:`create_ci_indexes` again.
+"""
+
+
+def create_ci_indexes(schema_editor, table, indexes):
+    """Case-insensitive indexes usable by the admin's istartswith/iexact searches."""
+    vendor = schema_editor.connection.vendor
+    qn = schema_editor.quote_name
+    for name, column in indexes:
+        if vendor == 'sqlite':
+            # SQLite's LIKE is case-insensitive and can range-scan a NOCASE index
+            schema_editor.execute(f'CREATE INDEX IF NOT EXISTS {qn(name)} ON {qn(table)} ({qn(column)} COLLATE NOCASE)')
+        elif vendor == 'postgresql':
+            # matches Django's UPPER("col"::text) LIKE UPPER(%s) lookups
+            schema_editor.execute(
+                f'CREATE INDEX IF NOT EXISTS {qn(name)} ON {qn(table)} (UPPER({qn(column)}::text) text_pattern_ops)'
+            )
+
+
+def drop_indexes(schema_editor, indexes):
+    vendor = schema_editor.connection.vendor
+    if vendor not in ('sqlite', 'postgresql'):
+        return
+    for name, _ in indexes:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {schema_editor.quote_name(name)}')
@@ -0,0 +1,178 @@
+"""Per-request instrumentation: timings, DB queries, cache and serializer stats.
+
+The middleware in :mod:`core.middleware` creates a :class:`RequestMetrics` for
+each request and stores it in a context variable, so helpers here can record
+into it from anywhere without threading the request through. When
+instrumentation is disabled nothing is stored and the helpers are no-ops.
+
+Aggregated per-view counters live in :data:`registry` and are rendered for
+the ``/metrics`` endpoint in Prometheus text format.
+"""
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+_current = ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    """Everything recorded while handling a single request."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view = None
+        self.queries = []  # (sql, params, seconds)
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.serializer_seconds = 0.0
+        self._serializer_depth = 0
+
+    @property
+    def db_seconds(self):
+        return sum(q[2] for q in self.queries)
+
+    def duplicate_queries(self):
+        """Return {sql: count} for statements executed more than once with the same params."""
+        counts = Counter((sql, repr(params)) for sql, params, _ in self.queries)
+        return {sql: n for (sql, _), n in counts.items() if n > 1}
+
+    def server_timing(self, total_seconds):
+        """Build a ``Server-Timing`` header value."""
+        parts = [
+            f'total;dur={total_seconds * 1000:.2f}',
+            f'db;dur={self.db_seconds * 1000:.2f};desc="{len(self.queries)} queries"',
+        ]
+        if self.serializer_seconds:
+            parts.append(f'serializer;dur={self.serializer_seconds * 1000:.2f}')
+        if self.cache_hits or self.cache_misses:
+            parts.append(f'cache;desc="hits={self.cache_hits} misses={self.cache_misses}"')
+        return ', '.join(parts)
+
+
+def current():
+    """Return the active RequestMetrics, or None outside an instrumented request."""
+    return _current.get()
+
+
+def activate(metrics):
+    return _current.set(metrics)
+
+
+def deactivate(token):
+    _current.reset(token)
+
+
+def record_cache(hit):
+    """Record a cache lookup result against the current request.
+
+    Called by the ``core.cache.InstrumentedCache`` backend and the JWT user
+    state LRU (``accounts.authentication``).
+    """
+    metrics = _current.get()
+    if metrics is None:
+        return
+    if hit:
+        metrics.cache_hits += 1
+    else:
+        metrics.cache_misses += 1
+
+
+def query_recorder(execute, sql, params, many, context):
+    """``connection.execute_wrapper`` hook that records query timings."""
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        metrics.queries.append((sql, params, time.perf_counter() - start))
+
+
+class InstrumentedSerializerMixin:
+    """Serializer mixin that accumulates ``to_representation`` time.
+
+    Only the outermost call is timed, so nested serializers and ``many=True``
+    children are not double counted.
+    """
+
+    def to_representation(self, instance):
+        metrics = _current.get()
+        if metrics is None:
+            return super().to_representation(instance)
+        metrics._serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return super().to_representation(instance)
+        finally:
+            metrics._serializer_depth -= 1
+            if metrics._serializer_depth == 0:
+                metrics.serializer_seconds += time.perf_counter() - start
+
+
+def view_name(view_func, method):
+    """Human readable name for a resolved view, e.g. ``RideRequestViewSet.available``."""
+    cls = getattr(view_func, 'cls', None) or getattr(view_func, 'view_class', None)
+    if cls is None:
+        return f'{view_func.__module__}.{view_func.__name__}'
+    actions = getattr(view_func, 'actions', None) or {}
+    action = actions.get(method.lower())
+    return f'{cls.__name__}.{action}' if action else cls.__name__
+
+
+class MetricsRegistry:
+    """Thread-safe process-wide counters, exported in Prometheus text format."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._views = defaultdict(lambda: defaultdict(float))
+        self._counters = defaultdict(float)
+
+    def observe_request(self, view, status, metrics, total_seconds):
+        with self._lock:
+            stats = self._views[view]
+            stats['requests'] += 1
+            if status >= 500:
+                stats['errors'] += 1
+            stats['seconds'] += total_seconds
+            stats['db_queries'] += len(metrics.queries)
+            stats['db_seconds'] += metrics.db_seconds
+            stats['duplicate_queries'] += sum(n - 1 for n in metrics.duplicate_queries().values())
+            stats['serializer_seconds'] += metrics.serializer_seconds
+            stats['cache_hits'] += metrics.cache_hits
+            stats['cache_misses'] += metrics.cache_misses
+
+    def inc(self, name, value=1):
+        """Increment a free-form counter (e.g. from background jobs)."""
+        with self._lock:
+            self._counters[name] += value
+
+    def reset(self):
+        with self._lock:
+            self._views.clear()
+            self._counters.clear()
+
+    def render(self):
+        with self._lock:
+            views = {view: dict(stats) for view, stats in self._views.items()}
+            counters = dict(self._counters)
+
+        lines = []
+        metric_names = (
+            'requests', 'errors', 'seconds', 'db_queries', 'db_seconds',
+            'duplicate_queries', 'serializer_seconds', 'cache_hits', 'cache_misses',
+        )
+        for metric in metric_names:
+            full = f'wiyone_view_{metric}_total'
+            lines.append(f'# TYPE {full} counter')
+            for view in sorted(views):
+                lines.append(f'{full}{{view="{view}"}} {views[view].get(metric, 0):g}')
+        for name in sorted(counters):
+            lines.append(f'# TYPE wiyone_{name} counter')
+            lines.append(f'wiyone_{name} {counters[name]:g}')
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
@@ -0,0 +1,79 @@
+import json
+import platform
+import subprocess
+from datetime import datetime, timezone
+
+import django
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        'Run the API/dashboard benchmark suite against a seeded throwaway test '
+        'database and print machine-readable JSON results.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rides', type=int, default=1000, help='Number of seeded rides.')
+        parser.add_argument('--riders', type=int, default=100, help='Number of seeded riders.')
+        parser.add_argument('--drivers', type=int, default=20, help='Number of seeded approved drivers.')
+        parser.add_argument('--iterations', type=int, default=50, help='Timed iterations per case.')
+        parser.add_argument('--warmup', type=int, default=5, help='Untimed warmup iterations per case.')
+        parser.add_argument('--case', action='append', dest='cases', choices=sorted(benchmarks.CASES),
+                            help='Case to run (repeatable). Defaults to all cases.')
+        parser.add_argument('--output', help='Write JSON results to this file instead of stdout.')
+
+    def handle(self, *args, **options):
+        if options['riders'] < 1 or options['drivers'] < 1:
+            raise CommandError('At least one rider and one driver are required.')
+        cases = options['cases'] or list(benchmarks.CASES)
+
+        setup_test_environment()
+        old_name = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            ctx = benchmarks.seed(options['rides'], options['riders'], options['drivers'])
+            results = {}
+            for name in cases:
+                self.stderr.write(f'running {name}...')
+                results[name] = benchmarks.run_case(ctx, name, options['iterations'], options['warmup'])
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        report = {
+            'meta': {
+                'timestamp': datetime.now(timezone.utc).isoformat(),
+                'commit': _git_commit(),
+                'python': platform.python_version(),
+                'django': django.get_version(),
+                'database': connection.vendor,
+                'dataset': {
+                    'rides': options['rides'],
+                    'riders': options['riders'],
+                    'drivers': options['drivers'],
+                },
+                'iterations': options['iterations'],
+            },
+            'results': results,
+        }
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options['output']:
+            with open(options['output'], 'w') as fh:
+                fh.write(payload + '\n')
+        else:
+            self.stdout.write(payload)
+
+
+def _git_commit():
+    try:
+        out = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, timeout=5)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    if out.returncode != 0:
+        return None
+    return out.stdout.strip() or None
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from core.bulk import fail_stale_jobs
+
+
+class Command(BaseCommand):
+    help = "Mark background bulk jobs whose worker stopped (recycled, redeployed, crashed) as failed."
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Marked {fail_stale_jobs()} stale bulk job(s) failed.')
@@ -0,0 +1,126 @@
+import json
+import os
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter under ``-X importtime``; prints phase timings as JSON.
+BOOT_SCRIPT = '''
+import json, time
+start = time.perf_counter()
+phases = {}
+def mark(name):
+    global start
+    now = time.perf_counter()
+    phases[name] = (now - start) * 1000
+    start = now
+from django.conf import settings
+settings.INSTALLED_APPS
+mark('settings')
+import django
+django.setup()
+mark('setup')
+from django.urls import get_resolver
+get_resolver().url_patterns
+mark('urls')
+from core.warmup import warm
+phases['warm_steps'] = warm()
+mark('warm')
+import sys
+phases['modules'] = len(sys.modules)
+print(json.dumps(phases))
+'''
+
+
+def parse_importtime(text):
+    """``[(name, self_us, cumulative_us, depth)]`` from ``-X importtime`` output, in report order."""
+    rows = []
+    for line in text.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        if not own.strip().isdigit():
+            continue  # header
+        stripped = name.lstrip()
+        rows.append((stripped, int(own), int(cumulative), (len(name) - len(stripped) - 1) // 2))
+    return rows
+
+
+def import_chain(rows, module):
+    """Modules that led to ``module`` being imported, outermost first; None if it never was."""
+    # rows are reported children-first, so a module's importer is the next row one level up
+    for index, (name, _, _, depth) in enumerate(rows):
+        if name != module:
+            continue
+        chain = [name]
+        for parent, _, _, parent_depth in rows[index + 1:]:
+            if parent_depth < depth:
+                chain.append(parent)
+                depth = parent_depth
+        return chain[::-1]
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        'Boot the project in a fresh interpreter under `python -X importtime` and report '
+        'startup phases and the modules that cost the most to import.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--settings-module', default=os.environ.get('DJANGO_SETTINGS_MODULE'),
+                            help='Settings to boot with (e.g. admin_dashboard.settings_api). '
+                                 'Defaults to the current ones.')
+        parser.add_argument('--limit', type=int, default=25, help='Modules/packages to list.')
+        parser.add_argument('--why', action='append', default=[], metavar='MODULE',
+                            help='Show the import chain that loaded MODULE (repeatable).')
+        parser.add_argument('--json', action='store_true', help='Print machine-readable JSON instead.')
+
+    def handle(self, *args, **options):
+        env = {**os.environ, 'DJANGO_SETTINGS_MODULE': options['settings_module'], 'DJANGO_WARMUP': '1'}
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', BOOT_SCRIPT], cwd=settings.BASE_DIR,
+                              env=env, capture_output=True, text=True)
+        rows = parse_importtime(proc.stderr)
+        if proc.returncode or not proc.stdout.strip():
+            errors = '\n'.join(line for line in proc.stderr.splitlines() if not line.startswith('import time:'))
+            raise CommandError(f'Boot failed:\n{errors}')
+        phases = json.loads(proc.stdout.strip().splitlines()[-1])
+
+        packages = defaultdict(int)
+        for name, own, _, _ in rows:
+            packages[name.split('.')[0]] += own
+        limit = options['limit']
+        report = {
+            'settings_module': options['settings_module'],
+            'phases_ms': {name: round(phases[name], 1) for name in ('settings', 'setup', 'urls', 'warm')},
+            'warm_steps_ms': {name: round(ms, 1) for name, ms in phases['warm_steps'].items()},
+            'modules': phases['modules'],
+            'import_ms': round(sum(own for _, own, _, _ in rows) / 1000, 1),
+            'by_self': [(name, round(own / 1000, 1)) for name, own, _, _ in
+                        sorted(rows, key=lambda row: -row[1])[:limit]],
+            'by_cumulative': [(name, round(cumulative / 1000, 1)) for name, _, cumulative, _ in
+                              sorted(rows, key=lambda row: -row[2])[:limit]],
+            'by_package': [(name, round(own / 1000, 1)) for name, own in
+                           sorted(packages.items(), key=lambda item: -item[1])[:limit]],
+            'why': {module: import_chain(rows, module) for module in options['why']},
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(f"Startup with {report['settings_module']}: {report['modules']} modules, "
+                          f"{report['import_ms']}ms importing")
+        for name, ms in report['phases_ms'].items():
+            self.stdout.write(f'  {name:<10} {ms:>8.1f}ms')
+        for name, ms in report['warm_steps_ms'].items():
+            self.stdout.write(f'    warm {name:<14} {ms:>6.1f}ms')
+        for title, key in (('self time', 'by_self'), ('cumulative time', 'by_cumulative'),
+                           ('self time by top-level package', 'by_package')):
+            self.stdout.write(f'\nTop imports by {title} (ms):')
+            for name, ms in report[key]:
+                self.stdout.write(f'  {ms:>8.1f}  {name}')
+        for module, chain in report['why'].items():
+            self.stdout.write(f'\nWhy {module}: ' + (' -> '.join(chain) if chain else 'not imported'))
@@ -0,0 +1,135 @@
+import cProfile
+import logging
+import random
+import re
+import time
+from contextlib import ExitStack
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+
+from . import cities, instrumentation, slowlog
+
+logger = logging.getLogger(__name__)
+
+
+class InstrumentationMiddleware:
+    """Opt-in per-request instrumentation.
+
+    Enabled with ``INSTRUMENTATION['ENABLED']``. When disabled the middleware
+    removes itself from the chain at startup, so it costs nothing per request.
+
+    For every request it records wall time, DB query count/time, duplicate
+    queries, cache hits/misses and serializer time, adds a ``Server-Timing``
+    header and feeds the per-view counters served at ``/metrics``. With
+    ``PROFILE_SAMPLE_RATE`` > 0 that fraction of requests also runs under
+    cProfile and the stats are dumped to ``PROFILE_DIR``.
+    """
+
+    def __init__(self, get_response):
+        config = getattr(settings, 'INSTRUMENTATION', {})
+        if not config.get('ENABLED'):
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = float(config.get('PROFILE_SAMPLE_RATE', 0.0))
+        self.profile_dir = Path(config.get('PROFILE_DIR', settings.BASE_DIR / 'profiles'))
+        self.duplicate_warning = int(config.get('DUPLICATE_QUERY_WARNING', 5))
+
+    def __call__(self, request):
+        metrics = instrumentation.RequestMetrics()
+        token = instrumentation.activate(metrics)
+        profiler = cProfile.Profile() if self.sample_rate and random.random() < self.sample_rate else None
+        try:
+            with ExitStack() as stack:
+                for conn in connections.all():
+                    stack.enter_context(conn.execute_wrapper(instrumentation.query_recorder))
+                if profiler is not None:
+                    profiler.enable()
+                try:
+                    response = self.get_response(request)
+                finally:
+                    if profiler is not None:
+                        profiler.disable()
+        finally:
+            instrumentation.deactivate(token)
+
+        total = time.perf_counter() - metrics.start
+        view = metrics.view or 'unresolved'
+        response['Server-Timing'] = metrics.server_timing(total)
+        instrumentation.registry.observe_request(view, response.status_code, metrics, total)
+
+        duplicates = metrics.duplicate_queries()
+        if duplicates and sum(duplicates.values()) >= self.duplicate_warning:
+            sql, count = max(duplicates.items(), key=lambda item: item[1])
+            logger.warning('%s ran %d duplicate queries; worst (x%d): %s',
+                           view, sum(duplicates.values()), count, sql)
+        if profiler is not None:
+            self._dump_profile(profiler, view)
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = instrumentation.current()
+        if metrics is not None:
+            metrics.view = instrumentation.view_name(view_func, request.method)
+        return None
+
+    def _dump_profile(self, profiler, view):
+        try:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            safe_view = re.sub(r'[^A-Za-z0-9_.-]', '_', view)
+            path = self.profile_dir / f'{safe_view}-{time.time_ns()}.prof'
+            profiler.dump_stats(path)
+        except OSError:
+            logger.exception('Could not write profile for %s', view)
+
+
+class SlowQueryLogMiddleware:
+    """Log ORM queries slower than ``SLOW_QUERY_LOG['THRESHOLD_MS']``.
+
+    Each slow query is attributed to the resolved view (for example
+    ``RideRequestViewSet.available``), logged with its fingerprint and EXPLAIN
+    plan, and aggregated into ``SlowQuery`` rows visible in the admin.
+    Removed from the chain at startup unless ``SLOW_QUERY_LOG['ENABLED']``.
+    """
+
+    def __init__(self, get_response):
+        if not slowlog.config()['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with slowlog.capture(request.path):
+            return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        slowlog.set_view(instrumentation.view_name(view_func, request.method))
+        return None
+
+
+class CityMiddleware:
+    """Make the requesting user's city current for ride queries (see ``core.cities``).
+
+    Resolved lazily on the first ride query, so API requests see the user
+    set by DRF authentication. Staff use the city chosen in the admin, if any.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = cities.activate(lambda: request_city(request))
+        try:
+            return self.get_response(request)
+        finally:
+            cities.deactivate(token)
+
+
+def request_city(request):
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated and user.is_staff:
+        chosen = cities.normalize_city(request.session.get(cities.ADMIN_CITY_SESSION_KEY))
+        if chosen:
+            return chosen
+    return cities.city_for_user(user)
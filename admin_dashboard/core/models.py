@@ -0,0 +1,65 @@
+from django.conf import settings
+from django.db import models
+
+
+class SlowQuery(models.Model):
+    """Aggregated stats for slow ORM queries, grouped by SQL fingerprint and view.
+
+    Rows are written by :mod:`core.slowlog`; the admin is read-only.
+    """
+    fingerprint = models.CharField(max_length=40)
+    view = models.CharField(max_length=200, blank=True)
+    normalized_sql = models.TextField()
+    last_sql = models.TextField(blank=True)
+    plan = models.TextField(blank=True)
+    calls = models.PositiveIntegerField(default=0)
+    total_ms = models.FloatField(default=0)
+    max_ms = models.FloatField(default=0)
+    first_seen = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'slow queries'
+        constraints = [
+            models.UniqueConstraint(fields=['fingerprint', 'view'], name='slowquery_fingerprint_view'),
+        ]
+
+    @property
+    def avg_ms(self):
+        return self.total_ms / self.calls if self.calls else 0.0
+
+    def __str__(self):
+        return f"{self.view or '-'}: {self.normalized_sql[:80]}"
+
+
+class BulkJob(models.Model):
+    """Progress of an admin bulk action run in chunks (see ``core.bulk``).
+
+    ``worker`` is the process running it, which stamps ``heartbeat_at`` while
+    it is alive; a running job whose heartbeat stopped is marked failed by
+    ``core.bulk.fail_stale_jobs``.
+    """
+    STATUS_CHOICES = (
+        ('running', 'Running'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    )
+
+    action = models.CharField(max_length=100)
+    requested_by = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='running')
+    total = models.PositiveIntegerField(default=0)
+    processed = models.PositiveIntegerField(default=0)
+    changed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    worker = models.CharField(max_length=100, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+
+    @property
+    def percent(self):
+        return round(100.0 * self.processed / self.total, 1) if self.total else 100.0
+
+    def __str__(self):
+        return f"{self.action} #{self.pk} ({self.status}, {self.percent}%)"
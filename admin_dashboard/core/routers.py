@@ -0,0 +1,40 @@
+from .cities import SHARDED_MODELS, city_db, current_city
+
+
+class CityRouter:
+    """Send ride data to its city's database and everything else to ``default``.
+
+    See ``core.cities``. Rides reference users on ``default``, so those
+    foreign keys carry no database constraint and are never joined across
+    databases (use ``prefetch_related``, not ``select_related``). Deleting a
+    user cascades to other databases through ``rides.cleanup``.
+    """
+
+    def _db(self, model, hints):
+        if model._meta.label_lower not in SHARDED_MODELS:
+            return 'default'
+        instance = hints.get('instance')
+        if instance is not None and instance._meta.label_lower in SHARDED_MODELS:
+            city = getattr(instance, 'city', None)
+            if city:
+                return city_db(city)
+            if instance._state.db:
+                return instance._state.db
+        return city_db(current_city())
+
+    def db_for_read(self, model, **hints):
+        return self._db(model, hints)
+
+    def db_for_write(self, model, **hints):
+        return self._db(model, hints)
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        if db == 'default':
+            return True
+        # other aliases are city shards holding only the sharded ride tables
+        if app_label != 'rides':
+            return False
+        return model_name is None or f'{app_label}.{model_name}' in SHARDED_MODELS
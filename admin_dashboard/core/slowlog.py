@@ -0,0 +1,195 @@
+"""Slow-query log with fingerprinting and EXPLAIN capture.
+
+:func:`capture` installs a ``connection.execute_wrapper`` that times every
+query. Queries over ``SLOW_QUERY_LOG['THRESHOLD_MS']`` are logged to the
+``core.slowlog`` logger together with the originating view, their normalized
+fingerprint and (for SELECTs) the database's EXPLAIN plan, then folded into
+per-fingerprint :class:`core.models.SlowQuery` rows when the block exits.
+
+``SlowQueryLogMiddleware`` wraps every request in :func:`capture`; management
+commands and background jobs can use it directly::
+
+    with slowlog.capture('reap_rides'):
+        ...
+"""
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# State of the innermost capture() block: {'view': str, 'entries': list}
+_state = ContextVar('slowlog_state', default=None)
+# Set while we run our own EXPLAIN so it is not timed/logged itself
+_explaining = ContextVar('slowlog_explaining', default=False)
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r'\b\d+(?:\.\d+)?\b')
+_PLACEHOLDER_RE = re.compile(r'%s|\?')
+_IN_LIST_RE = re.compile(r'\bIN\s*\((?:\s*\?\s*,?)+\)', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+# fingerprint -> plan, so each statement shape is EXPLAINed once per process
+_plans = OrderedDict()
+_PLAN_CACHE_SIZE = 512
+
+
+def config():
+    defaults = {'ENABLED': False, 'THRESHOLD_MS': 100, 'EXPLAIN': True}
+    defaults.update(getattr(settings, 'SLOW_QUERY_LOG', {}))
+    return defaults
+
+
+def normalize(sql):
+    """Strip literals and collapse IN lists so equivalent queries share a shape."""
+    sql = _STRING_RE.sub('?', sql)
+    sql = _NUMBER_RE.sub('?', sql)
+    sql = _PLACEHOLDER_RE.sub('?', sql)
+    sql = _IN_LIST_RE.sub('IN (...)', sql)
+    return _SPACE_RE.sub(' ', sql).strip()
+
+
+def fingerprint(normalized_sql):
+    return hashlib.sha1(normalized_sql.encode('utf-8')).hexdigest()
+
+
+def explain(connection, sql, params):
+    """Return the EXPLAIN plan of a SELECT as text, or '' if unavailable."""
+    if not sql.lstrip().upper().startswith('SELECT'):
+        return ''
+    prefix = 'EXPLAIN QUERY PLAN ' if connection.vendor == 'sqlite' else 'EXPLAIN '
+    token = _explaining.set(True)
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            rows = cursor.fetchall()
+    except Exception:
+        logger.debug('EXPLAIN failed for %s', sql, exc_info=True)
+        return ''
+    finally:
+        _explaining.reset(token)
+    return '\n'.join(' | '.join(str(col) for col in row) for row in rows)
+
+
+class _Recorder:
+    """execute_wrapper callable bound to one connection."""
+
+    def __init__(self, connection, threshold_ms, with_explain):
+        self.connection = connection
+        self.threshold_ms = threshold_ms
+        self.with_explain = with_explain
+
+    def __call__(self, execute, sql, params, many, context):
+        if _explaining.get():
+            return execute(sql, params, many, context)
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000.0
+            if elapsed_ms >= self.threshold_ms:
+                self._record(sql, params, many, elapsed_ms)
+
+    def _record(self, sql, params, many, elapsed_ms):
+        state = _state.get()
+        normalized = normalize(sql)
+        fp = fingerprint(normalized)
+        plan = _plans.get(fp)
+        if plan is None and self.with_explain and not many:
+            plan = explain(self.connection, sql, params)
+            _plans[fp] = plan
+            if len(_plans) > _PLAN_CACHE_SIZE:
+                _plans.popitem(last=False)
+        view = state['view'] if state else ''
+        logger.warning('slow query %.1fms in %s [%s]: %s\n%s',
+                       elapsed_ms, view or '-', fp[:12], normalized, plan or '')
+        if state is not None:
+            state['entries'].append({
+                'fingerprint': fp,
+                'normalized_sql': normalized,
+                'last_sql': sql if many else _interpolate(sql, params),
+                'plan': plan or '',
+                'ms': elapsed_ms,
+            })
+
+
+def _interpolate(sql, params):
+    try:
+        return sql % tuple(repr(p) for p in params) if params else sql
+    except (TypeError, ValueError):
+        return sql
+
+
+def set_view(name):
+    """Attribute queries in the current capture() block to ``name``."""
+    state = _state.get()
+    if state is not None:
+        state['view'] = name
+
+
+@contextmanager
+def capture(view=''):
+    """Time queries on all connections inside the block; persist slow ones on exit."""
+    cfg = config()
+    state = {'view': view, 'entries': []}
+    token = _state.set(state)
+    try:
+        with ExitStack() as stack:
+            for conn in connections.all():
+                recorder = _Recorder(conn, float(cfg['THRESHOLD_MS']), cfg['EXPLAIN'])
+                stack.enter_context(conn.execute_wrapper(recorder))
+            yield state
+    finally:
+        _state.reset(token)
+        if state['entries']:
+            try:
+                persist(state['view'], state['entries'])
+            except Exception:
+                logger.exception('Could not persist slow query stats')
+
+
+def persist(view, entries):
+    """Fold captured entries into SlowQuery aggregate rows."""
+    from .models import SlowQuery
+
+    view = view[:200]
+    for entry in entries:
+        if _bump(SlowQuery, view, entry):
+            continue
+        try:
+            with transaction.atomic():
+                SlowQuery.objects.create(
+                    fingerprint=entry['fingerprint'],
+                    view=view,
+                    normalized_sql=entry['normalized_sql'],
+                    last_sql=entry['last_sql'],
+                    plan=entry['plan'],
+                    calls=1,
+                    total_ms=entry['ms'],
+                    max_ms=entry['ms'],
+                )
+        except IntegrityError:
+            # another worker created the row first
+            _bump(SlowQuery, view, entry)
+
+
+def _bump(model, view, entry):
+    extra = {'plan': entry['plan']} if entry['plan'] else {}
+    return model.objects.filter(fingerprint=entry['fingerprint'], view=view).update(
+        calls=F('calls') + 1,
+        total_ms=F('total_ms') + entry['ms'],
+        max_ms=Greatest(F('max_ms'), entry['ms']),
+        last_sql=entry['last_sql'],
+        last_seen=timezone.now(),
+        **extra,
+    )
@@ -0,0 +1,44 @@
+"""Minimal in-process background execution for long admin operations.
+
+Jobs run on a small thread pool inside the web worker; each job closes its
+own database connections when it finishes. Size the pool with
+``BACKGROUND_WORKERS``. A job dies with its worker process; callers that
+track jobs must detect that themselves (see ``core.bulk``).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'BACKGROUND_WORKERS', 2),
+                thread_name_prefix='background',
+            )
+        return _executor
+
+
+def _run(fn, args, kwargs):
+    try:
+        return fn(*args, **kwargs)
+    except Exception:
+        logger.exception('Background job %s failed', getattr(fn, '__name__', fn))
+        raise
+    finally:
+        connections.close_all()
+
+
+def submit(fn, *args, **kwargs):
+    """Run ``fn(*args, **kwargs)`` on the background pool; returns a Future."""
+    return _get_executor().submit(_run, fn, args, kwargs)
@@ -0,0 +1,28 @@
+from django.conf import settings
+from django.test import SimpleTestCase, override_settings
+
+
+def instrumentation(**options):
+    return override_settings(INSTRUMENTATION={**settings.INSTRUMENTATION, 'ENABLED': True, **options})
+
+
+class MetricsTests(SimpleTestCase):
+
+    @override_settings(INSTRUMENTATION={**settings.INSTRUMENTATION, 'ENABLED': False})
+    def test_hidden_when_instrumentation_is_off(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @instrumentation()
+    def test_served_to_localhost_by_default(self):
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='203.0.113.9').status_code, 404)
+
+    @instrumentation(METRICS_ALLOWED_IPS=['10.0.0.5'])
+    def test_allowlist(self):
+        self.assertEqual(self.client.get('/metrics', REMOTE_ADDR='10.0.0.5').status_code, 200)
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
+
+    @instrumentation(METRICS_ALLOWED_IPS=[])
+    def test_empty_allowlist_denies_everyone(self):
+        self.assertEqual(self.client.get('/metrics').status_code, 404)
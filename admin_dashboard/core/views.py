@@ -1,7 +1,13 @@
+from django.contrib.admin.views.decorators import staff_member_required
 from django.contrib.auth.views import LoginView
+from django.http import Http404
+from django.shortcuts import redirect
+from django.utils.http import url_has_allowed_host_and_scheme
 from django.utils.decorators import method_decorator
 from django.views.decorators.csrf import ensure_csrf_cookie
 
+from . import cities
+
 
 @method_decorator(ensure_csrf_cookie, name='dispatch')
 class RoleLoginView(LoginView):
@@ -25,3 +31,34 @@ class RoleLoginView(LoginView):
                 return '/api/accounts/pending/'
             return '/api/accounts/driver/'
         return '/api/accounts/rider/'
+
+
+def metrics(request):
+    """Prometheus-style text exposition of the instrumentation counters.
+
+    Only served when instrumentation is enabled, and only to the clients in
+    ``INSTRUMENTATION['METRICS_ALLOWED_IPS']`` (localhost by default).
+    """
+    from django.conf import settings
+    from django.http import HttpResponse
+    from .instrumentation import registry
+
+    config = getattr(settings, 'INSTRUMENTATION', {})
+    if not config.get('ENABLED'):
+        raise Http404
+    allowed = [ip.strip() for ip in config.get('METRICS_ALLOWED_IPS', ('127.0.0.1', '::1')) if ip.strip()]
+    if request.META.get('REMOTE_ADDR') not in allowed:
+        raise Http404
+    return HttpResponse(registry.render(), content_type='text/plain; version=0.0.4')
+
+
+@staff_member_required
+def switch_city(request, city):
+    """Make ``city`` the one this staff member administers, then go back to ``?next=``."""
+    if city not in cities.city_settings():
+        raise Http404
+    request.session[cities.ADMIN_CITY_SESSION_KEY] = city
+    next_url = request.GET.get('next')
+    if not next_url or not url_has_allowed_host_and_scheme(next_url, {request.get_host()}, request.is_secure()):
+        next_url = 'admin:index'
+    return redirect(next_url)
@@ -0,0 +1,130 @@
+"""Warm per-process caches at startup instead of on the first requests.
+
+A fresh worker's first requests pay for work Django and DRF do lazily:
+importing every view module, compiling URL patterns and building the
+``reverse()`` tables, importing the authentication/renderer classes named in
+settings, loading translation catalogs, building serializer fields (model
+metadata, validators) and compiling templates. :func:`warm` does all of it
+up front.
+
+``admin_dashboard.wsgi``/``asgi`` call it on import, so a preforking server
+started with ``--preload`` (``gunicorn --preload admin_dashboard.wsgi``)
+does it once in the master and every worker it forks, including recycled
+ones, starts warm. Database connections opened meanwhile are closed before
+returning so no socket is shared across the fork.
+"""
+import logging
+import os
+import time
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.db import connections
+from django.urls import URLResolver, get_resolver
+from django.utils import translation
+
+logger = logging.getLogger(__name__)
+
+
+def _project_modules():
+    """Top-level package names of the apps that live in this project (not site-packages)."""
+    base = str(settings.BASE_DIR)
+    return {config.name.split('.')[0] for config in apps.get_app_configs() if config.path.startswith(base)}
+
+
+def _views(resolver):
+    for entry in resolver.url_patterns:
+        entry.pattern.regex  # compiled lazily on first match otherwise
+        if isinstance(entry, URLResolver):
+            yield from _views(entry)
+        else:
+            yield entry.callback
+
+
+def warm_urls():
+    """Import every routed view, compile every pattern and build the reverse() tables; return the views."""
+    resolver = get_resolver()
+    views = list(_views(resolver))
+    resolver.reverse_dict  # also populates namespaces and app lists
+    return views
+
+
+def warm_rest_framework():
+    """Import the classes DRF resolves from settings on first use (JWT auth, renderers, parsers...)."""
+    from rest_framework.settings import api_settings
+    for name in ('DEFAULT_AUTHENTICATION_CLASSES', 'DEFAULT_PERMISSION_CLASSES', 'DEFAULT_RENDERER_CLASSES',
+                 'DEFAULT_PARSER_CLASSES', 'DEFAULT_CONTENT_NEGOTIATION_CLASS', 'DEFAULT_METADATA_CLASS',
+                 'EXCEPTION_HANDLER'):
+        getattr(api_settings, name)
+    from rest_framework_simplejwt.settings import api_settings as jwt_settings
+    jwt_settings.AUTH_TOKEN_CLASSES
+
+
+def warm_serializers():
+    """Build the fields of every serializer defined by the project's apps; return how many."""
+    from rest_framework.serializers import BaseSerializer
+    ours = _project_modules()
+    seen, pending = set(), [BaseSerializer]
+    while pending:
+        for cls in pending.pop().__subclasses__():
+            if cls not in seen:
+                seen.add(cls)
+                pending.append(cls)
+    count = 0
+    for cls in seen:
+        if cls.__module__.split('.')[0] not in ours:
+            continue
+        try:
+            cls().fields
+        except Exception:
+            # serializers that need constructor arguments warm on first use instead
+            logger.debug('Could not warm %s', cls.__qualname__, exc_info=True)
+            continue
+        count += 1
+    return count
+
+
+def warm_templates():
+    """Compile the project's own templates into the cached loader; return how many."""
+    from django.template import engines
+    ours = _project_modules()
+    count = 0
+    for engine in engines.all():
+        dirs = [Path(d) for d in engine.dirs]
+        dirs += [Path(config.path) / 'templates' for config in apps.get_app_configs() if config.name in ours]
+        for root in dirs:
+            for path in root.rglob('*.html') if root.is_dir() else ():
+                name = path.relative_to(root).as_posix()
+                try:
+                    engine.get_template(name)
+                except Exception:
+                    logger.debug('Could not warm template %s', name, exc_info=True)
+                    continue
+                count += 1
+    return count
+
+
+def warm():
+    """Run every warm-up step; return ``{step: milliseconds}``. A no-op unless ``WARMUP_ON_START``."""
+    if not getattr(settings, 'WARMUP_ON_START', True):
+        return {}
+    timings = {}
+
+    def step(name, fn, *args):
+        start = time.perf_counter()
+        result = fn(*args)
+        timings[name] = (time.perf_counter() - start) * 1000
+        return result
+
+    step('urls', warm_urls)
+    step('rest_framework', warm_rest_framework)
+    with translation.override(settings.LANGUAGE_CODE):
+        # loads the gettext catalogs of every installed app
+        step('translations', translation.gettext, 'Not found.')
+    step('serializers', warm_serializers)
+    step('templates', warm_templates)
+    connections.close_all()
+    logger.info('Warmed up in %.0fms (pid %d): %s', sum(timings.values()), os.getpid(),
+                ', '.join(f'{name} {ms:.0f}ms' for name, ms in timings.items()))
+    return timings
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import Place
+
+
+@admin.register(Place)
+class PlaceAdmin(admin.ModelAdmin):
+    list_display = ('name', 'kind', 'lat', 'lng', 'rank', 'source')
+    list_filter = ('source', 'kind')
+    search_fields = ('^normalized',)
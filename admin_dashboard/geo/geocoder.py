@@ -0,0 +1,171 @@
+"""Offline geocoding of free-text place names against the local gazetteer.
+
+The whole ``Place`` table is held in memory per process as:
+
+* a dict from normalized name to the best-ranked place, for exact hits;
+* a trigram inverted index (``array`` postings per trigram), for fuzzy
+  hits scored by trigram Dice similarity, like ``pg_trgm``. Candidates are
+  drawn only from the query's rarest trigrams: a place reaching
+  ``MIN_SIMILARITY`` must share at least one of them (prefix filtering),
+  so common words like "market" never fan out over the whole index.
+
+Lookups are cached by normalized text in an LRU (misses included), so a
+repeated landmark costs one dict lookup. The index is rebuilt when the
+table changes, checked at most every ``RELOAD_INTERVAL`` seconds.
+"""
+import array
+import math
+import threading
+import time
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+from django.db.models import Count, Max
+
+from search.normalize import normalize_place
+from .models import Place
+
+Match = namedtuple('Match', 'name lat lng score')
+
+
+def geocoder_settings():
+    defaults = {
+        'CACHE_SIZE': 10000,
+        'MIN_SIMILARITY': 0.5,
+        'RELOAD_INTERVAL': 300,
+        # words riders add around landmarks that never appear in place names
+        'STOP_WORDS': ('near', 'opposite', 'opp', 'behind', 'next', 'to', 'by', 'at', 'the', 'stage'),
+        # common abbreviations, expanded before lookup
+        'ABBREVIATIONS': {'mkt': 'market', 'rd': 'road', 'sch': 'school', 'hosp': 'hospital',
+                          'stn': 'station', 'univ': 'university', 'ave': 'avenue'},
+    }
+    defaults.update(getattr(settings, 'GEOCODER', {}))
+    return defaults
+
+
+def trigrams(normalized):
+    grams = set()
+    for word in normalized.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class Gazetteer:
+
+    def __init__(self, places, cache_size=10000, min_similarity=0.5, stop_words=(), abbreviations=None):
+        """``places`` is an iterable of ``(normalized, name, lat, lng, rank)``."""
+        self.min_similarity = min_similarity
+        self.stop_words = frozenset(stop_words)
+        self.abbreviations = abbreviations or {}
+        self._names, self._lat, self._lng, self._rank, self._grams = [], array.array('d'), array.array('d'), [], []
+        self._exact = {}
+        self._postings = {}
+        for normalized, name, lat, lng, rank in places:
+            if not normalized:
+                continue
+            idx = len(self._names)
+            self._names.append(name)
+            self._lat.append(lat)
+            self._lng.append(lng)
+            self._rank.append(rank)
+            grams = trigrams(normalized)
+            self._grams.append(frozenset(grams))
+            best = self._exact.get(normalized)
+            if best is None or rank > self._rank[best]:
+                self._exact[normalized] = idx
+            for gram in grams:
+                self._postings.setdefault(gram, array.array('i')).append(idx)
+        self.lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    def __len__(self):
+        return len(self._names)
+
+    def geocode(self, text):
+        """Best match for free text, or None."""
+        return self.lookup(normalize_place(text))
+
+    def _match(self, idx, score):
+        return Match(self._names[idx], self._lat[idx], self._lng[idx], score)
+
+    def _lookup(self, normalized):
+        if not normalized:
+            return None
+        words = [self.abbreviations.get(w, w) for w in normalized.split()]
+        for candidate in (' '.join(words), ' '.join(w for w in words if w not in self.stop_words)):
+            idx = self._exact.get(candidate)
+            if idx is not None:
+                return self._match(idx, 1.0)
+        return self._fuzzy(candidate or ' '.join(words))
+
+    def _fuzzy(self, normalized):
+        grams = trigrams(normalized)
+        # Dice >= t means 2 * shared >= t * (|q| + |c|), which forces
+        # t * |q| / (2 - t) <= |c| <= (2 - t) * |q| / t and shared >= t * |q| / (2 - t);
+        # a match therefore contains one of the |q| - shared + 1 rarest query trigrams
+        t, size = self.min_similarity, len(grams)
+        needed = math.ceil(t * size / (2 - t))
+        min_size, max_size = needed, (2 - t) * size / t
+        rarest = sorted(grams, key=lambda g: len(self._postings.get(g, ())))[:size - needed + 1]
+        candidates = set()
+        for gram in rarest:
+            candidates.update(self._postings.get(gram, ()))
+        best, best_key = None, None
+        for idx in candidates:
+            other = self._grams[idx]
+            if not min_size <= len(other) <= max_size:
+                continue
+            score = 2.0 * len(grams & other) / (size + len(other))
+            key = (score, self._rank[idx])
+            if score >= self.min_similarity and (best_key is None or key > best_key):
+                best, best_key = idx, key
+        return None if best is None else self._match(best, round(best_key[0], 3))
+
+
+_gazetteer = None
+_signature = None
+_next_check = 0.0
+_lock = threading.Lock()
+
+
+def get_gazetteer():
+    """The process-wide Gazetteer, rebuilt when the Place table has changed."""
+    global _gazetteer, _signature, _next_check
+    if _gazetteer is not None and time.monotonic() < _next_check:
+        return _gazetteer
+    with _lock:
+        config = geocoder_settings()
+        if _gazetteer is None or time.monotonic() >= _next_check:
+            stats = Place.objects.aggregate(count=Count('id'), last=Max('id'))
+            signature = (stats['count'], stats['last'])
+            if _gazetteer is None or signature != _signature:
+                rows = Place.objects.values_list('normalized', 'name', 'lat', 'lng', 'rank').iterator(chunk_size=5000)
+                _gazetteer = Gazetteer(
+                    rows,
+                    cache_size=config['CACHE_SIZE'],
+                    min_similarity=config['MIN_SIMILARITY'],
+                    stop_words=config['STOP_WORDS'],
+                    abbreviations=config['ABBREVIATIONS'],
+                )
+                _signature = signature
+            _next_check = time.monotonic() + config['RELOAD_INTERVAL']
+    return _gazetteer
+
+
+def geocode(text):
+    return get_gazetteer().geocode(text)
+
+
+def geocode_ride(ride):
+    """Fill missing origin/destination coordinates from the ride's text; return True if any were set."""
+    changed = False
+    for end in ('origin', 'destination'):
+        if getattr(ride, f'{end}_lat') is not None:
+            continue
+        match = geocode(getattr(ride, end))
+        if match is not None:
+            setattr(ride, f'{end}_lat', match.lat)
+            setattr(ride, f'{end}_lng', match.lng)
+            changed = True
+    return changed
@@ -0,0 +1,212 @@
+"""Compact, array-backed road graph with ALT landmark tables.
+
+Nodes are numbered ``0..n-1``. Coordinates live in two ``array('d')``; edges
+are stored in CSR form twice, forward and reverse, each as parallel
+``offsets``/``targets``/``seconds``/``meters`` arrays, so a city extract
+takes a few MB and loads with one ``fromfile`` per array.
+
+Landmark tables hold, for each of ``K`` landmarks ``L``, the travel time
+from ``L`` to every node and from every node to ``L``. By the triangle
+inequality they give an admissible lower bound on the remaining time to any
+target, which steers A* (see ``geo.routing``).
+"""
+import array
+import heapq
+import json
+import math
+import sys
+
+MAGIC = b'WYROADGRAPH1\n'
+EARTH_RADIUS_M = 6371008.8
+INF = float('inf')
+
+# snapping grid cell size in degrees (~550 m of latitude)
+GRID_CELL = 0.005
+
+
+def haversine_m(lat1, lng1, lat2, lng2):
+    p1, p2 = math.radians(lat1), math.radians(lat2)
+    dp, dl = p2 - p1, math.radians(lng2 - lng1)
+    a = math.sin(dp / 2) ** 2 + math.cos(p1) * math.cos(p2) * math.sin(dl / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def bounding_box(lat, lng, meters):
+    """``(south, west, north, east)`` of a box holding every point within ``meters`` of ``(lat, lng)``."""
+    dlat = math.degrees(meters / EARTH_RADIUS_M)
+    dlng = math.degrees(meters / (EARTH_RADIUS_M * max(math.cos(math.radians(lat)), 1e-6)))
+    return lat - dlat, lng - dlng, lat + dlat, lng + dlng
+
+
+def _csr(node_count, edges, reverse=False):
+    """Build ``(offsets, targets, seconds, meters)`` from ``(u, v, seconds, meters)`` tuples."""
+    key = 1 if reverse else 0
+    edges = sorted(edges, key=lambda e: e[key])
+    offsets = array.array('i', [0]) * (node_count + 1)
+    for edge in edges:
+        offsets[edge[key] + 1] += 1
+    for i in range(node_count):
+        offsets[i + 1] += offsets[i]
+    targets = array.array('i', (e[1 - key] for e in edges))
+    seconds = array.array('f', (e[2] for e in edges))
+    meters = array.array('f', (e[3] for e in edges))
+    return offsets, targets, seconds, meters
+
+
+class RoadGraph:
+
+    def __init__(self, lat, lng, forward, reverse, landmarks=None, from_landmark=None, to_landmark=None):
+        self.lat = lat
+        self.lng = lng
+        self.forward = forward
+        self.reverse = reverse
+        self.landmarks = landmarks if landmarks is not None else array.array('i')
+        # flat K*n tables: [k * n + v]
+        self.from_landmark = from_landmark if from_landmark is not None else array.array('f')
+        self.to_landmark = to_landmark if to_landmark is not None else array.array('f')
+        self._grid = None
+
+    @classmethod
+    def from_edges(cls, lats, lngs, edges):
+        """Build a graph from node coordinates and directed ``(u, v, seconds, meters)`` edges."""
+        edges = list(edges)
+        n = len(lats)
+        return cls(array.array('d', lats), array.array('d', lngs), _csr(n, edges), _csr(n, edges, reverse=True))
+
+    @property
+    def node_count(self):
+        return len(self.lat)
+
+    @property
+    def edge_count(self):
+        return len(self.forward[1])
+
+    # -- search primitives -------------------------------------------------
+
+    def shortest_times(self, source, reverse=False):
+        """Travel time from ``source`` to every node (or to ``source``, if reverse)."""
+        offsets, targets, seconds, _ = self.reverse if reverse else self.forward
+        dist = array.array('d', [INF]) * self.node_count
+        dist[source] = 0.0
+        heap = [(0.0, source)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                nd = d + seconds[i]
+                if nd < dist[v]:
+                    dist[v] = nd
+                    heapq.heappush(heap, (nd, v))
+        return dist
+
+    def precompute_landmarks(self, count=16):
+        """Choose ``count`` landmarks by farthest-point selection and fill the ALT tables."""
+        n = self.node_count
+        count = min(count, n)
+        landmarks = array.array('i')
+        from_tables, to_tables = [], []
+        # start from the node farthest from an arbitrary one, then repeatedly take
+        # the node farthest (in the worse direction) from every landmark so far
+        nearest = array.array('d', [INF]) * n
+        seed = self.shortest_times(0)
+        candidate = max(range(n), key=lambda v: seed[v] if seed[v] < INF else -1)
+        for _ in range(count):
+            landmarks.append(candidate)
+            from_l = self.shortest_times(candidate)
+            to_l = self.shortest_times(candidate, reverse=True)
+            from_tables.append(from_l)
+            to_tables.append(to_l)
+            for v in range(n):
+                d = min(from_l[v], to_l[v])
+                if d < nearest[v]:
+                    nearest[v] = d
+            candidate = max(range(n), key=lambda v: nearest[v] if nearest[v] < INF else -1)
+            if nearest[candidate] == 0:
+                break
+        self.landmarks = landmarks
+        self.from_landmark = array.array('f', (d for table in from_tables for d in table))
+        self.to_landmark = array.array('f', (d for table in to_tables for d in table))
+
+    # -- snapping ----------------------------------------------------------
+
+    def _build_grid(self):
+        grid = {}
+        for v in range(self.node_count):
+            cell = (int(math.floor(self.lat[v] / GRID_CELL)), int(math.floor(self.lng[v] / GRID_CELL)))
+            grid.setdefault(cell, []).append(v)
+        self._grid = grid
+
+    def nearest_node(self, lat, lng, max_meters=1000):
+        """Closest node to a point within ``max_meters``, as ``(node, meters)``; None if none."""
+        if self._grid is None:
+            self._build_grid()
+        ci, cj = int(math.floor(lat / GRID_CELL)), int(math.floor(lng / GRID_CELL))
+        # rings of cells; a cell is at least ~GRID_CELL * 111 km * cos(lat) away per ring
+        ring_meters = GRID_CELL * 111320 * max(math.cos(math.radians(lat)), 0.1)
+        best, best_d = None, INF
+        ring = 0
+        while ring * ring_meters <= max_meters + ring_meters:
+            for i in range(ci - ring, ci + ring + 1):
+                for j in range(cj - ring, cj + ring + 1):
+                    if max(abs(i - ci), abs(j - cj)) != ring:
+                        continue
+                    for v in self._grid.get((i, j), ()):
+                        d = haversine_m(lat, lng, self.lat[v], self.lng[v])
+                        if d < best_d:
+                            best, best_d = v, d
+            # anything in the next ring is at least ``ring * ring_meters`` away
+            if best is not None and best_d <= ring * ring_meters:
+                break
+            ring += 1
+        if best is None or best_d > max_meters:
+            return None
+        return best, best_d
+
+    # -- persistence -------------------------------------------------------
+
+    def _arrays(self):
+        return {
+            'lat': self.lat, 'lng': self.lng,
+            'fwd_offsets': self.forward[0], 'fwd_targets': self.forward[1],
+            'fwd_seconds': self.forward[2], 'fwd_meters': self.forward[3],
+            'rev_offsets': self.reverse[0], 'rev_targets': self.reverse[1],
+            'rev_seconds': self.reverse[2], 'rev_meters': self.reverse[3],
+            'landmarks': self.landmarks,
+            'from_landmark': self.from_landmark, 'to_landmark': self.to_landmark,
+        }
+
+    def save(self, path):
+        arrays = self._arrays()
+        header = {
+            'byteorder': sys.byteorder,
+            'arrays': [[name, arr.typecode, arr.itemsize, len(arr)] for name, arr in arrays.items()],
+        }
+        with open(path, 'wb') as fh:
+            fh.write(MAGIC)
+            fh.write(json.dumps(header).encode() + b'\n')
+            for arr in arrays.values():
+                arr.tofile(fh)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, 'rb') as fh:
+            if fh.readline() != MAGIC:
+                raise ValueError(f'{path} is not a road graph file')
+            header = json.loads(fh.readline())
+            arrays = {}
+            for name, typecode, itemsize, length in header['arrays']:
+                arr = array.array(typecode)
+                if arr.itemsize != itemsize:
+                    raise ValueError(f'{path}: {name} was written with {itemsize}-byte items')
+                arr.fromfile(fh, length)
+                if header['byteorder'] != sys.byteorder:
+                    arr.byteswap()
+                arrays[name] = arr
+        return cls(
+            arrays['lat'], arrays['lng'],
+            tuple(arrays[f'fwd_{part}'] for part in ('offsets', 'targets', 'seconds', 'meters')),
+            tuple(arrays[f'rev_{part}'] for part in ('offsets', 'targets', 'seconds', 'meters')),
+            arrays['landmarks'], arrays['from_landmark'], arrays['to_landmark'],
+        )
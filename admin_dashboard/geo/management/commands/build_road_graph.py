@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from geo.osm import build_graph
+from geo.routing import routing_settings
+
+
+class Command(BaseCommand):
+    help = 'Build the routing graph (with ALT landmark tables) from an OpenStreetMap XML extract.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('osm_file', help='.osm, .osm.gz or .osm.bz2 extract of the service area.')
+        parser.add_argument('--output', default=None,
+                            help="Graph file to write (default: ROUTING['GRAPH_PATH']).")
+        parser.add_argument('--landmarks', type=int, default=16, help='Number of ALT landmarks.')
+
+    def handle(self, *args, **options):
+        output = options['output'] or routing_settings()['GRAPH_PATH']
+        if not output:
+            raise CommandError("Pass --output or set ROUTING['GRAPH_PATH'].")
+
+        started = time.perf_counter()
+        try:
+            graph = build_graph(options['osm_file'])
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+        self.stdout.write(f'Parsed {graph.node_count} nodes, {graph.edge_count} edges '
+                          f'in {time.perf_counter() - started:.1f}s')
+
+        started = time.perf_counter()
+        graph.precompute_landmarks(options['landmarks'])
+        self.stdout.write(f'Computed {len(graph.landmarks)} landmarks in {time.perf_counter() - started:.1f}s')
+
+        graph.save(output)
+        self.stdout.write(f'Wrote {output}')
@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from core.cities import shard_aliases
+
+from geo.geocoder import geocode_ride, get_gazetteer
+from geo.routing import estimate_ride
+from rides.models import RideRequest
+
+FIELDS = ('origin_lat', 'origin_lng', 'destination_lat', 'destination_lng', 'est_duration_s', 'est_distance_m')
+# bulk_update() skips auto_now; stamp the change for replication explicitly
+UPDATED_FIELDS = (*FIELDS, 'updated_at')
+
+
+class Command(BaseCommand):
+    help = 'Backfill coordinates (and routed trip estimates) for rides from their origin/destination text.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rides read and updated per batch.')
+
+    def handle(self, *args, **options):
+        gazetteer = get_gazetteer()
+        if not len(gazetteer):
+            self.stdout.write('The gazetteer is empty; load it with load_gazetteer first.')
+            return
+
+        seen, updated = 0, 0
+        # every city database in turn
+        for using in shard_aliases():
+            missing = (RideRequest.objects.using(using)
+                       .filter(Q(origin_lat__isnull=True) | Q(destination_lat__isnull=True))
+                       .only('id', 'origin', 'destination', *FIELDS)
+                       .order_by('pk'))
+            last_pk = 0
+            while True:
+                batch = list(missing.filter(pk__gt=last_pk)[:options['batch_size']])
+                if not batch:
+                    break
+                last_pk = batch[-1].pk
+                seen += len(batch)
+                changed = [ride for ride in batch if geocode_ride(ride)]
+                now = timezone.now()
+                for ride in changed:
+                    estimate_ride(ride)
+                    ride.updated_at = now
+                RideRequest.objects.using(using).bulk_update(changed, UPDATED_FIELDS, batch_size=500)
+                updated += len(changed)
+        info = gazetteer.lookup.cache_info()
+        self.stdout.write(f'Geocoded {updated} of {seen} ride(s) '
+                          f'({info.currsize} distinct place strings, {info.hits} cache hits).')
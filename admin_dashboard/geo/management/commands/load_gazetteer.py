@@ -0,0 +1,54 @@
+import csv
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from geo.models import Place
+from geo.osm import read_named_nodes
+from search.normalize import normalize_place
+
+
+class Command(BaseCommand):
+    help = 'Load named places into the gazetteer from a CSV file or an OpenStreetMap XML extract.'
+
+    def add_arguments(self, parser):
+        source = parser.add_mutually_exclusive_group(required=True)
+        source.add_argument('--csv', help='CSV with name,lat,lng and optional kind,rank,alt_names (";"-separated).')
+        source.add_argument('--osm', help='.osm(.gz/.bz2) extract; named places, markets, stops and amenities are loaded.')
+        parser.add_argument('--keep', action='store_true',
+                            help='Add to existing places from this source instead of replacing them.')
+
+    def handle(self, *args, **options):
+        if options['csv']:
+            source, rows = 'csv', self._read_csv(options['csv'])
+        else:
+            source, rows = 'osm', read_named_nodes(options['osm'])
+
+        places, seen = [], set()
+        for names, lat, lng, kind, rank in rows:
+            for name in names:
+                normalized = normalize_place(name)[:200]
+                if normalized and (normalized, lat, lng) not in seen:
+                    seen.add((normalized, lat, lng))
+                    places.append(Place(name=name[:200], normalized=normalized, kind=kind[:32],
+                                        lat=lat, lng=lng, rank=rank, source=source))
+
+        with transaction.atomic():
+            if not options['keep']:
+                Place.objects.filter(source=source).delete()
+            Place.objects.bulk_create(places, batch_size=1000)
+        self.stdout.write(f'Loaded {len(places)} place name(s) from {source}.')
+
+    def _read_csv(self, path):
+        try:
+            with open(path, newline='', encoding='utf-8') as fh:
+                for line, row in enumerate(csv.DictReader(fh), start=2):
+                    try:
+                        lat, lng = float(row['lat']), float(row['lng'])
+                        rank = int(row.get('rank') or 0)
+                    except (KeyError, ValueError):
+                        raise CommandError(f'{path}:{line}: need name, lat and lng')
+                    names = [row['name']] + [n for n in (row.get('alt_names') or '').split(';') if n.strip()]
+                    yield [n.strip() for n in names], lat, lng, row.get('kind') or '', rank
+        except OSError as exc:
+            raise CommandError(str(exc))
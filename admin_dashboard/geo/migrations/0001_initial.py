@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Place',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200)),
+                ('normalized', models.CharField(db_index=True, max_length=200)),
+                ('kind', models.CharField(blank=True, max_length=32)),
+                ('lat', models.FloatField()),
+                ('lng', models.FloatField()),
+                ('rank', models.PositiveIntegerField(default=0)),
+                ('source', models.CharField(default='csv', max_length=16)),
+            ],
+        ),
+    ]
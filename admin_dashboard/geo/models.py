@@ -0,0 +1,20 @@
+from django.db import models
+
+
+class Place(models.Model):
+    """A named place in the local gazetteer used to geocode free-text origins/destinations.
+
+    Alternative spellings are separate rows with the same coordinates. Loaded
+    with ``load_gazetteer``; see ``geo.geocoder``.
+    """
+    name = models.CharField(max_length=200)
+    normalized = models.CharField(max_length=200, db_index=True)
+    kind = models.CharField(max_length=32, blank=True)
+    lat = models.FloatField()
+    lng = models.FloatField()
+    # tiebreak between equally good matches; higher wins (e.g. how often riders use it)
+    rank = models.PositiveIntegerField(default=0)
+    source = models.CharField(max_length=16, default='csv')
+
+    def __str__(self):
+        return f"{self.name} ({self.lat:.5f}, {self.lng:.5f})"
@@ -0,0 +1,176 @@
+"""Build a :class:`geo.graph.RoadGraph` from an OpenStreetMap XML extract.
+
+Reads ``.osm`` files (optionally ``.gz``/``.bz2`` compressed) in one
+streaming pass with ``iterparse``, keeping only node coordinates and the
+drivable ``highway`` ways. Edge times come from ``maxspeed`` where tagged,
+otherwise from a per-highway-class default. Disconnected fragments are
+dropped so every snapped point can reach the rest of the network. Convert
+``.pbf`` extracts to XML first (e.g. with ``osmium cat``).
+"""
+import bz2
+import gzip
+import re
+import xml.etree.ElementTree as ET
+
+from .graph import RoadGraph, haversine_m
+
+# default speeds in km/h for drivable highway classes
+HIGHWAY_SPEEDS = {
+    'motorway': 90, 'motorway_link': 60,
+    'trunk': 70, 'trunk_link': 50,
+    'primary': 55, 'primary_link': 40,
+    'secondary': 45, 'secondary_link': 35,
+    'tertiary': 35, 'tertiary_link': 30,
+    'unclassified': 30, 'residential': 25,
+    'living_street': 10, 'service': 15, 'road': 25,
+}
+
+_SPEED_RE = re.compile(r'(\d+(?:\.\d+)?)\s*(mph)?')
+
+
+def _open(path):
+    path = str(path)
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rb')
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def _speed_kmh(tags):
+    match = _SPEED_RE.match(tags.get('maxspeed', ''))
+    if match:
+        speed = float(match.group(1)) * (1.609 if match.group(2) else 1.0)
+        if speed > 0:
+            return speed
+    return HIGHWAY_SPEEDS[tags['highway']]
+
+
+def _direction(tags):
+    """1 = forward only, -1 = backward only, 0 = both ways."""
+    oneway = tags.get('oneway', '')
+    if oneway in ('yes', 'true', '1'):
+        return 1
+    if oneway == '-1':
+        return -1
+    if oneway != 'no' and (tags.get('junction') == 'roundabout' or tags['highway'] == 'motorway'):
+        return 1
+    return 0
+
+
+def read_osm(path):
+    """Return ``(coords, ways)``: node id -> (lat, lng) and ``[(refs, speed_kmh, direction)]``."""
+    coords = {}
+    ways = []
+    with _open(path) as fh:
+        refs, tags = [], {}
+        root = None
+        for event, elem in ET.iterparse(fh, events=('start', 'end')):
+            if root is None:
+                root = elem
+            if event == 'start':
+                continue
+            if elem.tag == 'nd':
+                refs.append(int(elem.get('ref')))
+            elif elem.tag == 'tag':
+                tags[elem.get('k')] = elem.get('v')
+            elif elem.tag in ('node', 'way', 'relation'):
+                if elem.tag == 'node':
+                    coords[int(elem.get('id'))] = (float(elem.get('lat')), float(elem.get('lon')))
+                elif (elem.tag == 'way' and tags.get('highway') in HIGHWAY_SPEEDS
+                      and tags.get('access') not in ('no', 'private')):
+                    ways.append((refs, _speed_kmh(tags), _direction(tags)))
+                refs, tags = [], {}
+                root.clear()  # keep memory flat on large extracts
+    return coords, ways
+
+
+def _largest_component(node_count, edges):
+    parent = list(range(node_count))
+
+    def find(x):
+        while parent[x] != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for u, v, _, _ in edges:
+        ru, rv = find(u), find(v)
+        if ru != rv:
+            parent[ru] = rv
+    sizes = {}
+    for v in range(node_count):
+        root = find(v)
+        sizes[root] = sizes.get(root, 0) + 1
+    biggest = max(sizes, key=sizes.get)
+    return [find(v) == biggest for v in range(node_count)]
+
+
+def build_graph(path):
+    """Parse an OSM extract into a RoadGraph (without landmark tables)."""
+    coords, ways = read_osm(path)
+    index = {}
+    lats, lngs, edges = [], [], []
+
+    def node(osm_id):
+        if osm_id not in index:
+            index[osm_id] = len(lats)
+            lat, lng = coords[osm_id]
+            lats.append(lat)
+            lngs.append(lng)
+        return index[osm_id]
+
+    for refs, speed, direction in ways:
+        refs = [ref for ref in refs if ref in coords]
+        mps = speed / 3.6
+        for a, b in zip(refs, refs[1:]):
+            u, v = node(a), node(b)
+            meters = haversine_m(lats[u], lngs[u], lats[v], lngs[v])
+            if direction >= 0:
+                edges.append((u, v, meters / mps, meters))
+            if direction <= 0:
+                edges.append((v, u, meters / mps, meters))
+    if not lats:
+        raise ValueError(f'{path} contains no drivable roads')
+
+    keep = _largest_component(len(lats), edges)
+    renumber, new_lats, new_lngs = {}, [], []
+    for v, kept in enumerate(keep):
+        if kept:
+            renumber[v] = len(new_lats)
+            new_lats.append(lats[v])
+            new_lngs.append(lngs[v])
+    edges = [(renumber[u], renumber[v], s, m) for u, v, s, m in edges if keep[u]]
+    return RoadGraph.from_edges(new_lats, new_lngs, edges)
+
+
+# node tags that make a named node worth putting in the gazetteer
+PLACE_TAGS = ('place', 'amenity', 'shop', 'tourism', 'leisure', 'public_transport', 'railway', 'aeroway')
+NAME_TAGS = ('name', 'name:en', 'alt_name', 'old_name', 'short_name', 'official_name')
+PLACE_RANKS = {'city': 50, 'town': 40, 'suburb': 30, 'neighbourhood': 20, 'marketplace': 25, 'bus_station': 25}
+
+
+def read_named_nodes(path):
+    """Yield ``(names, lat, lng, kind, rank)`` for named, place-like nodes of an OSM extract."""
+    with _open(path) as fh:
+        tags = {}
+        root = None
+        for event, elem in ET.iterparse(fh, events=('start', 'end')):
+            if root is None:
+                root = elem
+            if event == 'start':
+                continue
+            if elem.tag == 'tag':
+                tags[elem.get('k')] = elem.get('v')
+            elif elem.tag in ('node', 'way', 'relation'):
+                kind_tag = next((t for t in PLACE_TAGS if t in tags), None)
+                if elem.tag == 'node' and kind_tag and 'name' in tags:
+                    names = []
+                    for key in NAME_TAGS:
+                        for name in tags.get(key, '').split(';'):
+                            if name.strip() and name.strip() not in names:
+                                names.append(name.strip())
+                    kind = tags[kind_tag]
+                    yield names, float(elem.get('lat')), float(elem.get('lon')), kind, PLACE_RANKS.get(kind, 10)
+                tags = {}
+                root.clear()
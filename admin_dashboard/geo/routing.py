@@ -0,0 +1,213 @@
+"""Point-to-point and one-to-many travel times over the local road graph.
+
+``get_router()`` loads the graph file named by ``ROUTING['GRAPH_PATH']``
+once per process (built with ``manage.py build_road_graph``) and returns
+None when routing is not configured, so callers simply skip estimates.
+
+Point-to-point queries run A* guided by the graph's landmark (ALT) lower
+bounds, using the few landmarks that bound the query best. Results are
+kept in an LRU keyed by the snapped node pair, so repeated origin and
+destination pairs cost a dictionary lookup. One-to-many and many-to-one
+queries run a single Dijkstra search that stops once every target is
+settled.
+
+Each point is snapped to the nearest road node. The gap between the point
+and that node is charged at ``ACCESS_SPEED_KMH``.
+"""
+import heapq
+import logging
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+from django.conf import settings
+
+from .graph import INF, RoadGraph
+
+logger = logging.getLogger(__name__)
+
+Route = namedtuple('Route', 'seconds meters')
+
+
+def routing_settings():
+    defaults = {
+        'GRAPH_PATH': None,
+        'CACHE_SIZE': 4096,
+        'MAX_SNAP_METERS': 1000,
+        'ACCESS_SPEED_KMH': 15,
+        'ACTIVE_LANDMARKS': 4,
+        'NEARBY_RADIUS_M': 15000,
+        'NEARBY_CANDIDATES': 200,
+    }
+    defaults.update(getattr(settings, 'ROUTING', {}))
+    return defaults
+
+
+class Router:
+
+    def __init__(self, graph, cache_size=4096, max_snap_meters=1000, access_speed_kmh=15, active_landmarks=4):
+        self.graph = graph
+        self.max_snap_meters = max_snap_meters
+        self.access_mps = access_speed_kmh / 3.6
+        self.active_landmarks = active_landmarks
+        self._node_route = lru_cache(maxsize=cache_size)(self._search)
+
+    def cache_info(self):
+        return self._node_route.cache_info()
+
+    def snap(self, lat, lng):
+        return self.graph.nearest_node(lat, lng, self.max_snap_meters)
+
+    def route(self, origin, destination):
+        """Travel estimate between two ``(lat, lng)`` points, or None if either is off the network."""
+        start, end = self.snap(*origin), self.snap(*destination)
+        if start is None or end is None:
+            return None
+        leg = self._node_route(start[0], end[0])
+        if leg is None:
+            return None
+        return self._with_access(leg, start[1] + end[1])
+
+    def routes_from(self, origin, destinations):
+        """One-to-many: estimates from ``origin`` to each destination (None where unreachable)."""
+        return self._one_to_many(origin, destinations, reverse=False)
+
+    def routes_to(self, origins, destination):
+        """Many-to-one: estimates from each origin to ``destination``, e.g. drivers to a pickup."""
+        return self._one_to_many(destination, origins, reverse=True)
+
+    # -- internals ---------------------------------------------------------
+
+    def _with_access(self, leg, access_meters):
+        return Route(leg[0] + access_meters / self.access_mps, leg[1] + access_meters)
+
+    def _potential(self, source, target):
+        """ALT heuristic toward ``target`` using the landmarks that bound ``source`` best."""
+        graph = self.graph
+        n, from_l, to_l = graph.node_count, graph.from_landmark, graph.to_landmark
+        candidates = []
+        for k in range(len(graph.landmarks)):
+            ft, tt = from_l[k * n + target], to_l[k * n + target]
+            if ft == INF or tt == INF:
+                continue
+            bound = max(ft - from_l[k * n + source], to_l[k * n + source] - tt)
+            candidates.append((bound, k * n, ft, tt))
+        candidates.sort(reverse=True)
+        active = [c[1:] for c in candidates[:self.active_landmarks]]
+
+        def h(v):
+            best = 0.0
+            for base, ft, tt in active:
+                b = ft - from_l[base + v]
+                if b > best:
+                    best = b
+                b = to_l[base + v] - tt
+                if b > best:
+                    best = b
+            return best
+        return h
+
+    def _search(self, source, target):
+        if source == target:
+            return (0.0, 0.0)
+        offsets, targets, seconds, meters = self.graph.forward
+        h = self._potential(source, target)
+        dist = {source: 0.0}
+        length = {source: 0.0}
+        closed = set()
+        heap = [(h(source), source)]
+        while heap:
+            _, u = heapq.heappop(heap)
+            if u == target:
+                return (dist[u], length[u])
+            if u in closed:
+                continue
+            closed.add(u)
+            du, lu = dist[u], length[u]
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                nd = du + seconds[i]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    length[v] = lu + meters[i]
+                    heapq.heappush(heap, (nd + h(v), v))
+        return None
+
+    def _one_to_many(self, point, others, reverse):
+        results = [None] * len(others)
+        start = self.snap(*point)
+        if start is None:
+            return results
+        wanted = {}
+        for i, other in enumerate(others):
+            snapped = self.snap(*other)
+            if snapped is not None:
+                wanted.setdefault(snapped[0], []).append((i, snapped[1]))
+        if not wanted:
+            return results
+
+        offsets, targets, seconds, meters = self.graph.reverse if reverse else self.graph.forward
+        dist = {start[0]: 0.0}
+        length = {start[0]: 0.0}
+        heap = [(0.0, start[0])]
+        remaining = len(wanted)
+        while heap and remaining:
+            d, u = heapq.heappop(heap)
+            if d > dist[u]:
+                continue
+            if u in wanted:
+                for i, access in wanted.pop(u):
+                    results[i] = self._with_access((d, length[u]), start[1] + access)
+                remaining -= 1
+            for i in range(offsets[u], offsets[u + 1]):
+                v = targets[i]
+                nd = d + seconds[i]
+                if nd < dist.get(v, INF):
+                    dist[v] = nd
+                    length[v] = length[u] + meters[i]
+                    heapq.heappush(heap, (nd, v))
+        return results
+
+
+_router = None
+_router_loaded = False
+_lock = threading.Lock()
+
+
+def get_router():
+    """The process-wide Router, or None if no graph is configured or it failed to load."""
+    global _router, _router_loaded
+    if _router_loaded:
+        return _router
+    with _lock:
+        if not _router_loaded:
+            config = routing_settings()
+            if config['GRAPH_PATH']:
+                try:
+                    _router = Router(
+                        RoadGraph.load(config['GRAPH_PATH']),
+                        cache_size=config['CACHE_SIZE'],
+                        max_snap_meters=config['MAX_SNAP_METERS'],
+                        access_speed_kmh=config['ACCESS_SPEED_KMH'],
+                        active_landmarks=config['ACTIVE_LANDMARKS'],
+                    )
+                except (OSError, ValueError):
+                    logger.exception('Could not load road graph %s; routing disabled', config['GRAPH_PATH'])
+            _router_loaded = True
+    return _router
+
+
+def estimate_ride(ride):
+    """Fill ``ride.est_duration_s``/``est_distance_m`` from its coordinates when possible.
+
+    Returns True if an estimate was set. Does not save the ride.
+    """
+    router = get_router()
+    if router is None or None in (ride.origin_lat, ride.origin_lng, ride.destination_lat, ride.destination_lng):
+        return False
+    route = router.route((ride.origin_lat, ride.origin_lng), (ride.destination_lat, ride.destination_lng))
+    if route is None:
+        return False
+    ride.est_duration_s = round(route.seconds)
+    ride.est_distance_m = round(route.meters)
+    return True
@@ -0,0 +1,6 @@
+from django.urls import path
+from .views import route
+
+urlpatterns = [
+	path('route/', route, name='geo_route'),
+]
@@ -0,0 +1,33 @@
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from .routing import get_router
+
+
+def parse_point(value):
+    """Parse ``"lat,lng"``; return a ``(lat, lng)`` tuple or None."""
+    try:
+        lat, lng = (float(part) for part in (value or '').split(','))
+    except ValueError:
+        return None
+    if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+        return None
+    return lat, lng
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def route(request):
+    """Travel estimate between two points: ``?from=lat,lng&to=lat,lng``."""
+    origin = parse_point(request.query_params.get('from'))
+    destination = parse_point(request.query_params.get('to'))
+    if origin is None or destination is None:
+        return Response({'detail': 'from and to must be "lat,lng".'}, status=400)
+    router = get_router()
+    if router is None:
+        return Response({'detail': 'Routing is not configured.'}, status=503)
+    result = router.route(origin, destination)
+    if result is None:
+        return Response({'detail': 'No route between these points.'}, status=404)
+    return Response({'duration_s': round(result.seconds), 'distance_m': round(result.meters)})
@@ -0,0 +1,12 @@
+from django.contrib import admin
+from .models import ReplicationCursor
+
+
+@admin.register(ReplicationCursor)
+class ReplicationCursorAdmin(admin.ModelAdmin):
+    list_display = ('name', 'position', 'lag_seconds', 'applied', 'last_run')
+    ordering = ('name',)
+    readonly_fields = [f.name for f in ReplicationCursor._meta.fields]
+
+    def has_add_permission(self, request):
+        return False
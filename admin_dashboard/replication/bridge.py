@@ -0,0 +1,573 @@
+"""Two-way replication between Django and the mobile app's Supabase schema.
+
+The Expo app reads and writes ``users``, ``profiles`` and ``rides`` in its
+Supabase Postgres; Django keeps ``Profile`` and ``RideRequest``. Each pass of
+:func:`replicate` runs four kinds of stream, each reading the rows its source
+changed since the stream's ``ReplicationCursor`` in ``(updated_at, id)``
+order, ``BATCH_SIZE`` at a time:
+
+* ``pull:profiles`` and ``pull:rides`` copy Supabase changes into Django;
+* ``push:profiles`` and ``push:rides:<alias>`` (one per city database, in
+  parallel) copy Django changes out.
+
+Conflicts resolve last-writer-wins: a row is written only when the source
+copy is strictly newer by ``updated_at`` than the target's and differs in a
+replicated field. Writes keep the source's ``updated_at``, so a row copied
+one way is never copied back. Each batch is written with bulk upserts in one
+transaction per database, and the cursor moves after the batch commits.
+
+Cursors trail writers that commit late: every pass re-reads ``OVERLAP``
+before the cursor, which covers transactions shorter than that window;
+``run_replication --full`` re-reads everything. Both sides' clocks should
+be NTP-synced, since timestamps from each are compared.
+
+Status names differ (the app uses ``pending``/``accepted``/``picked_up``/
+``ongoing``); see ``STATUS_FROM_REMOTE``. The app's finer in-trip states all
+map to ``assigned`` and are left alone when Django pushes a ride still
+``assigned``.
+
+Accounts created on one side are created on the other and linked. Only
+accounts the bridge creates itself are linked automatically: when the
+username is already taken on the other side, the account is logged and
+skipped until an admin links the two by hand (``run_replication --link``,
+see :func:`link`). Staff and superusers are never linked or pushed. Users
+from the app get an unusable Django password. Django users get a random app
+``password_hash``, so they cannot sign in to the app with it.
+
+Driver approval belongs to Django once an account is linked: the app's
+``is_driver_approved`` is copied when the link is made and never pulled
+again, and Django's value is pushed, even over newer app edits.
+"""
+import logging
+import secrets
+import threading
+import uuid
+from collections import defaultdict
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.db import DatabaseError, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import Profile
+from core.cities import city_db, default_city, for_each_shard, normalize_city
+from rides import dashboard, stats
+from rides.models import ArchivedRide, RideRequest
+from rides.signals import ride_status_changed
+from .models import RemoteProfile, RemoteRide, RemoteUser, ReplicationCursor
+from .routers import remote_alias
+
+logger = logging.getLogger(__name__)
+
+
+class LinkError(Exception):
+    """A manual link between a Django user and an app user was refused."""
+
+# app status -> RideRequest status
+STATUS_FROM_REMOTE = {
+    'pending': 'requested',
+    'requested': 'requested',
+    'scheduled': 'scheduled',
+    'accepted': 'assigned',
+    'picked_up': 'assigned',
+    'ongoing': 'assigned',
+    'completed': 'completed',
+    'cancelled': 'cancelled',
+}
+# RideRequest status -> app status ('requested' is what the app's driver feed lists)
+STATUS_TO_REMOTE = {
+    'requested': 'requested',
+    'scheduled': 'scheduled',
+    'assigned': 'accepted',
+    'completed': 'completed',
+    'cancelled': 'cancelled',
+}
+# app vehicle types that are bikes; anything else is a taxi
+BIKE_VEHICLE_TYPES = {'bike', 'motorbike', 'okada'}
+TRANSPORT_TO_REMOTE = {'taxi': 'car', 'bike': 'bike'}
+
+PROFILE_PULL_FIELDS = ('full_name', 'phone', 'role', 'city', 'id_type', 'id_number')
+PROFILE_PUSH_FIELDS = ('username', 'full_name', 'phone', 'role', 'city', 'is_driver_approved',
+                       'national_id_number', 'id_type')
+RIDE_PULL_FIELDS = ('driver_id', 'origin', 'destination', 'origin_lat', 'origin_lng', 'destination_lat',
+                    'destination_lng', 'transport_type', 'status', 'scheduled_at', 'assigned_at', 'completed_at')
+RIDE_PUSH_FIELDS = ('rider_id', 'driver_id', 'origin_address', 'origin_lat', 'origin_lng', 'destination_address',
+                    'destination_lat', 'destination_lng', 'vehicle_type', 'status', 'scheduled_at',
+                    'accepted_at', 'completed_at', 'cancelled_at')
+
+
+def replication_settings():
+    defaults = {
+        'DATABASE': 'supabase',
+        'BATCH_SIZE': 500,
+        'POLL_INTERVAL': timedelta(seconds=1),
+        'OVERLAP': timedelta(seconds=5),
+        'LAG_WARNING': timedelta(seconds=10),
+    }
+    defaults.update(getattr(settings, 'REPLICATION', {}))
+    return defaults
+
+
+def _text(model, field, value):
+    """``value`` as a string that fits ``model.field``."""
+    return (value or '')[:model._meta.get_field(field).max_length]
+
+
+def _float(value):
+    # Postgres numeric columns come back as Decimal
+    return None if value is None else float(value)
+
+
+def _differs(current, new, fields):
+    return any(getattr(current, field) != getattr(new, field) for field in fields)
+
+
+# -- change streams ----------------------------------------------------------
+
+def changes(queryset, position, batch_size, overlap):
+    """Batches of ``queryset`` rows changed since ``position`` (less ``overlap``), oldest first."""
+    if position is not None:
+        queryset = queryset.filter(updated_at__gte=position - overlap)
+    queryset = queryset.order_by('updated_at', 'pk')
+    after = None
+    while True:
+        page = queryset
+        if after is not None:
+            page = page.filter(Q(updated_at__gt=after[0]) | Q(updated_at=after[0], pk__gt=after[1]))
+        batch = list(page[:batch_size])
+        if batch:
+            yield batch
+        if len(batch) < batch_size:
+            return
+        after = batch[-1].updated_at, batch[-1].pk
+
+
+def run_stream(name, queryset, apply, full=False, batch_size=None):
+    """Feed every batch changed since cursor ``name`` to ``apply``; return the number of rows written.
+
+    ``apply(batch)`` returns the source rows it wrote. The cursor is saved
+    after each batch, so an interrupted stream resumes where it stopped.
+    """
+    config = replication_settings()
+    cursor, _ = ReplicationCursor.objects.get_or_create(name=name)
+    if full:
+        cursor.position = None
+    written, lag = 0, 0.0
+    for batch in changes(queryset, cursor.position, batch_size or config['BATCH_SIZE'], config['OVERLAP']):
+        applied = apply(batch)
+        now = timezone.now()
+        if applied:
+            lag = max(lag, max((now - row.updated_at).total_seconds() for row in applied))
+        written += len(applied)
+        cursor.position = max(filter(None, (cursor.position, batch[-1].updated_at)))
+        cursor.applied += len(applied)
+        cursor.save(update_fields=['position', 'applied'])
+    cursor.lag_seconds = lag
+    cursor.last_run = timezone.now()
+    cursor.save(update_fields=['lag_seconds', 'last_run'])
+    if lag > config['LAG_WARNING'].total_seconds():
+        logger.warning('Replication stream %s is %.1fs behind', name, lag)
+    return written
+
+
+# -- Supabase -> Django ------------------------------------------------------
+
+def _link_users(rows):
+    """Create Django users and profiles for app users not linked yet: ``{remote id: profile}``.
+
+    The returned profiles still have ``supabase_id`` unset. App users whose
+    username a Django account already has are skipped, to be linked by hand.
+    """
+    User = get_user_model()
+    rows = [row for row in rows if row.username]
+    taken = set(User.objects.filter(username__in=[row.username for row in rows]).values_list('username', flat=True))
+    for row in rows:
+        if row.username in taken:
+            logger.warning('Not linking app user %s: Django already has a user named %s '
+                           '(link them with run_replication --link)', row.id, row.username)
+    rows = [row for row in rows if row.username not in taken]
+    new_users = [User(username=row.username, password=make_password(None)) for row in rows]
+    User.objects.bulk_create(new_users)
+    # bulk_create sends no post_save, so the usual profile signal does not fire
+    created = Profile.objects.bulk_create([Profile(user=user) for user in new_users])
+    return {row.id: profile for row, profile in zip(rows, created)}
+
+
+def pull_profiles(rows, links=None):
+    """Apply app ``profiles`` rows to Django profiles, creating users for new ones; return the rows applied.
+
+    ``links`` maps remote ids to existing, unlinked profiles to link them to
+    (see :func:`link`).
+    """
+    with transaction.atomic():
+        profiles = {profile.supabase_id: profile for profile in
+                    Profile.objects.select_for_update().filter(supabase_id__in=[row.id for row in rows])}
+        profiles.update(links or {})
+        created = set()
+        unlinked = [row for row in rows if row.id not in profiles]
+        if unlinked:
+            linked = _link_users(unlinked)
+            profiles.update(linked)
+            created = {profile.pk for profile in linked.values()}
+
+        changed, applied = [], []
+        for row in rows:
+            profile = profiles.get(row.id)
+            if profile is None:
+                continue
+            link = profile.supabase_id is None
+            profile.supabase_id = row.id
+            if link:
+                # approval is Django's from now on; start from the app's decision
+                profile.is_driver_approved = row.is_driver_approved
+            if profile.pk in created or row.updated_at > profile.updated_at:
+                values = {
+                    'full_name': _text(Profile, 'full_name', row.full_name),
+                    'phone': _text(Profile, 'phone', row.phone),
+                    'role': row.role if row.role in dict(Profile.ROLE_CHOICES) else 'rider',
+                    'city': _text(Profile, 'city', row.city),
+                    'id_type': row.id_type if row.id_type in dict(Profile.ID_TYPE_CHOICES) else '',
+                    'id_number': _text(Profile, 'id_number', row.national_id_number),
+                }
+                if any(getattr(profile, field) != value for field, value in values.items()):
+                    for field, value in values.items():
+                        setattr(profile, field, value)
+                    profile.updated_at = row.updated_at
+                elif not link:
+                    continue
+            elif link:
+                # Django's copy is newer: link, and let the push stream send it
+                profile.updated_at = timezone.now()
+            else:
+                continue
+            changed.append(profile)
+            applied.append(row)
+        Profile.objects.bulk_update(changed, [*PROFILE_PULL_FIELDS, 'supabase_id', 'is_driver_approved',
+                                              'updated_at'])
+    return applied
+
+
+def link(username, remote_id):
+    """Link Django user ``username`` to app user ``remote_id`` and pull the app's profile.
+
+    For accounts the bridge would not link itself because the username
+    exists on both sides. Raises :class:`LinkError` for staff, for users
+    already linked and for app users linked to someone else.
+    """
+    alias = remote_alias()
+    try:
+        remote_id = uuid.UUID(str(remote_id))
+    except ValueError:
+        raise LinkError(f'{remote_id} is not an app user id.')
+    try:
+        profile = Profile.objects.select_related('user').get(user__username=username)
+    except Profile.DoesNotExist:
+        raise LinkError(f'No Django user named {username} with a profile.')
+    if profile.user.is_staff or profile.user.is_superuser:
+        raise LinkError(f'{username} is staff; staff accounts are not replicated.')
+    if profile.supabase_id is not None:
+        raise LinkError(f'{username} is already linked to app user {profile.supabase_id}.')
+    if Profile.objects.filter(supabase_id=remote_id).exists():
+        raise LinkError(f'App user {remote_id} is already linked to another Django user.')
+    row = RemoteProfile.objects.using(alias).filter(pk=remote_id).first()
+    if row is None:
+        raise LinkError(f'The app has no profile {remote_id}.')
+    pull_profiles([row], links={row.id: profile})
+
+
+def _local_users(remote_ids):
+    """``{remote user id: (user pk, city slug)}`` for linked profiles."""
+    return {
+        supabase_id: (user_id, normalize_city(city) or default_city())
+        for supabase_id, user_id, city in
+        Profile.objects.filter(supabase_id__in=remote_ids).values_list('supabase_id', 'user_id', 'city')
+    }
+
+
+def pull_rides(rows):
+    """Apply app ``rides`` rows to each rider's city database; return the rows applied.
+
+    Riders and drivers not replicated yet are pulled first. Rides already
+    archived are final and left alone.
+    """
+    remote_ids = {row.rider_id for row in rows} | {row.driver_id for row in rows if row.driver_id}
+    people = _local_users(remote_ids)
+    missing = remote_ids - people.keys()
+    if missing:
+        pull_profiles(list(RemoteProfile.objects.using(remote_alias()).filter(pk__in=missing)))
+        people = _local_users(remote_ids)
+
+    by_alias = defaultdict(list)
+    for row in rows:
+        if row.rider_id not in people:
+            logger.warning('Skipping app ride %s: rider %s has no profile', row.id, row.rider_id)
+        elif row.status not in STATUS_FROM_REMOTE:
+            logger.warning('Skipping app ride %s: unknown status %r', row.id, row.status)
+        else:
+            by_alias[city_db(people[row.rider_id][1])].append(row)
+    applied = []
+    for using, alias_rows in by_alias.items():
+        applied += _pull_rides_into(using, alias_rows, people)
+    return applied
+
+
+def _ride_values(row, people, ride=None):
+    status = STATUS_FROM_REMOTE[row.status]
+    driver = people.get(row.driver_id)
+    assigned_at = row.accepted_at or (ride and ride.assigned_at)
+    completed_at = row.completed_at or (ride and ride.completed_at)
+    return {
+        'driver_id': driver[0] if driver else None,
+        'origin': _text(RideRequest, 'origin', row.origin_address),
+        'destination': _text(RideRequest, 'destination', row.destination_address),
+        'origin_lat': _float(row.origin_lat),
+        'origin_lng': _float(row.origin_lng),
+        'destination_lat': _float(row.destination_lat),
+        'destination_lng': _float(row.destination_lng),
+        'transport_type': 'bike' if (row.vehicle_type or '').lower() in BIKE_VEHICLE_TYPES else 'taxi',
+        'status': status,
+        'scheduled_at': row.scheduled_at,
+        # the app may not stamp these; the change that set the status is the best estimate
+        'assigned_at': assigned_at or (row.updated_at if status in ('assigned', 'completed') and driver else None),
+        'completed_at': completed_at or (row.updated_at if status == 'completed' else None),
+    }
+
+
+def _pull_rides_into(using, rows, people):
+    with transaction.atomic(using=using):
+        ids = [row.id for row in rows]
+        rides = {ride.supabase_id: ride for ride in
+                 RideRequest.objects.using(using).select_for_update().filter(supabase_id__in=ids)}
+        archived = set(ArchivedRide.objects.using(using).filter(supabase_id__in=ids)
+                       .values_list('supabase_id', flat=True))
+        created, changed, transitions, applied = [], [], [], []
+        # riders, drivers and cities the changed rides had, for the dashboards showing them
+        before = []
+        for row in rows:
+            if row.id in archived:
+                continue
+            ride = rides.get(row.id)
+            if ride is None:
+                rider_id, city = people[row.rider_id]
+                ride = RideRequest(supabase_id=row.id, rider_id=rider_id, city=city, **_ride_values(row, people))
+                ride.requested_at, ride.updated_at = row.created_at, row.updated_at
+                created.append(ride)
+            elif row.updated_at > ride.updated_at:
+                values = _ride_values(row, people, ride)
+                if all(getattr(ride, field) == value for field, value in values.items()):
+                    continue
+                old_status = ride.status
+                before.append({'rider_id': ride.rider_id, 'driver_id': ride.driver_id, 'city': ride.city})
+                for field, value in values.items():
+                    setattr(ride, field, value)
+                ride.updated_at = row.updated_at
+                changed.append(ride)
+                if ride.status != old_status:
+                    transitions.append((ride, old_status))
+            else:
+                continue
+            applied.append(row)
+
+        if created:
+            timestamps = [(ride.requested_at, ride.updated_at) for ride in created]
+            RideRequest.objects.using(using).bulk_create(created)
+            # bulk_create applies auto_now/auto_now_add; restore the app's timestamps
+            for ride, (requested_at, updated_at) in zip(created, timestamps):
+                ride.requested_at, ride.updated_at = requested_at, updated_at
+            RideRequest.objects.using(using).bulk_update(created, ['requested_at', 'updated_at'])
+        RideRequest.objects.using(using).bulk_update(changed, [*RIDE_PULL_FIELDS, 'updated_at'])
+        transaction.on_commit(lambda: _announce(created, transitions, [*changed, *before]), using=using)
+    return applied
+
+
+def _status_steps(ride, old_status):
+    """``[(old, new)]`` status changes to announce for a pulled ride.
+
+    The app may take a ride from open straight to completed or cancelled
+    with a driver set; the assignment it skipped is announced first, so the
+    driver's ``rides_accepted`` counts it as ``reconcile_ride_stats`` does.
+    """
+    steps = []
+    if ride.driver_id and ride.status in ('completed', 'cancelled') and old_status in (None, 'requested', 'scheduled'):
+        steps.append((old_status, 'assigned'))
+        old_status = 'assigned'
+    steps.append((old_status, ride.status))
+    return steps
+
+
+def _announce(created, transitions, changed):
+    """Counters, dashboards and status signals for rides written by bulk queries.
+
+    ``changed`` holds the updated rides and dicts of what they were before.
+    """
+    for ride in created:
+        stats.bump(ride.rider_id, rides_requested=1)
+    arrivals = [(ride, None) for ride in created if ride.status not in ('requested', 'scheduled')]
+    for ride, old_status in [*arrivals, *transitions]:
+        for old, new in _status_steps(ride, old_status):
+            ride_status_changed.send(sender=RideRequest, ride=ride, old_status=old, new_status=new)
+    dashboard.bump_for_rides([*created, *changed])
+
+
+# -- Django -> Supabase ------------------------------------------------------
+
+def _link_remote_users(profiles):
+    """Create app accounts for ``profiles`` and link them; return those linked.
+
+    Usernames the app already has are skipped, to be linked by hand.
+    """
+    alias = remote_alias()
+    accounts = {
+        profile.user.username: RemoteUser(id=uuid.uuid4(), username=profile.user.username,
+                                          password_hash=secrets.token_hex(32), role=profile.role)
+        for profile in profiles
+    }
+    RemoteUser.objects.using(alias).bulk_create(accounts.values(), ignore_conflicts=True)
+    # an account that kept another id was there before (or created concurrently by the app)
+    ids = dict(RemoteUser.objects.using(alias).filter(username__in=accounts).values_list('username', 'id'))
+    linked = []
+    for profile in profiles:
+        remote_id = accounts[profile.user.username].id
+        if ids.get(profile.user.username) != remote_id:
+            logger.warning('Not linking %s: the app already has a user with that name '
+                           '(link them with run_replication --link)', profile.user.username)
+            continue
+        profile.supabase_id = remote_id
+        linked.append(profile)
+    # only the link; updated_at keeps its value
+    Profile.objects.bulk_update(linked, ['supabase_id'])
+    return linked
+
+
+def push_profiles(profiles):
+    """Upsert Django profiles (with their users) into the app's ``users``/``profiles``; return those written."""
+    alias = remote_alias()
+    profiles = [profile for profile in profiles if not (profile.user.is_staff or profile.user.is_superuser)]
+    unlinked = [profile for profile in profiles if profile.supabase_id is None]
+    if unlinked:
+        _link_remote_users(unlinked)
+    profiles = [profile for profile in profiles if profile.supabase_id is not None]
+    remote = RemoteProfile.objects.using(alias).in_bulk([profile.supabase_id for profile in profiles])
+
+    rows, written = [], []
+    for profile in profiles:
+        current = remote.get(profile.supabase_id)
+        row = RemoteProfile(
+            id=profile.supabase_id,
+            username=profile.user.username,
+            full_name=profile.full_name,
+            phone=profile.phone,
+            role=profile.role,
+            city=profile.city,
+            is_driver_approved=profile.is_driver_approved,
+            national_id_number=profile.id_number or None,
+            id_type=profile.id_type or None,
+            updated_at=profile.updated_at,
+        )
+        if current is not None and current.updated_at >= profile.updated_at:
+            # the app's copy is newer, but approval is decided here
+            if current.is_driver_approved == profile.is_driver_approved:
+                continue
+            row, current.is_driver_approved = current, profile.is_driver_approved
+        elif current is not None and not _differs(current, row, PROFILE_PUSH_FIELDS):
+            continue
+        rows.append(row)
+        written.append(profile)
+    RemoteProfile.objects.using(alias).bulk_create(
+        rows, update_conflicts=True, unique_fields=['id'], update_fields=[*PROFILE_PUSH_FIELDS, 'updated_at'])
+    return written
+
+
+def push_rides(rides):
+    """Upsert rides from one city database into the app's ``rides``; return those written."""
+    alias = remote_alias()
+    using = rides[0]._state.db
+    people = {profile.user_id: profile for profile in Profile.objects.select_related('user').filter(
+        user__in={ride.rider_id for ride in rides} | {ride.driver_id for ride in rides if ride.driver_id})}
+    unlinked = [profile for profile in people.values() if profile.supabase_id is None]
+    if unlinked:
+        push_profiles(unlinked)
+
+    # ids are stored before the remote insert, so a retry upserts the same row
+    new = [ride for ride in rides if ride.supabase_id is None]
+    for ride in new:
+        ride.supabase_id = uuid.uuid4()
+    RideRequest.objects.using(using).bulk_update(new, ['supabase_id'])
+    remote = RemoteRide.objects.using(alias).in_bulk([ride.supabase_id for ride in rides])
+
+    rows, written = [], []
+    for ride in rides:
+        rider = people.get(ride.rider_id)
+        driver = people.get(ride.driver_id)
+        if rider is None or rider.supabase_id is None:
+            continue
+        current = remote.get(ride.supabase_id)
+        if current is not None and current.updated_at >= ride.updated_at:
+            continue
+        status = STATUS_TO_REMOTE[ride.status]
+        if current is not None and STATUS_FROM_REMOTE.get(current.status) == ride.status:
+            status = current.status
+        cancelled_at = current.cancelled_at if current is not None else None
+        row = RemoteRide(
+            id=ride.supabase_id,
+            rider_id=rider.supabase_id,
+            driver_id=driver.supabase_id if driver else None,
+            origin_address=ride.origin,
+            origin_lat=ride.origin_lat,
+            origin_lng=ride.origin_lng,
+            destination_address=ride.destination,
+            destination_lat=ride.destination_lat,
+            destination_lng=ride.destination_lng,
+            vehicle_type=TRANSPORT_TO_REMOTE.get(ride.transport_type, ride.transport_type),
+            status=status,
+            scheduled_at=ride.scheduled_at,
+            accepted_at=ride.assigned_at,
+            completed_at=ride.completed_at,
+            cancelled_at=(cancelled_at or ride.updated_at) if ride.status == 'cancelled' else None,
+            created_at=ride.requested_at,
+            updated_at=ride.updated_at,
+        )
+        if current is not None and not _differs(current, row, RIDE_PUSH_FIELDS):
+            continue
+        rows.append(row)
+        written.append(ride)
+    RemoteRide.objects.using(alias).bulk_create(
+        rows, update_conflicts=True, unique_fields=['id'], update_fields=[*RIDE_PUSH_FIELDS, 'updated_at'])
+    return written
+
+
+# -- passes ------------------------------------------------------------------
+
+def replicate(full=False, batch_size=None):
+    """Run one pass of every stream; return ``{stream name: rows written}``."""
+    alias = remote_alias()
+    written = {
+        'pull:profiles': run_stream('pull:profiles', RemoteProfile.objects.using(alias), pull_profiles,
+                                    full, batch_size),
+        'pull:rides': run_stream('pull:rides', RemoteRide.objects.using(alias), pull_rides, full, batch_size),
+        'push:profiles': run_stream('push:profiles', Profile.objects.select_related('user'), push_profiles,
+                                    full, batch_size),
+    }
+    pushed = for_each_shard(lambda using: run_stream(
+        f'push:rides:{using}', RideRequest.objects.using(using), push_rides, full, batch_size))
+    written.update((f'push:rides:{using}', count) for using, count in pushed.items())
+    return written
+
+
+def run(stop_event=None, full=False, batch_size=None):
+    """Replicate until ``stop_event`` is set, pausing ``POLL_INTERVAL`` whenever a pass finds nothing to do."""
+    stop_event = stop_event or threading.Event()
+    poll = replication_settings()['POLL_INTERVAL'].total_seconds()
+    while not stop_event.is_set():
+        try:
+            written = replicate(full=full, batch_size=batch_size)
+        except DatabaseError:
+            logger.exception('Replication pass failed; retrying')
+            written = {}
+        else:
+            full = False
+        if not any(written.values()):
+            stop_event.wait(poll)
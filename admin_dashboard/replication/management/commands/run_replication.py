@@ -0,0 +1,58 @@
+import signal
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+
+from replication.bridge import LinkError, link, replicate, run
+from replication.models import RemoteProfile, RemoteRide, RemoteUser
+from replication.routers import remote_alias
+
+
+class Command(BaseCommand):
+    help = "Replicate users, profiles and rides both ways between Django and the mobile app's Supabase database."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Run one pass and exit.')
+        parser.add_argument('--full', action='store_true',
+                            help='Re-read every row instead of starting from the saved cursors.')
+        parser.add_argument('--batch-size', type=int, help='Rows read and written per batch.')
+        parser.add_argument('--create-tables', action='store_true',
+                            help="Create the app's tables on an empty stand-in database (local Postgres "
+                                 "or SQLite) and exit.")
+        parser.add_argument('--link', nargs=2, metavar=('USERNAME', 'APP_USER_ID'),
+                            help='Link a Django user to an app user by hand (replication skips accounts '
+                                 'whose username exists on both sides) and exit.')
+
+    def handle(self, *args, **options):
+        if options['create_tables']:
+            self.create_tables()
+            return
+        if options['link']:
+            username, remote_id = options['link']
+            try:
+                link(username, remote_id)
+            except LinkError as exc:
+                raise CommandError(exc)
+            self.stdout.write(f'Linked {username} to app user {remote_id}')
+            return
+        if options['once']:
+            written = replicate(full=options['full'], batch_size=options['batch_size'])
+            for stream, count in written.items():
+                self.stdout.write(f'{stream}: {count} row(s) written')
+            return
+
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+        self.stdout.write('Replicating; press Ctrl+C to stop.')
+        run(stop, full=options['full'], batch_size=options['batch_size'])
+
+    def create_tables(self):
+        connection = connections[remote_alias()]
+        existing = set(connection.introspection.table_names())
+        with connection.schema_editor() as editor:
+            for model in (RemoteUser, RemoteProfile, RemoteRide):
+                if model._meta.db_table not in existing:
+                    editor.create_model(model)
+                    self.stdout.write(f'Created {model._meta.db_table}')
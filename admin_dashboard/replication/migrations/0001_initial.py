@@ -0,0 +1,84 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:49
+
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RemoteProfile',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('username', models.TextField(unique=True)),
+                ('full_name', models.TextField(null=True)),
+                ('phone', models.TextField(null=True)),
+                ('role', models.TextField()),
+                ('city', models.TextField(null=True)),
+                ('is_driver_approved', models.BooleanField(default=False)),
+                ('national_id_number', models.TextField(null=True)),
+                ('id_type', models.TextField(null=True)),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'profiles',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RemoteRide',
+            fields=[
+                ('id', models.UUIDField(primary_key=True, serialize=False)),
+                ('rider_id', models.UUIDField()),
+                ('driver_id', models.UUIDField(null=True)),
+                ('origin_address', models.TextField(null=True)),
+                ('origin_lat', models.FloatField(null=True)),
+                ('origin_lng', models.FloatField(null=True)),
+                ('destination_address', models.TextField(null=True)),
+                ('destination_lat', models.FloatField(null=True)),
+                ('destination_lng', models.FloatField(null=True)),
+                ('vehicle_type', models.TextField(null=True)),
+                ('status', models.TextField()),
+                ('scheduled_at', models.DateTimeField(null=True)),
+                ('accepted_at', models.DateTimeField(null=True)),
+                ('completed_at', models.DateTimeField(null=True)),
+                ('cancelled_at', models.DateTimeField(null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+            ],
+            options={
+                'db_table': 'rides',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RemoteUser',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, primary_key=True, serialize=False)),
+                ('username', models.TextField(unique=True)),
+                ('password_hash', models.TextField()),
+                ('role', models.TextField()),
+            ],
+            options={
+                'db_table': 'users',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='ReplicationCursor',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=64, unique=True)),
+                ('position', models.DateTimeField(blank=True, null=True)),
+                ('applied', models.PositiveBigIntegerField(default=0)),
+                ('lag_seconds', models.FloatField(blank=True, null=True)),
+                ('last_run', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
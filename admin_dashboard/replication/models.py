@@ -0,0 +1,80 @@
+import uuid
+
+from django.db import models
+
+
+class ReplicationCursor(models.Model):
+    """How far one replication stream has read its source (see ``replication.bridge``).
+
+    ``position`` is the ``updated_at`` of the newest row read; ``lag_seconds``
+    is how long the slowest change applied by the latest pass waited between
+    being written and being replicated (0 when there was nothing to apply).
+    """
+    name = models.CharField(max_length=64, unique=True)
+    position = models.DateTimeField(null=True, blank=True)
+    applied = models.PositiveBigIntegerField(default=0)
+    lag_seconds = models.FloatField(null=True, blank=True)
+    last_run = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return self.name
+
+
+# The mobile app's Supabase tables, on the REPLICATION['DATABASE'] alias
+# (see replication.routers). Only the columns the bridge replicates are
+# declared; `run_replication --create-tables` creates them on a local stand-in.
+
+class RemoteUser(models.Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4)
+    username = models.TextField(unique=True)
+    # compared in plain text by the app's custom sign-in
+    password_hash = models.TextField()
+    role = models.TextField()
+
+    class Meta:
+        managed = False
+        db_table = 'users'
+
+
+class RemoteProfile(models.Model):
+    # same id as the user's row in ``users``
+    id = models.UUIDField(primary_key=True)
+    username = models.TextField(unique=True)
+    full_name = models.TextField(null=True)
+    phone = models.TextField(null=True)
+    role = models.TextField()
+    city = models.TextField(null=True)
+    is_driver_approved = models.BooleanField(default=False)
+    national_id_number = models.TextField(null=True)
+    id_type = models.TextField(null=True)
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'profiles'
+        indexes = [models.Index(fields=['updated_at', 'id'], name='profiles_updated_idx')]
+
+
+class RemoteRide(models.Model):
+    id = models.UUIDField(primary_key=True)
+    rider_id = models.UUIDField()
+    driver_id = models.UUIDField(null=True)
+    origin_address = models.TextField(null=True)
+    origin_lat = models.FloatField(null=True)
+    origin_lng = models.FloatField(null=True)
+    destination_address = models.TextField(null=True)
+    destination_lat = models.FloatField(null=True)
+    destination_lng = models.FloatField(null=True)
+    vehicle_type = models.TextField(null=True)
+    status = models.TextField()
+    scheduled_at = models.DateTimeField(null=True)
+    accepted_at = models.DateTimeField(null=True)
+    completed_at = models.DateTimeField(null=True)
+    cancelled_at = models.DateTimeField(null=True)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+
+    class Meta:
+        managed = False
+        db_table = 'rides'
+        indexes = [models.Index(fields=['updated_at', 'id'], name='rides_updated_idx')]
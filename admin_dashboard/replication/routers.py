@@ -0,0 +1,28 @@
+from django.conf import settings
+
+REMOTE_MODELS = {'replication.remoteuser', 'replication.remoteprofile', 'replication.remoteride'}
+
+
+def remote_alias():
+    """Database alias of the mobile app's Supabase Postgres (or its stand-in)."""
+    return getattr(settings, 'REPLICATION', {}).get('DATABASE', 'supabase')
+
+
+class SupabaseRouter:
+    """Send the Supabase tables (``replication.models.Remote*``) to their database, and nothing else there.
+
+    Listed before ``core.routers.CityRouter``; answers None for every other model.
+    """
+
+    def db_for_read(self, model, **hints):
+        if model._meta.label_lower in REMOTE_MODELS:
+            return remote_alias()
+        return None
+
+    db_for_write = db_for_read
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # the app's schema is its own; Django never migrates that database
+        if db == remote_alias():
+            return False
+        return None
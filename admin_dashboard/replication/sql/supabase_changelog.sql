@@ -0,0 +1,42 @@
+-- ============================================================================
+-- WiYone Cab: change log for replication with the Django backend
+-- ============================================================================
+-- Run once in Supabase Studio > SQL Editor before starting
+-- `python manage.py run_replication`. Safe to re-run.
+--
+-- The replicator reads rows changed since its cursor by updated_at, so every
+-- write must move updated_at forward. The trigger stamps now() unless the
+-- writer set updated_at itself (the replicator does, to keep Django's
+-- timestamp and avoid copying a row back).
+-- ============================================================================
+
+ALTER TABLE public.profiles ADD COLUMN IF NOT EXISTS city text;
+ALTER TABLE public.profiles ADD COLUMN IF NOT EXISTS is_driver_approved boolean NOT NULL DEFAULT false;
+ALTER TABLE public.profiles ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+
+ALTER TABLE public.rides ADD COLUMN IF NOT EXISTS accepted_at timestamptz;
+ALTER TABLE public.rides ADD COLUMN IF NOT EXISTS completed_at timestamptz;
+ALTER TABLE public.rides ADD COLUMN IF NOT EXISTS cancelled_at timestamptz;
+ALTER TABLE public.rides ADD COLUMN IF NOT EXISTS updated_at timestamptz NOT NULL DEFAULT now();
+
+-- inserts take the column default unless the writer supplies updated_at
+CREATE OR REPLACE FUNCTION public.stamp_updated_at_on_update() RETURNS trigger AS $$
+BEGIN
+  IF NEW.updated_at IS NOT DISTINCT FROM OLD.updated_at THEN
+    NEW.updated_at = now();
+  END IF;
+  RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS profiles_stamp_updated_at ON public.profiles;
+CREATE TRIGGER profiles_stamp_updated_at BEFORE UPDATE ON public.profiles
+  FOR EACH ROW EXECUTE FUNCTION public.stamp_updated_at_on_update();
+
+DROP TRIGGER IF EXISTS rides_stamp_updated_at ON public.rides;
+CREATE TRIGGER rides_stamp_updated_at BEFORE UPDATE ON public.rides
+  FOR EACH ROW EXECUTE FUNCTION public.stamp_updated_at_on_update();
+
+-- the replicator's cursor scans
+CREATE INDEX IF NOT EXISTS profiles_updated_idx ON public.profiles (updated_at, id);
+CREATE INDEX IF NOT EXISTS rides_updated_idx ON public.rides (updated_at, id);
@@ -0,0 +1,150 @@
+import uuid
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from django.test import TransactionTestCase
+from django.utils import timezone
+
+from accounts.models import Profile
+from rides.dashboard import fragment_versions, user_scope
+from rides.models import RideRequest, RideStats
+from rides.stats import reconcile
+from .bridge import LinkError, link, replicate
+from .models import RemoteProfile, RemoteRide, RemoteUser
+from .routers import remote_alias
+
+REMOTE_MODELS = (RemoteUser, RemoteProfile, RemoteRide)
+
+
+@skipUnless(remote_alias() in settings.DATABASES, 'needs a supabase database (admin_dashboard.settings_test)')
+class ReplicationTests(TransactionTestCase):
+    databases = '__all__'
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        # Django never migrates the app's database (see replication.routers)
+        with connections[remote_alias()].schema_editor() as editor:
+            for model in REMOTE_MODELS:
+                editor.create_model(model)
+
+    @classmethod
+    def tearDownClass(cls):
+        with connections[remote_alias()].schema_editor() as editor:
+            for model in REMOTE_MODELS:
+                editor.delete_model(model)
+        super().tearDownClass()
+
+    def tearDown(self):
+        # the test runner only flushes tables Django migrates
+        for model in REMOTE_MODELS:
+            model.objects.using(remote_alias()).all().delete()
+
+    def remote_account(self, username, updated_at, **profile):
+        user = RemoteUser.objects.using(remote_alias()).create(username=username, password_hash='pw',
+                                                               role=profile.get('role', 'rider'))
+        RemoteProfile.objects.using(remote_alias()).create(id=user.id, username=username, updated_at=updated_at,
+                                                           **{'role': 'rider', **profile})
+        return user
+
+    def test_pull_then_push_does_not_echo(self):
+        then = timezone.now() - timedelta(seconds=2)
+        rider = self.remote_account('app_rider', then, full_name='App Rider', city='Bo')
+        RemoteRide.objects.using(remote_alias()).create(
+            id=uuid.uuid4(), rider_id=rider.id, origin_address='Bo Market', destination_address='Njala',
+            vehicle_type='okada', status='pending', created_at=then, updated_at=then)
+
+        first = replicate()
+        self.assertEqual((first['pull:profiles'], first['pull:rides']), (1, 1))
+        self.assertEqual({name: count for name, count in first.items() if name.startswith('push:')},
+                         {name: 0 for name in first if name.startswith('push:')})
+        self.assertEqual(set(replicate().values()), {0})
+
+        profile = Profile.objects.get(supabase_id=rider.id)
+        self.assertEqual((profile.user.username, profile.full_name), ('app_rider', 'App Rider'))
+        ride = RideRequest.objects.using('city_bo' if 'city_bo' in settings.DATABASES else 'default').get()
+        self.assertEqual((ride.rider_id, ride.status, ride.transport_type), (profile.user_id, 'requested', 'bike'))
+        # nothing was written back to the app
+        self.assertEqual(RemoteUser.objects.using(remote_alias()).count(), 1)
+        self.assertEqual(RemoteProfile.objects.using(remote_alias()).get().updated_at, then)
+        self.assertEqual(RemoteRide.objects.using(remote_alias()).get().updated_at, then)
+
+    def test_username_collision_does_not_link(self):
+        local = User.objects.create_user('amara', password='x')
+        local.profile.full_name = 'Amara on Django'
+        local.profile.save()
+        remote = self.remote_account('amara', timezone.now() + timedelta(minutes=1), full_name='Amara on the app',
+                                     role='driver', is_driver_approved=True)
+
+        with self.assertLogs('replication.bridge', 'WARNING'):
+            replicate()
+
+        profile = Profile.objects.get(user=local)
+        self.assertIsNone(profile.supabase_id)
+        self.assertEqual((profile.full_name, profile.role, profile.is_driver_approved),
+                         ('Amara on Django', 'rider', False))
+        self.assertEqual(User.objects.filter(username='amara').count(), 1)
+        self.assertEqual(RemoteProfile.objects.using(remote_alias()).get().full_name, 'Amara on the app')
+        self.assertEqual(list(RemoteUser.objects.using(remote_alias()).values_list('id', flat=True)), [remote.id])
+
+    def test_staff_are_neither_linked_nor_pushed(self):
+        User.objects.create_superuser('root', 'root@example.com', 'x')
+        remote = self.remote_account('boss', timezone.now())
+        User.objects.create_user('boss', password='x', is_staff=True)
+
+        with self.assertLogs('replication.bridge', 'WARNING'):
+            replicate()
+
+        self.assertEqual(list(RemoteUser.objects.using(remote_alias()).values_list('username', flat=True)), ['boss'])
+        self.assertFalse(Profile.objects.filter(supabase_id__isnull=False).exists())
+        with self.assertRaisesMessage(LinkError, 'staff'):
+            link('boss', remote.id)
+
+    def test_manual_link_pulls_app_profile(self):
+        local = User.objects.create_user('amara', password='x')
+        remote = self.remote_account('amara', timezone.now() + timedelta(minutes=1), full_name='Amara on the app',
+                                     role='driver', is_driver_approved=True)
+
+        link('amara', remote.id)
+
+        profile = Profile.objects.get(user=local)
+        self.assertEqual((profile.supabase_id, profile.full_name, profile.role, profile.is_driver_approved),
+                         (remote.id, 'Amara on the app', 'driver', True))
+        with self.assertRaisesMessage(LinkError, 'already linked'):
+            link('amara', remote.id)
+
+    def test_pulled_rides_keep_counters_in_line_with_reconcile(self):
+        then = timezone.now() - timedelta(seconds=2)
+        rider = self.remote_account('app_rider', then)
+        driver = self.remote_account('app_driver', then, role='driver', is_driver_approved=True)
+        rides = RemoteRide.objects.using(remote_alias())
+        # arrives already completed, and goes from pending to completed between two passes
+        rides.create(id=uuid.uuid4(), rider_id=rider.id, driver_id=driver.id, origin_address='A',
+                     destination_address='B', status='completed', created_at=then, updated_at=then)
+        pending = rides.create(id=uuid.uuid4(), rider_id=rider.id, origin_address='C', destination_address='D',
+                               status='pending', created_at=then, updated_at=then)
+        replicate()
+        rides.filter(pk=pending.id).update(status='completed', driver_id=driver.id, updated_at=timezone.now())
+        replicate()
+
+        stats = RideStats.objects.get(user__username='app_driver')
+        self.assertEqual((stats.rides_accepted, stats.rides_driven), (2, 2))
+        self.assertEqual(reconcile(), (2, 0))
+
+    def test_pulled_edits_refresh_dashboards(self):
+        then = timezone.now() - timedelta(seconds=2)
+        rider = self.remote_account('app_rider', then)
+        ride = RemoteRide.objects.using(remote_alias()).create(
+            id=uuid.uuid4(), rider_id=rider.id, origin_address='A', destination_address='B', status='pending',
+            created_at=then, updated_at=then)
+        replicate()
+        scope = user_scope(Profile.objects.get(supabase_id=rider.id).user_id)
+        version = fragment_versions(scope)
+
+        RemoteRide.objects.using(remote_alias()).filter(pk=ride.id).update(
+            destination_address='Kpayama', updated_at=timezone.now())
+        replicate()
+        self.assertNotEqual(fragment_versions(scope), version)
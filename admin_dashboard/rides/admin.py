@@ -1,5 +1,43 @@
+from urllib.parse import urlencode
+
 from django.contrib import admin
-from .models import Vehicle, RideRequest
+from django.contrib.admin.views.main import SEARCH_VAR
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+from django.urls import reverse
+from django.utils.html import format_html
+from core.bulk import run_bulk_action
+from core.paginator import EstimatedCountPaginator
+from search import fts
+from .lifecycle import complete_rides
+from .models import Vehicle, RideRequest, ArchivedRide
+
+# cap on full-text matches merged into an admin search
+ADMIN_FTS_LIMIT = 1000
+
+
+def prefix_search(queryset, search_term):
+    """Match the whole term as a prefix of rider/driver username, origin or destination.
+
+    Usernames are matched on the default database and passed as an ``IN``
+    list (rides may live on a city database), so each branch of the OR can
+    use its own index and no DISTINCT is needed. Words anywhere in
+    origin/destination are found through the full-text index of live or
+    archived rides, whichever ``queryset`` holds.
+    """
+    term = search_term.strip()
+    if not term:
+        return queryset
+    users = list(get_user_model().objects.filter(username__istartswith=term)
+                 .values_list('pk', flat=True)[:ADMIN_FTS_LIMIT])
+    kind = 'archived_rides' if queryset.model is ArchivedRide else 'rides'
+    text_hits = [pk for pk, _ in fts.search(kind, term, limit=ADMIN_FTS_LIMIT, using=queryset.db)]
+    return queryset.filter(
+        Q(rider__in=users) | Q(driver__in=users)
+        | Q(origin__istartswith=term) | Q(destination__istartswith=term)
+        | Q(pk__in=text_hits)
+    )
+
 
 @admin.register(Vehicle)
 class VehicleAdmin(admin.ModelAdmin):
@@ -8,16 +46,68 @@ class VehicleAdmin(admin.ModelAdmin):
 
 @admin.register(RideRequest)
 class RideRequestAdmin(admin.ModelAdmin):
-    list_display = ('rider', 'driver', 'origin', 'destination', 'status', 'requested_at', 'completed_at')
-    search_fields = ('rider__username', 'driver__username', 'origin', 'destination')
-    list_filter = ('status',)
+    """Rides of the city being administered (switch on the admin index; see ``core.cities``)."""
+    list_display = ('rider', 'driver', 'origin', 'destination', 'city', 'status', 'requested_at', 'completed_at')
+    # users live on the default database: prefetched in get_queryset, never joined
+    list_select_related = ()
+    # prefix/full-text searches backed by indexes; see prefix_search()
+    search_fields = ('^rider__username', '^driver__username', '^origin', '^destination')
+    list_filter = ('status', 'city')
+    date_hierarchy = 'requested_at'
     readonly_fields = ('requested_at', 'assigned_at', 'completed_at')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
     actions = ['mark_completed']
 
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('rider', 'driver')
+
+    def get_search_results(self, request, queryset, search_term):
+        return prefix_search(queryset, search_term), False
+
+    def changelist_view(self, request, extra_context=None):
+        response = super().changelist_view(request, extra_context)
+        term = request.GET.get(SEARCH_VAR, '').strip()
+        if term:
+            # archived rides have their own changelist; searches here point to their matches
+            archived = prefix_search(ArchivedRide.objects.all(), term).count()
+            if archived:
+                url = f"{reverse('admin:rides_archivedride_changelist')}?{urlencode({SEARCH_VAR: term})}"
+                self.message_user(request, format_html(
+                    '{} archived ride(s) also match this search: <a href="{}">show them</a>.', archived, url))
+        return response
+
     def mark_completed(self, request, queryset):
-        """Admin action to mark selected rides as completed."""
-        from django.utils import timezone
-        updated = queryset.update(status='completed', completed_at=timezone.now())
-        self.message_user(request, f"Marked {updated} ride(s) as completed.")
+        """Admin action to mark selected rides as completed.
+
+        Applies the same state checks and admin notification as the API's
+        ``complete`` action, in chunked transactions.
+        """
+        run_bulk_action(self, request, queryset,
+                        RideRequest.objects.prefetch_related('rider', 'driver__profile'),
+                        complete_rides, 'completed')
     mark_completed.short_description = 'Mark selected rides as completed'
+
+
+@admin.register(ArchivedRide)
+class ArchivedRideAdmin(admin.ModelAdmin):
+    """Read-only view of rides moved out of the live table by ``archive_rides``."""
+    list_display = ('id', 'rider', 'driver', 'origin', 'destination', 'city', 'status', 'requested_at', 'completed_at')
+    search_fields = ('^rider__username', '^driver__username', '^origin', '^destination')
+    list_filter = ('status', 'city')
+    list_select_related = ()
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('rider', 'driver')
+
+    def get_search_results(self, request, queryset, search_term):
+        return prefix_search(queryset, search_term), False
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class RidesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'rides'
+
+    def ready(self):
+        # connect the per-user ride counters, dashboard cache invalidation and
+        # the cleanup of deleted users' rides on the city databases
+        from . import cleanup, dashboard, stats  # noqa: F401
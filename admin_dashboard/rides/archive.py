@@ -0,0 +1,124 @@
+"""Move finished rides out of the live RideRequest table.
+
+Rides completed (or cancelled) more than ``RIDE_ARCHIVE_AFTER_DAYS`` ago are
+copied into :class:`rides.models.ArchivedRide` and deleted from the live
+table in batched transactions, so the hot table and its indexes only carry
+the working set plus a bounded tail of recent history. Each city database
+archives into its own ``ArchivedRide`` table.
+
+:func:`ride_history` reads both tables for a user, newest first, and
+:func:`history_rides` / :func:`find_archived` hand archived rides to code
+written for live ones (the ride API, dashboards) as :func:`as_ride` instances.
+"""
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import BooleanField, Q, Value, prefetch_related_objects
+from django.utils import timezone
+
+from core.cities import for_each_shard
+from .dashboard import bump_for_rides
+from .models import ArchivedRide, RideRequest
+
+logger = logging.getLogger(__name__)
+
+# columns shared by RideRequest and ArchivedRide
+HISTORY_FIELDS = (
+    'id', 'rider_id', 'driver_id', 'origin', 'destination', 'status', 'transport_type',
+    'requested_at', 'assigned_at', 'completed_at', 'scheduled_at', 'city', 'supabase_id',
+)
+
+
+def archivable(cutoff):
+    """Live rides that finished before ``cutoff``."""
+    return RideRequest.objects.filter(
+        Q(status='completed', completed_at__lt=cutoff)
+        | Q(status='cancelled', requested_at__lt=cutoff)
+    )
+
+
+def archive_rides(days=None, batch_size=1000, now=None):
+    """Archive finished rides older than ``days``; return the number moved."""
+    if days is None:
+        days = getattr(settings, 'RIDE_ARCHIVE_AFTER_DAYS', 30)
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    moved = sum(for_each_shard(lambda using: _archive_shard(using, cutoff, batch_size)).values())
+    if moved:
+        logger.info('Archived %d ride(s) finished before %s', moved, cutoff)
+    return moved
+
+
+def _archive_shard(using, cutoff, batch_size):
+    moved = 0
+    while True:
+        pks = list(archivable(cutoff).using(using).order_by('pk').values_list('pk', flat=True)[:batch_size])
+        if not pks:
+            break
+        moved += _archive_batch(pks, using)
+        if len(pks) < batch_size:
+            break
+    return moved
+
+
+def _archive_batch(pks, using):
+    with transaction.atomic(using=using):
+        rows = list(RideRequest.objects.using(using).select_for_update().filter(pk__in=pks).values(*HISTORY_FIELDS))
+        # ignore_conflicts keeps a re-run idempotent if a row was copied but not deleted
+        ArchivedRide.objects.using(using).bulk_create([ArchivedRide(**row) for row in rows], ignore_conflicts=True)
+        RideRequest.objects.using(using).filter(pk__in=[row['id'] for row in rows]).delete()
+        # queryset deletes send no per-row signals; drop the dashboard fragments explicitly
+        transaction.on_commit(lambda: bump_for_rides(rows), using=using)
+    return len(rows)
+
+
+def ride_history(user):
+    """All rides where ``user`` is rider or driver, live and archived, newest first.
+
+    Returns a values() union queryset (dicts with ``HISTORY_FIELDS`` plus
+    ``archived``), which supports count() and slicing for pagination.
+    """
+    who = Q(rider=user) | Q(driver=user)
+    live = (RideRequest.objects.filter(who)
+            .annotate(archived=Value(False, output_field=BooleanField()))
+            .values(*HISTORY_FIELDS, 'archived'))
+    archived = (ArchivedRide.objects.filter(who)
+                .annotate(archived=Value(True, output_field=BooleanField()))
+                .values(*HISTORY_FIELDS, 'archived'))
+    return live.union(archived, all=True).order_by('-requested_at', '-id')
+
+
+def as_ride(row):
+    """An unsaved RideRequest holding the ``HISTORY_FIELDS`` of ``row`` (a ``ride_history`` dict or ArchivedRide).
+
+    Fields only live rides have (coordinates, estimates) are None;
+    ``archived`` tells the two apart. Never save it.
+    """
+    if not isinstance(row, dict):
+        row = {field: getattr(row, field) for field in HISTORY_FIELDS}
+    ride = RideRequest(**{field: row[field] for field in HISTORY_FIELDS})
+    ride.archived = row.get('archived', True)
+    return ride
+
+
+def find_archived(pk):
+    """The archived ride ``pk`` (on the current city's database) as an :func:`as_ride` instance, or None."""
+    try:
+        ride = ArchivedRide.objects.filter(pk=pk).first()
+    except (TypeError, ValueError):
+        return None
+    return None if ride is None else as_ride(ride)
+
+
+def history_rides(user, limit):
+    """The first ``limit`` rides of :func:`ride_history`, as instances with the drivers' profiles prefetched.
+
+    Live rides are loaded as themselves, archived ones through :func:`as_ride`.
+    """
+    rows = list(ride_history(user)[:limit])
+    live = RideRequest.objects.in_bulk([row['id'] for row in rows if not row['archived']])
+    # a ride archived since the union ran is served from its row
+    rides = [live.get(row['id']) or as_ride(row) for row in rows]
+    prefetch_related_objects(rides, 'driver__profile')
+    return rides
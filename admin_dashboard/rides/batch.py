@@ -0,0 +1,184 @@
+"""Batched ride operations for offline-first clients.
+
+``POST /api/rides/batch/`` takes::
+
+    {"operations": [
+        {"key": "c1", "op": "create", "data": {"origin": "...", "destination": "..."}},
+        {"key": "c2", "op": "cancel", "ride": "@c1"},
+        {"key": "c3", "op": "accept", "ride": 42},
+    ]}
+
+and answers ``{"results": [{"key", "op", "status", "ride", "data", "replayed"}, ...]}``
+in the same order. ``op`` is one of create, cancel, accept and complete;
+``ride`` is a ride id, or ``"@<key>"`` for the ride of an earlier operation
+(in this batch or a previous one).
+
+Each operation runs in its own savepoint together with the insert of its
+``IdempotencyKey`` row, so an operation either took effect and is recorded,
+or neither. Keys already recorded for the user are replayed from the index
+without running again; a concurrent retry of the same key loses on the
+unique constraint, is rolled back and replays the winner's result. Keys
+are stored next to the user's rides on their city database.
+"""
+from django.conf import settings
+from django.db import IntegrityError, router, transaction
+from django.utils import timezone
+
+from core.cities import for_each_shard
+
+from .lifecycle import RideActionError, accept_ride, cancel_ride, complete_ride
+from .models import IdempotencyKey, RideRequest
+
+MAX_OPERATIONS = 50
+KEY_MAX_LENGTH = 64
+
+ACTIONS = {
+    'accept': accept_ride,
+    'cancel': cancel_ride,
+    'complete': complete_ride,
+}
+OPS = ('create',) + tuple(ACTIONS)
+
+
+class BatchError(Exception):
+    """The batch as a whole is malformed; nothing was applied."""
+
+
+class OperationError(Exception):
+
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def _validate(operations):
+    if not isinstance(operations, list) or not operations:
+        raise BatchError('operations must be a non-empty list.')
+    if len(operations) > MAX_OPERATIONS:
+        raise BatchError(f'At most {MAX_OPERATIONS} operations per batch.')
+    keys = set()
+    for i, operation in enumerate(operations):
+        if not isinstance(operation, dict):
+            raise BatchError(f'operations[{i}] must be an object.')
+        key, op = operation.get('key'), operation.get('op')
+        if not isinstance(key, str) or not 0 < len(key) <= KEY_MAX_LENGTH:
+            raise BatchError(f'operations[{i}].key must be a string of 1-{KEY_MAX_LENGTH} characters.')
+        if key in keys:
+            raise BatchError(f'Duplicate key {key!r} in batch.')
+        keys.add(key)
+        if op not in OPS:
+            raise BatchError(f'operations[{i}].op must be one of {", ".join(OPS)}.')
+        if not isinstance(operation.get('data') or {}, dict):
+            raise BatchError(f'operations[{i}].data must be an object.')
+
+
+def _result(record, replayed):
+    return {
+        'key': record.key,
+        'op': record.op,
+        'status': record.status_code,
+        'ride': record.ride_id,
+        'data': record.response,
+        'replayed': replayed,
+    }
+
+
+def _resolve_ride(user, ref, ride_for_key):
+    if isinstance(ref, str) and ref.startswith('@'):
+        ride_id = ride_for_key.get(ref[1:])
+        if ride_id is None:
+            raise OperationError(f'No ride was created under key {ref[1:]!r}.', 404)
+    else:
+        try:
+            ride_id = int(ref)
+        except (TypeError, ValueError):
+            raise OperationError('ride must be a ride id or "@<key>".')
+    try:
+        return RideRequest.objects.select_for_update().get(pk=ride_id)
+    except RideRequest.DoesNotExist:
+        raise OperationError('Ride not found.', 404)
+
+
+def _run(user, operation, ride_for_key, context):
+    """Perform one operation; return ``(status, data, ride)``."""
+    from .serializers import RideCreateSerializer
+
+    op = operation['op']
+    if op == 'create':
+        serializer = RideCreateSerializer(data=operation.get('data') or {}, context=context)
+        if not serializer.is_valid():
+            raise OperationError(serializer.errors)
+        ride = serializer.save(rider=user)
+        return 201, serializer.data, ride
+
+    ride = _resolve_ride(user, operation.get('ride'), ride_for_key)
+    try:
+        ACTIONS[op](ride, user)
+    except RideActionError as exc:
+        raise OperationError(exc.detail, exc.status)
+    return 200, {'id': ride.pk, 'status': ride.status}, ride
+
+
+def apply_operations(user, operations, context=None):
+    """Apply ``operations`` in order for ``user``; return one result dict per operation."""
+    _validate(operations)
+    keys = [operation['key'] for operation in operations]
+    recorded = {r.key: r for r in IdempotencyKey.objects.filter(user=user, key__in=keys)}
+    # "@key" references may point at creates from earlier batches
+    refs = {o['ride'][1:] for o in operations if isinstance(o.get('ride'), str) and o['ride'].startswith('@')}
+    ride_for_key = dict(
+        IdempotencyKey.objects.filter(user=user, key__in=refs - set(keys), op='create', ride__isnull=False)
+        .values_list('key', 'ride_id')
+    )
+    ride_for_key.update({k: r.ride_id for k, r in recorded.items() if r.op == 'create' and r.ride_id})
+
+    results = []
+    for operation in operations:
+        key = operation['key']
+        record = recorded.get(key)
+        if record is None:
+            record, replayed = _apply_one(user, operation, ride_for_key, context)
+        else:
+            replayed = True
+        if record.op == 'create' and record.ride_id:
+            ride_for_key[key] = record.ride_id
+        results.append(_result(record, replayed))
+    return results
+
+
+class _KeyTaken(Exception):
+    pass
+
+
+def _apply_one(user, operation, ride_for_key, context):
+    using = router.db_for_write(IdempotencyKey)
+    try:
+        with transaction.atomic(using=using):
+            try:
+                with transaction.atomic(using=using):
+                    status, data, ride = _run(user, operation, ride_for_key, context)
+            except OperationError as exc:
+                # refusals are recorded too, so a retry gets the same answer
+                status, data, ride = exc.status, {'detail': exc.detail}, None
+            record = IdempotencyKey(user=user, key=operation['key'], op=operation['op'],
+                                    status_code=status, response=data, ride=ride)
+            try:
+                with transaction.atomic(using=using):
+                    record.save()
+            except IntegrityError:
+                raise _KeyTaken
+    except _KeyTaken:
+        # a concurrent request applied this key first; its effect stands and ours was rolled back
+        return IdempotencyKey.objects.get(user=user, key=operation['key']), True
+    return record, False
+
+
+def prune_keys(now=None):
+    """Delete keys older than ``IDEMPOTENCY_KEY_TTL``; return how many were removed."""
+    cutoff = (now or timezone.now()) - settings.IDEMPOTENCY_KEY_TTL
+
+    def prune(using):
+        deleted, _ = IdempotencyKey.objects.using(using).filter(created__lt=cutoff).delete()
+        return deleted
+    return sum(for_each_shard(prune).values())
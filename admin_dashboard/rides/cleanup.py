@@ -0,0 +1,38 @@
+"""Carry user deletions over to the city databases.
+
+Users live on ``default`` and rides on their city's database
+(``core.cities``), so the cascade Django runs when a user is deleted only
+reaches rides stored on ``default``. Once the deletion commits,
+:func:`delete_user_rides` applies the same ``on_delete`` rules on every
+other city database: the user's rides, archived rides and idempotency keys
+are deleted, and rides they drove lose their driver.
+"""
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.cities import for_each_shard
+from .models import ArchivedRide, IdempotencyKey, RideRequest
+
+
+def purge_user(user_id, using):
+    """Apply the rider/driver ``on_delete`` rules for a deleted user on database ``using``."""
+    with transaction.atomic(using=using):
+        RideRequest.objects.using(using).filter(rider_id=user_id).delete()
+        RideRequest.objects.using(using).filter(driver_id=user_id).update(driver=None, updated_at=timezone.now())
+        ArchivedRide.objects.using(using).filter(rider_id=user_id).delete()
+        ArchivedRide.objects.using(using).filter(driver_id=user_id).update(driver=None)
+        IdempotencyKey.objects.using(using).filter(user_id=user_id).delete()
+
+
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def delete_user_rides(sender, instance, using, **kwargs):
+    user_id = instance.pk
+
+    def purge_shards():
+        # Django's own cascade already covered the database the user was deleted from
+        for_each_shard(lambda alias: alias != using and purge_user(user_id, alias))
+
+    transaction.on_commit(purge_shards, using=using)
@@ -0,0 +1,133 @@
+"""Cached rider/driver dashboard fragments.
+
+The ride lists on the dashboards are rendered inside ``{% cache %}`` blocks
+keyed by a *version* per scope: one per user (``user:<id>``) for their own
+rides and one per city (``available:<city>``) for its open-request pool. Any ride
+change bumps the versions it affects once the transaction commits, so a
+cached fragment is never served for data it does not show; ``FRAGMENT_TTL``
+only bounds staleness of details that are not tracked (driver names shown
+to riders, admin deletes).
+
+The initial lists are capped at ``INITIAL_RIDES``; older rides, archived
+ones included, are fetched page by page from the history API by the
+dashboard's "Load more" button.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils.functional import SimpleLazyObject
+
+from core.cities import current_city
+from .models import RideRequest, RideStats
+from .signals import ride_status_changed
+
+DEFAULTS = {
+    'FRAGMENT_TTL': 300,
+    'INITIAL_RIDES': 20,
+}
+
+def dashboard_settings():
+    return {**DEFAULTS, **getattr(settings, 'DASHBOARD', {})}
+
+
+def user_scope(user_id):
+    return f'user:{user_id}'
+
+
+def available_scope(city):
+    return f'available:{city}'
+
+
+def _key(scope):
+    return f'dashboard:version:{scope}'
+
+
+def fragment_versions(*scopes):
+    """Current version of each scope, in order, creating any that are missing."""
+    keys = [_key(scope) for scope in scopes]
+    found = cache.get_many(keys)
+    missing = {key: time.time_ns() for key in keys if key not in found}
+    if missing:
+        for key, value in missing.items():
+            cache.add(key, value, timeout=None)
+        found.update(cache.get_many(list(missing)))
+    return [found.get(key, missing.get(key)) for key in keys]
+
+
+def bump(*scopes):
+    """Invalidate every cached fragment of ``scopes``."""
+    now = time.time_ns()
+    cache.set_many({_key(scope): now for scope in scopes}, timeout=None)
+
+
+def bump_for_rides(rides):
+    """Invalidate the fragments showing any of ``rides`` (instances or value dicts)."""
+    scopes = set()
+    for ride in rides:
+        if not isinstance(ride, dict):
+            ride = {'rider_id': ride.rider_id, 'driver_id': ride.driver_id, 'city': ride.city}
+        rider_id, driver_id = ride['rider_id'], ride['driver_id']
+        scopes.add(available_scope(ride['city']))
+        scopes.add(user_scope(rider_id))
+        if driver_id is not None:
+            scopes.add(user_scope(driver_id))
+    bump(*scopes)
+
+
+@receiver(post_save, sender=RideRequest)
+def ride_saved(sender, instance, **kwargs):
+    transaction.on_commit(lambda: bump_for_rides([instance]), using=instance._state.db)
+
+
+@receiver(ride_status_changed)
+def ride_changed(sender, ride, **kwargs):
+    # already sent after commit
+    bump_for_rides([ride])
+
+
+def _context(user, scopes, **extra):
+    config = dashboard_settings()
+    versions = fragment_versions(*scopes)
+    context = {
+        'stats': RideStats.objects.filter(user=user).first(),
+        'fragment_ttl': config['FRAGMENT_TTL'],
+        'initial_rides': config['INITIAL_RIDES'],
+    }
+    context.update(extra)
+    return context, versions
+
+
+def rider_context(user, **extra):
+    """Template context for ``core/rider_dashboard.html``.
+
+    ``rides`` is the first page of the user's history, live and archived,
+    which "Load more" continues from the history API. It is lazy: on a
+    fragment cache hit it is never run.
+    """
+    from .archive import history_rides
+    context, (version,) = _context(user, [user_scope(user.pk)], **extra)
+    limit = context['initial_rides']
+    context['rides_version'] = version
+    context['rides'] = SimpleLazyObject(lambda: history_rides(user, limit))
+    return context
+
+
+def driver_context(user, **extra):
+    """Template context for ``core/driver_dashboard.html``; available rides are the driver's city's."""
+    from .archive import history_rides
+    city = current_city()
+    context, (assigned_version, available_version) = _context(
+        user, [user_scope(user.pk), available_scope(city)], **extra)
+    limit = context['initial_rides']
+    context['assigned_version'] = assigned_version
+    context['available_version'] = available_version
+    context['city'] = city
+    # first page of the history, as on the rider dashboard
+    context['assigned'] = SimpleLazyObject(lambda: history_rides(user, limit))
+    context['available'] = (RideRequest.objects.filter(city=city, driver__isnull=True, status='requested')
+                            .order_by('requested_at', 'id')[:limit])
+    return context
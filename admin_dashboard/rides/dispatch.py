@@ -0,0 +1,163 @@
+"""Release scheduled rides into the ``requested`` pool shortly before pickup.
+
+The dispatcher keeps a min-heap of ``(release_at, ride_id)`` for scheduled
+rides due within a look-ahead horizon and sleeps until the earliest one,
+instead of polling the table. The heap is (re)built from the
+``(status, scheduled_at)`` index:
+
+* on start, so a restart picks up everything still ``scheduled`` (overdue
+  rides are released immediately);
+* every poll interval as the horizon slides forward, loading only the newly
+  covered time range plus rides created since the last load (``id`` greater
+  than any seen);
+* on a periodic resync of the whole horizon, which catches rides that were
+  rescheduled inside an already-loaded window.
+
+Heap entries can go stale (cancelled or rescheduled rides); the release
+UPDATE re-checks ``status`` and ``scheduled_at`` so stale entries are no-ops.
+
+A dispatcher serves one city, on that city's database (``core.cities``);
+``run_dispatcher`` runs one per city.
+"""
+import heapq
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from core.cities import city_db, current_city
+from .models import RideRequest
+from .signals import ride_status_changed
+
+logger = logging.getLogger(__name__)
+
+
+def dispatch_settings():
+    defaults = {
+        'LEAD_TIME': timedelta(minutes=10),
+        'HORIZON': timedelta(hours=1),
+        'RESYNC_INTERVAL': timedelta(minutes=5),
+        'POLL_INTERVAL': timedelta(seconds=5),
+        'BATCH_SIZE': 500,
+    }
+    defaults.update(getattr(settings, 'RIDE_DISPATCH', {}))
+    return defaults
+
+
+class ScheduledRideDispatcher:
+
+    def __init__(self, lead_time=None, horizon=None, resync_interval=None, poll_interval=None, batch_size=None,
+                 city=None):
+        config = dispatch_settings()
+        self.city = city or current_city()
+        self.lead_time = lead_time if lead_time is not None else config['LEAD_TIME']
+        self.horizon = horizon if horizon is not None else config['HORIZON']
+        self.resync_interval = resync_interval if resync_interval is not None else config['RESYNC_INTERVAL']
+        self.poll_interval = poll_interval if poll_interval is not None else config['POLL_INTERVAL']
+        self.batch_size = batch_size or config['BATCH_SIZE']
+        self._heap = []
+        self._queued = {}  # pk -> release timestamp of its live heap entry
+        self._loaded_until = None
+        self._max_id = 0
+        self._next_resync = None
+
+    def __len__(self):
+        return len(self._queued)
+
+    def _rides(self):
+        return RideRequest.objects.using(city_db(self.city)).filter(city=self.city)
+
+    # -- loading -----------------------------------------------------------
+
+    def load(self, now=None):
+        """Queue scheduled rides releasing before ``now + horizon``; return how many were added."""
+        now = now or timezone.now()
+        bound = now + self.lead_time + self.horizon
+        qs = self._rides().filter(status='scheduled', scheduled_at__lte=bound)
+        if self._loaded_until is not None and now < self._next_resync:
+            # incremental: newly covered window plus rides created since the last load
+            qs = qs.filter(scheduled_at__gt=self._loaded_until) | qs.filter(pk__gt=self._max_id)
+        else:
+            self._next_resync = now + self.resync_interval
+
+        added = 0
+        for pk, scheduled_at in qs.values_list('pk', 'scheduled_at').iterator(chunk_size=self.batch_size):
+            self._max_id = max(self._max_id, pk)
+            release_at = (scheduled_at - self.lead_time).timestamp()
+            if self._queued.get(pk) == release_at:
+                continue
+            # a changed release time leaves the old heap entry behind; it is skipped on pop
+            heapq.heappush(self._heap, (release_at, pk))
+            self._queued[pk] = release_at
+            added += 1
+        self._loaded_until = bound
+        return added
+
+    # -- releasing ---------------------------------------------------------
+
+    def next_release(self):
+        """Timestamp of the earliest queued release (possibly stale), or None."""
+        return self._heap[0][0] if self._heap else None
+
+    def release_due(self, now=None):
+        """Move every due ride from ``scheduled`` to ``requested``; return the count released."""
+        now = now or timezone.now()
+        now_ts = now.timestamp()
+        due = []
+        while self._heap and self._heap[0][0] <= now_ts:
+            release_at, pk = heapq.heappop(self._heap)
+            if self._queued.get(pk) != release_at:
+                continue
+            del self._queued[pk]
+            due.append(pk)
+
+        released = 0
+        for start in range(0, len(due), self.batch_size):
+            released += self._release(due[start:start + self.batch_size], now)
+        return released
+
+    def _release(self, pks, now):
+        using = city_db(self.city)
+        with transaction.atomic(using=using):
+            rides = list(
+                self._rides().select_for_update()
+                .filter(pk__in=pks, status='scheduled', scheduled_at__lte=now + self.lead_time)
+            )
+            if not rides:
+                return 0
+            RideRequest.objects.using(using).filter(pk__in=[r.pk for r in rides]).update(status='requested', updated_at=now)
+            for ride in rides:
+                ride.status = 'requested'
+
+            def notify():
+                for ride in rides:
+                    ride_status_changed.send(sender=RideRequest, ride=ride,
+                                             old_status='scheduled', new_status='requested')
+            transaction.on_commit(notify, using=using)
+        logger.info('Released %d scheduled ride(s) in %s', len(rides), self.city)
+        return len(rides)
+
+    # -- main loop ---------------------------------------------------------
+
+    def run(self, stop_event=None):
+        """Release rides on time until ``stop_event`` is set.
+
+        Wakes at the earliest queued release, or after ``POLL_INTERVAL`` to
+        pick up newly booked rides with a cheap incremental load.
+        """
+        stop_event = stop_event or threading.Event()
+        poll = self.poll_interval.total_seconds()
+        while not stop_event.is_set():
+            now = timezone.now()
+            self.load(now)
+            self.release_due(now)
+
+            wake = time.time() + poll
+            next_release = self.next_release()
+            if next_release is not None:
+                wake = min(wake, next_release)
+            stop_event.wait(max(0.0, wake - time.time()))
@@ -0,0 +1,159 @@
+"""Shared ride state checks and notifications.
+
+Used by the API actions and by the admin bulk actions so both apply the
+same rules and send the same notifications.
+"""
+from django.core.mail import mail_admins
+from django.db import transaction
+from django.utils import timezone
+
+from .models import RideRequest
+from .signals import ride_status_changed
+
+# states a ride may be marked completed from
+COMPLETABLE_STATUSES = ('scheduled', 'requested', 'assigned')
+
+
+def completion_error(ride):
+    """Return why ``ride`` cannot be completed, or None if it can."""
+    if ride.status == 'completed':
+        return 'Ride already completed.'
+    if ride.status not in COMPLETABLE_STATUSES:
+        return f'Ride is {ride.status} and cannot be completed.'
+    return None
+
+
+def completion_summary(ride, actor):
+    driver_name = ''
+    driver_phone = ''
+    if ride.driver:
+        profile = getattr(ride.driver, 'profile', None)
+        driver_name = getattr(profile, 'full_name', ride.driver.username) if profile else ride.driver.username
+        driver_phone = getattr(profile, 'phone', '') if profile else ''
+    return (
+        f'Ride ID: {ride.id}\n'
+        f'Completed by: {actor.username} (id={actor.id})\n'
+        f'Rider: {ride.rider.username} (id={ride.rider.id})\n'
+        f'Driver: {driver_name} (phone: {driver_phone})\n'
+        f'Origin: {ride.origin}\n'
+        f'Destination: {ride.destination}\n'
+        f'Requested at: {ride.requested_at}\n'
+        f'Completed at: {ride.completed_at}\n'
+    )
+
+
+def notify_completed(rides, actor):
+    """Email admins about completed rides: one mail for one ride, one digest for many."""
+    if not rides:
+        return
+    try:
+        if len(rides) == 1:
+            subject = f'Ride marked completed: #{rides[0].id} by {actor.username}'
+        else:
+            subject = f'{len(rides)} rides marked completed by {actor.username}'
+        message = '\n'.join(completion_summary(ride, actor) for ride in rides)
+        mail_admins(subject, message)
+    except Exception:
+        pass
+
+
+def complete_rides(rides, actor):
+    """Complete every ride in ``rides`` that may be completed; return how many were.
+
+    Meant to run inside a transaction (see ``core.bulk``): the status signal
+    and a single admin digest mail are sent once it commits. ``rides`` come
+    from one city database.
+    """
+    now = timezone.now()
+    done = [ride for ride in rides if completion_error(ride) is None]
+    if not done:
+        return 0
+    using = done[0]._state.db
+    old_status = {ride.pk: ride.status for ride in done}
+    RideRequest.objects.using(using).filter(pk__in=list(old_status)).update(
+        status='completed', completed_at=now, updated_at=now)
+    for ride in done:
+        ride.status = 'completed'
+        ride.completed_at = now
+
+    def after_commit():
+        for ride in done:
+            ride_status_changed.send(sender=RideRequest, ride=ride,
+                                     old_status=old_status[ride.pk], new_status='completed')
+        notify_completed(done, actor)
+    transaction.on_commit(after_commit, using=using)
+    return len(done)
+
+
+class RideActionError(Exception):
+    """A ride action was refused; ``status`` is the HTTP status to report."""
+
+    def __init__(self, detail, status=400):
+        super().__init__(detail)
+        self.detail = detail
+        self.status = status
+
+
+def _changed(ride, old_status):
+    # rides live on their city's database; hook into that transaction
+    new_status = ride.status
+    transaction.on_commit(lambda: ride_status_changed.send(
+        sender=RideRequest, ride=ride, old_status=old_status, new_status=new_status), using=ride._state.db)
+
+
+def accept_ride(ride, driver):
+    """Assign ``ride`` to ``driver`` (an approved driver) or raise RideActionError."""
+    profile = getattr(driver, 'profile', None)
+    if profile is None or profile.role != 'driver':
+        raise RideActionError('Only drivers can accept rides.', 403)
+    if not profile.is_driver_approved:
+        raise RideActionError('Your driver account is awaiting approval.', 403)
+    if ride.driver_id is not None:
+        raise RideActionError('Ride already assigned.')
+    if ride.status != 'requested':
+        raise RideActionError('Ride is not open for acceptance.')
+    now = timezone.now()
+    # conditional UPDATE so two drivers racing for the same ride cannot both win
+    claimed = (RideRequest.objects.using(ride._state.db)
+               .filter(pk=ride.pk, status='requested', driver__isnull=True)
+               .update(driver=driver, status='assigned', assigned_at=now, updated_at=now))
+    if not claimed:
+        raise RideActionError('Ride already assigned.')
+    old_status = ride.status
+    ride.driver = driver
+    ride.status = 'assigned'
+    ride.assigned_at = now
+    _changed(ride, old_status)
+
+
+def complete_ride(ride, actor):
+    """Mark ``ride`` completed by its rider or driver, notifying admins, or raise RideActionError."""
+    if actor.pk not in (ride.rider_id, ride.driver_id):
+        raise RideActionError('Only the rider or assigned driver can mark this ride completed.', 403)
+    error = completion_error(ride)
+    if error:
+        raise RideActionError(error)
+    old_status = ride.status
+    ride.status = 'completed'
+    ride.completed_at = timezone.now()
+    ride.save(update_fields=['status', 'completed_at', 'updated_at'])
+    _changed(ride, old_status)
+    transaction.on_commit(lambda: notify_completed([ride], actor), using=ride._state.db)
+
+
+# states a rider may still cancel from
+CANCELLABLE_STATUSES = ('scheduled', 'requested', 'assigned')
+
+
+def cancel_ride(ride, actor):
+    """Cancel ``ride`` on behalf of its rider, or raise RideActionError."""
+    if actor.pk != ride.rider_id:
+        raise RideActionError('Only the rider can cancel this ride.', 403)
+    if ride.status == 'cancelled':
+        raise RideActionError('Ride already cancelled.')
+    if ride.status not in CANCELLABLE_STATUSES:
+        raise RideActionError(f'Ride is {ride.status} and cannot be cancelled.')
+    old_status = ride.status
+    ride.status = 'cancelled'
+    ride.save(update_fields=['status', 'updated_at'])
+    _changed(ride, old_status)
@@ -0,0 +1,17 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from rides.archive import archive_rides
+
+
+class Command(BaseCommand):
+    help = 'Move rides completed or cancelled more than N days ago into the ArchivedRide table.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=getattr(settings, 'RIDE_ARCHIVE_AFTER_DAYS', 30),
+                            help='Archive rides finished more than this many days ago.')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rides moved per transaction.')
+
+    def handle(self, *args, **options):
+        moved = archive_rides(days=options['days'], batch_size=options['batch_size'])
+        self.stdout.write(f'Archived {moved} ride(s).')
@@ -0,0 +1,10 @@
+from django.core.management.base import BaseCommand
+
+from rides.batch import prune_keys
+
+
+class Command(BaseCommand):
+    help = 'Delete batch idempotency keys older than IDEMPOTENCY_KEY_TTL.'
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Deleted {prune_keys()} idempotency key(s).')
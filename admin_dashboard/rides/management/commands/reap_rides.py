@@ -0,0 +1,45 @@
+import os
+import signal
+import threading
+
+from django.core.management.base import BaseCommand
+
+from core.instrumentation import registry
+from rides.reaper import reap_expired_requests
+
+
+class Command(BaseCommand):
+    help = 'Cancel ride requests that stayed unaccepted longer than their RIDE_REQUEST_TTL.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rides cancelled per UPDATE.')
+        parser.add_argument('--loop', action='store_true', help='Keep running, reaping every --interval seconds.')
+        parser.add_argument('--interval', type=float, default=60.0, help='Seconds between runs with --loop.')
+        parser.add_argument('--no-notify', action='store_true', help='Do not email riders.')
+        parser.add_argument('--metrics-file',
+                            help='Write Prometheus text metrics here after each run '
+                                 '(for the node_exporter textfile collector).')
+
+    def handle(self, *args, **options):
+        stop = threading.Event()
+        if options['loop']:
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: stop.set())
+
+        while True:
+            stats = reap_expired_requests(chunk_size=options['chunk_size'], notify=not options['no_notify'])
+            self.stdout.write(
+                f"Cancelled {stats['expired']} expired ride(s) "
+                f"{stats['by_transport_type']} in {stats['seconds']:.2f}s; notified {stats['notified']}."
+            )
+            if options['metrics_file']:
+                self._write_metrics(options['metrics_file'])
+            if not options['loop'] or stop.wait(options['interval']):
+                break
+
+    def _write_metrics(self, path):
+        # write then rename so the collector never reads a partial file
+        tmp = f'{path}.tmp'
+        with open(tmp, 'w') as fh:
+            fh.write(registry.render())
+        os.replace(tmp, path)
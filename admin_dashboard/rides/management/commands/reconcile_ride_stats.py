@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from rides.stats import reconcile
+
+
+class Command(BaseCommand):
+    help = 'Check per-user ride counters against the ride tables, and optionally repair drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='Rewrite drifted or missing counters.')
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        checked, drifted = reconcile(fix=options['fix'], batch_size=options['batch_size'])
+        action = 'repaired' if options['fix'] else 'found'
+        self.stdout.write(f'Checked {checked} user(s); {action} {drifted} with drifted counters.')
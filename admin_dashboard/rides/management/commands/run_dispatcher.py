@@ -0,0 +1,42 @@
+import signal
+import threading
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from core.cities import city_settings, for_each_city
+from rides.dispatch import ScheduledRideDispatcher
+
+
+class Command(BaseCommand):
+    help = 'Release scheduled rides into the available pool shortly before their pickup time.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lead-seconds', type=int, help='Release rides this long before scheduled_at.')
+        parser.add_argument('--horizon-seconds', type=int, help='How far ahead to load scheduled rides.')
+        parser.add_argument('--city', action='append', choices=list(city_settings()),
+                            help='Only dispatch this city (repeatable); default every city.')
+        parser.add_argument('--once', action='store_true', help='Release rides that are due now and exit.')
+
+    def handle(self, *args, **options):
+        kwargs = {}
+        if options['lead_seconds'] is not None:
+            kwargs['lead_time'] = timedelta(seconds=options['lead_seconds'])
+        if options['horizon_seconds'] is not None:
+            kwargs['horizon'] = timedelta(seconds=options['horizon_seconds'])
+
+        if options['once']:
+            def release(city):
+                dispatcher = ScheduledRideDispatcher(city=city, **kwargs)
+                dispatcher.load()
+                return dispatcher.release_due()
+            released = for_each_city(release, options['city'])
+            self.stdout.write(f'Released {sum(released.values())} ride(s).')
+            return
+
+        stop = threading.Event()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            signal.signal(sig, lambda *_: stop.set())
+        self.stdout.write('Dispatcher running; press Ctrl+C to stop.')
+        # one dispatcher per city, each on its own thread
+        for_each_city(lambda city: ScheduledRideDispatcher(city=city, **kwargs).run(stop), options['city'])
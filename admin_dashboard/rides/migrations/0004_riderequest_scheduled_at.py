@@ -0,0 +1,29 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:06
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0003_riderequest_transport_type'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='riderequest',
+            name='scheduled_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name='riderequest',
+            name='status',
+            field=models.CharField(choices=[('scheduled', 'Scheduled'), ('requested', 'Requested'), ('assigned', 'Assigned'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], default='requested', max_length=20),
+        ),
+        migrations.AddIndex(
+            model_name='riderequest',
+            index=models.Index(fields=['status', 'scheduled_at'], name='ride_status_scheduled_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:07
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0004_riderequest_scheduled_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='riderequest',
+            index=models.Index(fields=['status', 'transport_type', 'requested_at'], name='ride_status_type_requested_idx'),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:08
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0005_riderequest_status_requested_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedRide',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('origin', models.CharField(max_length=255)),
+                ('destination', models.CharField(max_length=255)),
+                ('status', models.CharField(choices=[('scheduled', 'Scheduled'), ('requested', 'Requested'), ('assigned', 'Assigned'), ('completed', 'Completed'), ('cancelled', 'Cancelled')], max_length=20)),
+                ('transport_type', models.CharField(choices=[('taxi', 'Taxi'), ('bike', 'Bike')], default='taxi', max_length=16)),
+                ('requested_at', models.DateTimeField()),
+                ('assigned_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('scheduled_at', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('driver', models.ForeignKey(blank=True, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_assigned_rides', to=settings.AUTH_USER_MODEL)),
+                ('rider', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_rides', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['rider', 'requested_at'], name='archive_rider_requested_idx'), models.Index(fields=['driver', 'requested_at'], name='archive_driver_requested_idx')],
+            },
+        ),
+    ]
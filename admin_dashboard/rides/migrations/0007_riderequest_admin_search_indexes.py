@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:10
+
+from django.conf import settings
+from django.db import migrations, models
+
+from core import db_indexes
+
+RIDE_INDEXES = [
+    ('ride_origin_ci_idx', 'origin'),
+    ('ride_destination_ci_idx', 'destination'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    table = apps.get_model('rides', 'RideRequest')._meta.db_table
+    db_indexes.create_ci_indexes(schema_editor, table, RIDE_INDEXES)
+
+
+def drop_indexes(apps, schema_editor):
+    db_indexes.drop_indexes(schema_editor, RIDE_INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0006_archivedride'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='riderequest',
+            index=models.Index(fields=['requested_at'], name='ride_requested_at_idx'),
+        ),
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
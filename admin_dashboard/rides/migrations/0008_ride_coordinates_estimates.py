@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0007_riderequest_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='riderequest',
+            name='destination_lat',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='riderequest',
+            name='destination_lng',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='riderequest',
+            name='est_distance_m',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='riderequest',
+            name='est_duration_s',
+            field=models.PositiveIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='riderequest',
+            name='origin_lat',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='riderequest',
+            name='origin_lng',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:26
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('rides', '0009_idempotencykey'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RideStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='ride_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('rides_requested', models.PositiveIntegerField(default=0)),
+                ('rides_completed', models.PositiveIntegerField(default=0)),
+                ('rides_cancelled', models.PositiveIntegerField(default=0)),
+                ('wait_seconds_total', models.FloatField(default=0)),
+                ('waits_timed', models.PositiveIntegerField(default=0)),
+                ('rides_accepted', models.PositiveIntegerField(default=0)),
+                ('rides_driven', models.PositiveIntegerField(default=0)),
+                ('accept_seconds_total', models.FloatField(default=0)),
+                ('accepts_timed', models.PositiveIntegerField(default=0)),
+                ('last_active', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,56 @@
+# Generated by Django 5.2.18 on 2026-10-19 01:39
+
+import core.cities
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0011_dashboard_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='archivedride',
+            name='city',
+            field=models.CharField(default=core.cities.current_city, editable=False, max_length=32),
+        ),
+        migrations.AddField(
+            model_name='riderequest',
+            name='city',
+            field=models.CharField(default=core.cities.current_city, editable=False, max_length=32),
+        ),
+        migrations.AlterField(
+            model_name='archivedride',
+            name='driver',
+            field=models.ForeignKey(blank=True, db_constraint=False, db_index=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='archived_assigned_rides', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='archivedride',
+            name='rider',
+            field=models.ForeignKey(db_constraint=False, db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_rides', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='idempotencykey',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='riderequest',
+            name='driver',
+            field=models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='assigned_rides', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AlterField(
+            model_name='riderequest',
+            name='rider',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='ride_requests', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='riderequest',
+            index=models.Index(fields=['city', 'status', 'requested_at'], name='ride_city_status_requested_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 03:20
+
+from django.db import migrations
+
+from core import db_indexes
+
+# later migrations rebuilt rides_riderequest on SQLite, which dropped the indexes 0007 created
+RIDE_INDEXES = [
+    ('ride_origin_ci_idx', 'origin'),
+    ('ride_destination_ci_idx', 'destination'),
+]
+
+
+def create_indexes(apps, schema_editor):
+    table = apps.get_model('rides', 'RideRequest')._meta.db_table
+    db_indexes.create_ci_indexes(schema_editor, table, RIDE_INDEXES)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rides', '0013_replication'),
+    ]
+
+    operations = [
+        # 0007 drops them when unapplied
+        migrations.RunPython(create_indexes, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,8 @@
 from django.db import models
 from django.conf import settings
 
+from core.cities import current_city
+
 
 class Vehicle(models.Model):
     owner = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
@@ -14,14 +16,19 @@ class Vehicle(models.Model):
 
 class RideRequest(models.Model):
     STATUS_CHOICES = (
+        ('scheduled', 'Scheduled'),
         ('requested', 'Requested'),
         ('assigned', 'Assigned'),
         ('completed', 'Completed'),
         ('cancelled', 'Cancelled'),
     )
 
-    rider = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ride_requests')
-    driver = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='assigned_rides')
+    # users live on the default database and rides on their city's (core.cities),
+    # so these references carry no database constraint
+    rider = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='ride_requests', db_constraint=False)
+    driver = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='assigned_rides', db_constraint=False)
+    # the rider's city; decides which database the ride is stored on
+    city = models.CharField(max_length=32, default=current_city, editable=False)
     origin = models.CharField(max_length=255)
     destination = models.CharField(max_length=255)
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='requested')
@@ -29,6 +36,137 @@ class RideRequest(models.Model):
     transport_type = models.CharField(max_length=16, choices=(('taxi','Taxi'),('bike','Bike')), default='taxi')
     assigned_at = models.DateTimeField(null=True, blank=True)
     completed_at = models.DateTimeField(null=True, blank=True)
+    # Rides booked in advance stay 'scheduled' until the dispatcher releases them
+    # into the 'requested' pool shortly before this time.
+    scheduled_at = models.DateTimeField(null=True, blank=True)
+    # Optional coordinates and the routed trip estimate (see geo.routing)
+    origin_lat = models.FloatField(null=True, blank=True)
+    origin_lng = models.FloatField(null=True, blank=True)
+    destination_lat = models.FloatField(null=True, blank=True)
+    destination_lng = models.FloatField(null=True, blank=True)
+    est_distance_m = models.PositiveIntegerField(null=True, blank=True)
+    est_duration_s = models.PositiveIntegerField(null=True, blank=True)
+    # Replication with the mobile app's Supabase schema (see replication.bridge).
+    # Queryset update()s bypass auto_now, so they set updated_at explicitly.
+    updated_at = models.DateTimeField(auto_now=True)
+    supabase_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'scheduled_at'], name='ride_status_scheduled_idx'),
+            models.Index(fields=['status', 'transport_type', 'requested_at'], name='ride_status_type_requested_idx'),
+            models.Index(fields=['requested_at'], name='ride_requested_at_idx'),
+            # newest-first dashboard lists stay index-ordered however long the history
+            models.Index(fields=['rider', '-requested_at'], name='ride_rider_requested_idx'),
+            models.Index(fields=['driver', '-requested_at'], name='ride_driver_requested_idx'),
+            # per-city open-request pool when several cities share a database
+            models.Index(fields=['city', 'status', 'requested_at'], name='ride_city_status_requested_idx'),
+            # replication change-log cursor
+            models.Index(fields=['updated_at', 'id'], name='ride_updated_idx'),
+        ]
 
     def __str__(self):
         return f"RideRequest({self.rider.username}: {self.origin} -> {self.destination})"
+
+    @property
+    def est_minutes(self):
+        return None if self.est_duration_s is None else max(1, round(self.est_duration_s / 60))
+
+    @property
+    def est_km(self):
+        return None if self.est_distance_m is None else self.est_distance_m / 1000
+
+
+class ArchivedRide(models.Model):
+    """Completed/cancelled rides moved out of the live RideRequest table.
+
+    Keeps the original RideRequest id as primary key so references stay
+    stable; see ``rides.archive``.
+    """
+    id = models.BigIntegerField(primary_key=True)
+    # the composite indexes below lead with rider/driver, so no separate FK indexes
+    rider = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='archived_rides', db_index=False, db_constraint=False)
+    driver = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL, related_name='archived_assigned_rides', db_index=False, db_constraint=False)
+    city = models.CharField(max_length=32, default=current_city, editable=False)
+    origin = models.CharField(max_length=255)
+    destination = models.CharField(max_length=255)
+    status = models.CharField(max_length=20, choices=RideRequest.STATUS_CHOICES)
+    transport_type = models.CharField(max_length=16, choices=(('taxi','Taxi'),('bike','Bike')), default='taxi')
+    requested_at = models.DateTimeField()
+    assigned_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    scheduled_at = models.DateTimeField(null=True, blank=True)
+    supabase_id = models.UUIDField(null=True, blank=True, unique=True, editable=False)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['rider', 'requested_at'], name='archive_rider_requested_idx'),
+            models.Index(fields=['driver', 'requested_at'], name='archive_driver_requested_idx'),
+        ]
+
+    def __str__(self):
+        return f"ArchivedRide({self.rider_id}: {self.origin} -> {self.destination})"
+
+
+class IdempotencyKey(models.Model):
+    """Outcome of a batch operation, stored under the client's key so retries replay it.
+
+    Written in the same transaction as the operation's effect; see ``rides.batch``.
+    """
+    # stored with the rides on the user's city database, hence no constraint
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+', db_constraint=False)
+    key = models.CharField(max_length=64)
+    op = models.CharField(max_length=16)
+    status_code = models.PositiveSmallIntegerField()
+    response = models.JSONField()
+    ride = models.ForeignKey(RideRequest, null=True, blank=True, on_delete=models.SET_NULL, related_name='+')
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'key'], name='idempotency_user_key_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['created'], name='idempotency_created_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user_id}:{self.key} ({self.op} -> {self.status_code})"
+
+
+class RideStats(models.Model):
+    """Per-user ride counters, kept current by ``rides.stats`` as rides change state.
+
+    Time-to-assign covers on-demand rides only (scheduled rides wait by design).
+    ``reconcile_ride_stats`` recomputes everything from live and archived rides.
+    """
+    user = models.OneToOneField(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, primary_key=True, related_name='ride_stats')
+    # as rider
+    rides_requested = models.PositiveIntegerField(default=0)
+    rides_completed = models.PositiveIntegerField(default=0)
+    rides_cancelled = models.PositiveIntegerField(default=0)
+    wait_seconds_total = models.FloatField(default=0)
+    waits_timed = models.PositiveIntegerField(default=0)
+    # as driver
+    rides_accepted = models.PositiveIntegerField(default=0)
+    rides_driven = models.PositiveIntegerField(default=0)
+    accept_seconds_total = models.FloatField(default=0)
+    accepts_timed = models.PositiveIntegerField(default=0)
+    last_active = models.DateTimeField(null=True, blank=True)
+
+    COUNTERS = (
+        'rides_requested', 'rides_completed', 'rides_cancelled', 'wait_seconds_total', 'waits_timed',
+        'rides_accepted', 'rides_driven', 'accept_seconds_total', 'accepts_timed',
+    )
+
+    def __str__(self):
+        return f"RideStats({self.user_id})"
+
+    @property
+    def avg_wait_seconds(self):
+        return self.wait_seconds_total / self.waits_timed if self.waits_timed else None
+
+    @property
+    def avg_accept_seconds(self):
+        return self.accept_seconds_total / self.accepts_timed if self.accepts_timed else None
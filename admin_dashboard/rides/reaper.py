@@ -0,0 +1,122 @@
+"""Cancel ride requests nobody accepted within their transport type's TTL.
+
+Expired rides are found through the ``(status, transport_type, requested_at)``
+index and cancelled in chunked UPDATEs, oldest first, so each transaction is
+short and the open-request pool stays small however long the service runs.
+Riders with an email address are notified with one mail batch per chunk.
+
+A released scheduled ride counts as open from its ``scheduled_at``, not from
+when it was booked. Every city database is reaped, in parallel.
+"""
+import logging
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import send_mass_mail
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from core.cities import for_each_shard
+from core.instrumentation import registry
+from .models import RideRequest
+from .signals import ride_status_changed
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TTL = timedelta(minutes=30)
+
+
+def ttl_for(transport_type):
+    ttls = getattr(settings, 'RIDE_REQUEST_TTL', {})
+    return ttls.get(transport_type, ttls.get('default', DEFAULT_TTL))
+
+
+def reap_expired_requests(now=None, chunk_size=500, notify=True):
+    """Cancel expired 'requested' rides; return a stats dict."""
+    now = now or timezone.now()
+    started = time.perf_counter()
+    stats = {'expired': 0, 'notified': 0, 'by_transport_type': {}}
+    for shard in for_each_shard(lambda using: _reap_shard(using, now, chunk_size, notify)).values():
+        stats['expired'] += shard['expired']
+        stats['notified'] += shard['notified']
+        for transport_type, count in shard['by_transport_type'].items():
+            stats['by_transport_type'][transport_type] = stats['by_transport_type'].get(transport_type, 0) + count
+
+    stats['seconds'] = time.perf_counter() - started
+    registry.inc('rides_reaped_total', stats['expired'])
+    registry.inc('rides_reaper_notifications_total', stats['notified'])
+    registry.inc('rides_reaper_runs_total')
+    registry.inc('rides_reaper_seconds_total', stats['seconds'])
+    if stats['expired']:
+        logger.info('Cancelled %d expired ride request(s)', stats['expired'])
+    return stats
+
+
+def _reap_shard(using, now, chunk_size, notify):
+    stats = {'expired': 0, 'notified': 0, 'by_transport_type': {}}
+    for transport_type, _ in RideRequest._meta.get_field('transport_type').choices:
+        cutoff = now - ttl_for(transport_type)
+        expired = (
+            RideRequest.objects.using(using)
+            .filter(status='requested', transport_type=transport_type, requested_at__lt=cutoff)
+            .filter(Q(scheduled_at__isnull=True) | Q(scheduled_at__lt=cutoff))
+            .order_by('requested_at')
+        )
+        count = 0
+        while True:
+            pks = list(expired.values_list('pk', flat=True)[:chunk_size])
+            if not pks:
+                break
+            rides = _cancel_chunk(pks, using)
+            count += len(rides)
+            if notify and rides:
+                stats['notified'] += _notify_riders(rides)
+            if len(pks) < chunk_size:
+                break
+        stats['by_transport_type'][transport_type] = count
+        stats['expired'] += count
+    return stats
+
+
+def _cancel_chunk(pks, using):
+    with transaction.atomic(using=using):
+        rides = list(
+            RideRequest.objects.using(using).select_for_update()
+            .filter(pk__in=pks, status='requested')
+            # riders live on the default database: fetched separately, not joined
+            .prefetch_related('rider')
+        )
+        RideRequest.objects.using(using).filter(pk__in=[r.pk for r in rides]).update(
+            status='cancelled', updated_at=timezone.now())
+        for ride in rides:
+            ride.status = 'cancelled'
+
+        def send_signals():
+            for ride in rides:
+                ride_status_changed.send(sender=RideRequest, ride=ride,
+                                         old_status='requested', new_status='cancelled')
+        transaction.on_commit(send_signals, using=using)
+    return rides
+
+
+def _notify_riders(rides):
+    messages = [
+        (
+            'Your WiYone Cab ride request expired',
+            f'No driver accepted your ride from {ride.origin} to {ride.destination} '
+            f'(requested {ride.requested_at:%Y-%m-%d %H:%M}), so it has been cancelled. '
+            'Please request a new ride if you still need one.',
+            None,
+            [ride.rider.email],
+        )
+        for ride in rides if ride.rider.email
+    ]
+    if not messages:
+        return 0
+    try:
+        return send_mass_mail(messages, fail_silently=False)
+    except Exception:
+        logger.exception('Could not notify riders about %d expired ride(s)', len(messages))
+        return 0
@@ -1,16 +1,23 @@
+from django.utils import timezone
 from rest_framework import serializers
+from core.instrumentation import InstrumentedSerializerMixin
+from geo.geocoder import geocode_ride
+from geo.routing import estimate_ride
 from .models import Vehicle, RideRequest
 
+COORDINATE_FIELDS = ('origin_lat', 'origin_lng', 'destination_lat', 'destination_lng')
 
-class VehicleSerializer(serializers.ModelSerializer):
+
+class VehicleSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Vehicle
         fields = ('id', 'owner', 'make', 'model', 'plate')
 
 
-class RideRequestSerializer(serializers.ModelSerializer):
+class RideRequestSerializer(InstrumentedSerializerMixin, serializers.ModelSerializer):
     driver_info = serializers.SerializerMethodField()
     is_completed = serializers.SerializerMethodField()
+    archived = serializers.SerializerMethodField()
 
     def get_driver_info(self, obj):
         if not obj.driver:
@@ -25,6 +32,88 @@ class RideRequestSerializer(serializers.ModelSerializer):
 
     def get_is_completed(self, obj):
         return obj.status == 'completed'
+
+    def get_archived(self, obj):
+        # set on rides read back from the archive (rides.archive.as_ride)
+        return getattr(obj, 'archived', False)
+
+    def validate(self, attrs):
+        # New rides booked for later wait as 'scheduled' until the dispatcher releases them
+        scheduled_at = attrs.get('scheduled_at')
+        if self.instance is None and scheduled_at is not None:
+            if scheduled_at <= timezone.now():
+                raise serializers.ValidationError({'scheduled_at': 'Scheduled time must be in the future.'})
+            attrs['status'] = 'scheduled'
+        # a 'scheduled' ride without a future time would never be released nor reaped
+        status = attrs.get('status', getattr(self.instance, 'status', None))
+        if status == 'scheduled' and ('status' in attrs or 'scheduled_at' in attrs):
+            scheduled_at = attrs.get('scheduled_at', getattr(self.instance, 'scheduled_at', None))
+            if scheduled_at is None or scheduled_at <= timezone.now():
+                raise serializers.ValidationError({'scheduled_at': 'Scheduled rides need a pickup time in the future.'})
+
+        for end in ('origin', 'destination'):
+            lat, lng = attrs.get(f'{end}_lat'), attrs.get(f'{end}_lng')
+            if (lat is None) != (lng is None):
+                raise serializers.ValidationError({f'{end}_lat': 'Give both latitude and longitude.'})
+        located = ('origin', 'destination') + COORDINATE_FIELDS
+        if self.instance is None or any(f in attrs for f in located):
+            probe = RideRequest(**{f: getattr(self.instance, f, None) for f in located})
+            for end in ('origin', 'destination'):
+                if end in attrs and f'{end}_lat' not in attrs:
+                    # new text without coordinates: geocode it rather than keep the old point
+                    setattr(probe, f'{end}_lat', None)
+                    setattr(probe, f'{end}_lng', None)
+            for field in located:
+                if field in attrs:
+                    setattr(probe, field, attrs[field])
+            geocode_ride(probe)
+            for field in COORDINATE_FIELDS:
+                attrs[field] = getattr(probe, field)
+            if estimate_ride(probe):
+                attrs['est_duration_s'] = probe.est_duration_s
+                attrs['est_distance_m'] = probe.est_distance_m
+            else:
+                # an estimate kept from before would be for the old trip
+                attrs['est_duration_s'] = attrs['est_distance_m'] = None
+        return attrs
+
     class Meta:
         model = RideRequest
-        fields = ('id', 'rider', 'driver', 'driver_info', 'is_completed', 'origin', 'destination', 'status', 'requested_at', 'assigned_at', 'completed_at', 'transport_type')
+        fields = ('id', 'rider', 'driver', 'driver_info', 'is_completed', 'archived', 'origin', 'destination', 'status', 'requested_at', 'assigned_at', 'completed_at', 'transport_type', 'scheduled_at',
+                  'origin_lat', 'origin_lng', 'destination_lat', 'destination_lng', 'est_distance_m', 'est_duration_s', 'city')
+        read_only_fields = ('est_distance_m', 'est_duration_s', 'city')
+        extra_kwargs = {
+            'origin_lat': {'min_value': -90, 'max_value': 90},
+            'destination_lat': {'min_value': -90, 'max_value': 90},
+            'origin_lng': {'min_value': -180, 'max_value': 180},
+            'destination_lng': {'min_value': -180, 'max_value': 180},
+        }
+
+
+class RideCreateSerializer(RideRequestSerializer):
+    """A rider booking a ride: who rides, its status and its driver are the server's to set."""
+
+    class Meta(RideRequestSerializer.Meta):
+        read_only_fields = RideRequestSerializer.Meta.read_only_fields + (
+            'rider', 'driver', 'status', 'requested_at', 'assigned_at', 'completed_at')
+
+
+class RideHistorySerializer(InstrumentedSerializerMixin, serializers.Serializer):
+    """Read-only row from ``rides.archive.ride_history`` (live or archived ride)."""
+    id = serializers.IntegerField()
+    rider = serializers.IntegerField(source='rider_id')
+    driver = serializers.IntegerField(source='driver_id', allow_null=True)
+    origin = serializers.CharField()
+    destination = serializers.CharField()
+    status = serializers.CharField()
+    transport_type = serializers.CharField()
+    requested_at = serializers.DateTimeField()
+    assigned_at = serializers.DateTimeField(allow_null=True)
+    completed_at = serializers.DateTimeField(allow_null=True)
+    scheduled_at = serializers.DateTimeField(allow_null=True)
+    city = serializers.CharField()
+    is_completed = serializers.SerializerMethodField()
+    archived = serializers.BooleanField()
+
+    def get_is_completed(self, obj):
+        return obj['status'] == 'completed'
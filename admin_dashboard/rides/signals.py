@@ -0,0 +1,5 @@
+from django.dispatch import Signal
+
+# Sent whenever a ride moves between lifecycle states.
+# Arguments: ride (RideRequest), old_status, new_status.
+ride_status_changed = Signal()
@@ -0,0 +1,132 @@
+"""Incremental per-user ride counters (``RideStats``).
+
+Every ride creation (once the ride's transaction commits) and
+``ride_status_changed`` event becomes one UPDATE per affected user with
+``F()`` increments, so concurrent transitions never lose
+counts and nothing is aggregated at read time. A missing row is created on
+first use. Events that never reach the receivers (bulk inserts, a crash
+between commit and signal) are repaired by ``reconcile_ride_stats``.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, ExpressionWrapper, DurationField, F, Q, Sum
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from core.cities import for_each_shard
+from .models import ArchivedRide, RideRequest, RideStats
+from .signals import ride_status_changed
+
+
+def bump(user_id, now=None, **increments):
+    """Add ``increments`` to a user's counters and mark them active."""
+    if user_id is None:
+        return
+    now = now or timezone.now()
+    updates = {field: F(field) + value for field, value in increments.items()}
+    if RideStats.objects.filter(user_id=user_id).update(last_active=now, **updates):
+        return
+    try:
+        with transaction.atomic():
+            RideStats.objects.create(user_id=user_id, last_active=now, **increments)
+    except IntegrityError:
+        # created concurrently
+        RideStats.objects.filter(user_id=user_id).update(last_active=now, **updates)
+
+
+def wait_seconds(ride):
+    """Seconds from request to assignment for on-demand rides, else None."""
+    if ride.scheduled_at is not None or ride.assigned_at is None or ride.requested_at is None:
+        return None
+    return max(0.0, (ride.assigned_at - ride.requested_at).total_seconds())
+
+
+@receiver(post_save, sender=RideRequest)
+def count_new_ride(sender, instance, created, **kwargs):
+    if created:
+        # counters live on default, the ride on its city's database: count it only if that commits
+        transaction.on_commit(lambda: bump(instance.rider_id, rides_requested=1), using=instance._state.db)
+
+
+@receiver(ride_status_changed)
+def count_transition(sender, ride, old_status, new_status, **kwargs):
+    if new_status == 'assigned':
+        waited = wait_seconds(ride)
+        timed = {} if waited is None else {'wait_seconds_total': waited, 'waits_timed': 1}
+        bump(ride.rider_id, **timed)
+        bump(ride.driver_id, rides_accepted=1,
+             **({} if waited is None else {'accept_seconds_total': waited, 'accepts_timed': 1}))
+    elif new_status == 'completed':
+        bump(ride.rider_id, rides_completed=1)
+        bump(ride.driver_id, rides_driven=1)
+    elif new_status == 'cancelled':
+        bump(ride.rider_id, rides_cancelled=1)
+
+
+def _aggregate(model, using):
+    """Recomputed counters from one ride table on one database: ``{user_id: {field: value}}``."""
+    on_demand_assigned = Q(scheduled_at__isnull=True, assigned_at__isnull=False)
+    waited = ExpressionWrapper(F('assigned_at') - F('requested_at'), output_field=DurationField())
+    totals = {}
+    as_rider = model.objects.using(using).values('rider_id').annotate(
+        rides_requested=Count('id'),
+        rides_completed=Count('id', filter=Q(status='completed')),
+        rides_cancelled=Count('id', filter=Q(status='cancelled')),
+        wait_total=Sum(waited, filter=on_demand_assigned),
+        waits_timed=Count('id', filter=on_demand_assigned),
+    ).order_by()
+    for row in as_rider:
+        stats = totals.setdefault(row.pop('rider_id'), {})
+        wait = row.pop('wait_total')
+        stats['wait_seconds_total'] = max(0.0, wait.total_seconds()) if wait else 0.0
+        stats.update(row)
+    as_driver = model.objects.using(using).filter(driver__isnull=False).values('driver_id').annotate(
+        rides_accepted=Count('id'),
+        rides_driven=Count('id', filter=Q(status='completed')),
+        accept_total=Sum(waited, filter=on_demand_assigned),
+        accepts_timed=Count('id', filter=on_demand_assigned),
+    ).order_by()
+    for row in as_driver:
+        stats = totals.setdefault(row.pop('driver_id'), {})
+        accept = row.pop('accept_total')
+        stats['accept_seconds_total'] = max(0.0, accept.total_seconds()) if accept else 0.0
+        stats.update(row)
+    return totals
+
+
+def expected_stats():
+    """Counters recomputed from live and archived rides on every city database, by user id."""
+    partials = for_each_shard(lambda using: [_aggregate(model, using) for model in (RideRequest, ArchivedRide)])
+    expected = {}
+    for totals in (t for shard in partials.values() for t in shard):
+        for user_id, counters in totals.items():
+            merged = expected.setdefault(user_id, dict.fromkeys(RideStats.COUNTERS, 0))
+            for field, value in counters.items():
+                merged[field] += value
+    return expected
+
+
+def reconcile(fix=False, batch_size=1000):
+    """Compare stored counters with recomputed ones; return ``(checked, drifted)``.
+
+    With ``fix``, drifted rows are rewritten and missing rows created in bulk.
+    Time totals are compared to the nearest second.
+    """
+    expected = expected_stats()
+    stored = {s.user_id: s for s in RideStats.objects.all().iterator(chunk_size=batch_size)}
+    to_update, to_create = [], []
+    for user_id in expected.keys() | stored.keys():
+        want = expected.get(user_id, dict.fromkeys(RideStats.COUNTERS, 0))
+        row = stored.get(user_id)
+        if row is None:
+            to_create.append(RideStats(user_id=user_id, **want))
+            continue
+        if any(abs(getattr(row, f) - want[f]) >= 1 for f in RideStats.COUNTERS):
+            for field, value in want.items():
+                setattr(row, field, value)
+            to_update.append(row)
+    if fix:
+        with transaction.atomic():
+            RideStats.objects.bulk_update(to_update, RideStats.COUNTERS, batch_size=batch_size)
+            RideStats.objects.bulk_create(to_create, batch_size=batch_size, ignore_conflicts=True)
+    return len(expected.keys() | stored.keys()), len(to_update) + len(to_create)
@@ -0,0 +1,28 @@
+from django import template
+from django.db.models import Count
+
+from core.cities import city_db, city_name, city_settings, current_city, for_each_city
+from rides.models import RideRequest
+
+register = template.Library()
+
+LIVE_STATUSES = ('scheduled', 'requested', 'assigned')
+
+
+def _live_counts(city):
+    rows = (RideRequest.objects.using(city_db(city))
+            .filter(city=city, status__in=LIVE_STATUSES)
+            .values_list('status').annotate(n=Count('id')).order_by())
+    return dict(rows)
+
+
+@register.simple_tag
+def city_overview():
+    """Live ride counts for every city, queried on all city databases in parallel."""
+    current = current_city()
+    counts = for_each_city(_live_counts)
+    return [
+        {'slug': city, 'name': city_name(city), 'current': city == current,
+         **{status: counts[city].get(status, 0) for status in LIVE_STATUSES}}
+        for city in city_settings()
+    ]
@@ -0,0 +1,207 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.test import TransactionTestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient, APITestCase
+
+from core.cities import use_city
+from .archive import archive_rides
+from .models import ArchivedRide, IdempotencyKey, RideRequest, RideStats
+
+
+class BatchTests(APITestCase):
+    url = '/api/rides/batch/'
+
+    def setUp(self):
+        self.rider = User.objects.create_user('rider', password='x')
+        self.rider.profile.role = 'rider'
+        self.rider.profile.save()
+        self.client.force_authenticate(self.rider)
+
+    def post(self, *operations):
+        return self.client.post(self.url, {'operations': list(operations)}, format='json')
+
+    def test_duplicate_key_replays_first_result(self):
+        create = {'key': 'c1', 'op': 'create', 'data': {'origin': 'Hangha Road', 'destination': 'Kpayama'}}
+        first = self.post(create)
+        self.assertEqual(first.status_code, 200)
+        result = first.data['results'][0]
+        self.assertEqual(result['status'], 201)
+        self.assertFalse(result['replayed'])
+
+        # the retry carries different data; the key alone decides
+        retry = self.post({**create, 'data': {'origin': 'Elsewhere', 'destination': 'Nowhere'}})
+        replayed = retry.data['results'][0]
+        self.assertTrue(replayed['replayed'])
+        self.assertEqual(replayed['ride'], result['ride'])
+        self.assertEqual(replayed['data'], result['data'])
+        self.assertEqual(RideRequest.objects.count(), 1)
+        self.assertEqual(IdempotencyKey.objects.filter(user=self.rider).count(), 1)
+
+    def test_refusal_is_replayed(self):
+        other = User.objects.create_user('other', password='x')
+        ride = RideRequest.objects.create(rider=other, origin='A', destination='B')
+        cancel = {'key': 'x1', 'op': 'cancel', 'ride': ride.pk}
+        first = self.post(cancel).data['results'][0]
+        self.assertEqual(first['status'], 403)
+
+        replayed = self.post(cancel).data['results'][0]
+        self.assertTrue(replayed['replayed'])
+        self.assertEqual(replayed['status'], 403)
+        ride.refresh_from_db()
+        self.assertEqual(ride.status, 'requested')
+
+    def test_reference_to_earlier_create(self):
+        response = self.post(
+            {'key': 'c1', 'op': 'create', 'data': {'origin': 'A', 'destination': 'B'}},
+            {'key': 'c2', 'op': 'cancel', 'ride': '@c1'},
+        )
+        created, cancelled = response.data['results']
+        self.assertEqual(cancelled['status'], 200)
+        self.assertEqual(cancelled['ride'], created['ride'])
+        self.assertEqual(RideRequest.objects.get(pk=created['ride']).status, 'cancelled')
+
+    def test_create_ignores_server_set_fields(self):
+        driver = User.objects.create_user('driver', password='x')
+        response = self.post({'key': 'c1', 'op': 'create', 'data': {
+            'origin': 'A', 'destination': 'B', 'status': 'completed', 'driver': driver.pk}})
+        ride = RideRequest.objects.get(pk=response.data['results'][0]['ride'])
+        self.assertEqual((ride.status, ride.driver_id, ride.rider_id), ('requested', None, self.rider.pk))
+
+    def test_malformed_batch_applies_nothing(self):
+        response = self.post(
+            {'key': 'c1', 'op': 'create', 'data': {'origin': 'A', 'destination': 'B'}},
+            {'key': 'c2', 'op': 'create', 'data': ['A', 'B']},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(RideRequest.objects.exists())
+
+
+
+class RideListTests(APITestCase):
+
+    def setUp(self):
+        self.rider = User.objects.create_user('rider', password='x')
+        self.client.force_authenticate(self.rider)
+
+    def test_list_has_live_rides_in_constant_queries(self):
+        for i in range(5):
+            driver = User.objects.create_user(f'driver{i}', password='x')
+            RideRequest.objects.create(rider=self.rider, driver=driver, origin='A', destination='B', status='assigned')
+        archived = ArchivedRide.objects.create(id=1000, rider=self.rider, origin='C', destination='D',
+                                               status='completed', requested_at=RideRequest.objects.first().requested_at)
+        # rides, their drivers, the drivers' profiles
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/rides/')
+        self.assertEqual(len(response.data), 5)
+        self.assertTrue(all(ride['driver_info']['username'].startswith('driver') for ride in response.data))
+        # still readable one at a time
+        detail = self.client.get(f'/api/rides/{archived.pk}/').data
+        self.assertEqual((detail['id'], detail['archived']), (archived.pk, True))
+
+
+
+class ScheduledRideValidationTests(APITestCase):
+
+    def setUp(self):
+        self.rider = User.objects.create_user('rider', password='x')
+        self.client.force_authenticate(self.rider)
+
+    def create(self, **data):
+        return self.client.post('/api/rides/', {'rider': self.rider.pk, 'origin': 'A', 'destination': 'B', **data},
+                                format='json')
+
+    def test_future_time_schedules_the_ride(self):
+        response = self.create(scheduled_at=(timezone.now() + timedelta(hours=2)).isoformat())
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['status'], 'scheduled')
+
+    def test_scheduled_status_needs_a_future_time(self):
+        self.assertEqual(self.create(status='scheduled').status_code, 400)
+        ride = RideRequest.objects.create(rider=self.rider, origin='A', destination='B')
+        response = self.client.patch(f'/api/rides/{ride.pk}/', {'status': 'scheduled'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        ride.refresh_from_db()
+        self.assertEqual(ride.status, 'requested')
+
+    def test_scheduled_ride_keeps_its_time(self):
+        ride = RideRequest.objects.create(rider=self.rider, origin='A', destination='B', status='scheduled',
+                                          scheduled_at=timezone.now() + timedelta(hours=2))
+        response = self.client.patch(f'/api/rides/{ride.pk}/', {'scheduled_at': None}, format='json')
+        self.assertEqual(response.status_code, 400)
+        # other edits are unaffected
+        response = self.client.patch(f'/api/rides/{ride.pk}/', {'destination': 'C'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+class ArchivedRideSearchTests(TransactionTestCase):
+    # archive_rides works on every city database, from worker threads
+    databases = '__all__'
+
+    def setUp(self):
+        rider = User.objects.create_user('rider', password='x')
+        RideRequest.objects.create(rider=rider, origin='Kenema Government Hospital', destination='Hangha Road',
+                                   status='completed', completed_at=timezone.now() - timedelta(days=60))
+        archive_rides(days=30)
+        self.client.force_login(User.objects.create_superuser('admin', 'admin@example.com', 'x'))
+
+    def test_words_anywhere_match_archived_rides(self):
+        response = self.client.get(reverse('admin:rides_archivedride_changelist'), {'q': 'hospital'})
+        self.assertEqual(response.context['cl'].result_count, 1)
+
+    def test_live_search_points_to_archived_matches(self):
+        response = self.client.get(reverse('admin:rides_riderequest_changelist'), {'q': 'hospital'})
+        self.assertEqual(response.context['cl'].result_count, 0)
+        self.assertIn('1 archived ride(s) also match', ' '.join(str(m) for m in response.context['messages']))
+
+@skipUnless('city_bo' in settings.DATABASES, 'needs a city_bo database (admin_dashboard.settings_test)')
+class CityShardTests(TransactionTestCase):
+    """Rides of Bo riders live on ``city_bo``; users and counters stay on ``default``."""
+    databases = '__all__'
+
+    def setUp(self):
+        self.rider = User.objects.create_user('bo_rider', password='x')
+        self.rider.profile.role = 'rider'
+        self.rider.profile.city = 'Bo'
+        self.rider.profile.save()
+        self.client = APIClient()
+        self.client.force_authenticate(self.rider)
+
+    def test_ride_lands_on_city_database(self):
+        response = self.client.post('/api/rides/', {'rider': self.rider.pk, 'origin': 'Bo Market', 'destination': 'Njala'},
+                                    format='json')
+        self.assertEqual(response.status_code, 201, response.data)
+        self.assertEqual(response.data['city'], 'bo')
+        ride = RideRequest.objects.using('city_bo').get()
+        self.assertEqual((ride.pk, ride.rider_id), (response.data['id'], self.rider.pk))
+        self.assertFalse(RideRequest.objects.using('default').exists())
+        # counted on default once the ride's own database committed
+        self.assertEqual(RideStats.objects.get(user=self.rider).rides_requested, 1)
+        self.assertEqual(self.client.get(f"/api/rides/{ride.pk}/status/").data['status'], 'requested')
+
+    def test_user_delete_reaches_city_database(self):
+        driver = User.objects.create_user('driver', password='x')
+        with use_city('bo'):
+            RideRequest.objects.create(rider=self.rider, origin='A', destination='B')
+            driven = RideRequest.objects.create(rider=driver, driver=self.rider, origin='C', destination='D',
+                                                status='assigned')
+            ArchivedRide.objects.create(id=driven.pk + 1, rider=self.rider, origin='E', destination='F', status='completed',
+                                        requested_at=driven.requested_at)
+        self.rider.delete()
+        self.assertEqual(list(RideRequest.objects.using('city_bo').values_list('pk', 'driver_id')),
+                         [(driven.pk, None)])
+        self.assertFalse(ArchivedRide.objects.using('city_bo').exists())
+
+    def test_pickup_spots_are_mined_from_every_city(self):
+        from django.core.management import call_command
+        from search.models import PickupSpot
+
+        for city in ('bo', 'kenema'):
+            with use_city(city):
+                RideRequest.objects.create(rider=self.rider, origin='Lorry Park', destination='B')
+        call_command('mine_pickup_spots', stdout=StringIO())
+        self.assertEqual(list(PickupSpot.objects.values_list('name', 'count')), [('Lorry Park', 2)])
@@ -1,13 +1,23 @@
+import heapq
+
 from rest_framework import viewsets, permissions
 from rest_framework.decorators import action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.response import Response
+from django.http import Http404
 from .models import Vehicle, RideRequest
-from .serializers import VehicleSerializer, RideRequestSerializer
+from .serializers import VehicleSerializer, RideRequestSerializer, RideHistorySerializer
 from django.shortcuts import redirect, render
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
+from core.cities import current_city
 from .permissions import IsDriver, IsRider
-from django.core.mail import mail_admins
+from .dashboard import rider_context
+from .lifecycle import RideActionError, accept_ride, cancel_ride, complete_ride
+from geo.geocoder import geocode_ride
+from geo.graph import bounding_box, haversine_m
+from geo.routing import estimate_ride, get_router, routing_settings
+from geo.views import parse_point
 
 
 class VehicleViewSet(viewsets.ModelViewSet):
@@ -16,15 +26,78 @@ class VehicleViewSet(viewsets.ModelViewSet):
     permission_classes = [permissions.IsAuthenticated]
 
 
+class HistoryPagination(PageNumberPagination):
+    page_size = 20
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
 class RideRequestViewSet(viewsets.ModelViewSet):
+    """Rides of the current city.
+
+    ``retrieve`` and ``status`` also find rides moved to the archive (see
+    ``rides.archive``); those come back with ``"archived": true`` and cannot
+    be changed. ``list`` only has live rides: archived ones are listed by
+    ``history``, per user and paginated.
+    """
     queryset = RideRequest.objects.all()
     serializer_class = RideRequestSerializer
     permission_classes = [permissions.IsAuthenticated]
-    
+
+    def get_ride(self):
+        """The live ride named in the URL, else its archived copy (see ``rides.archive.as_ride``)."""
+        from .archive import find_archived
+        try:
+            return self.get_object()
+        except Http404:
+            ride = find_archived(self.kwargs[self.lookup_url_kwarg or self.lookup_field])
+            if ride is None:
+                raise
+            return ride
+
+    def list(self, request, *args, **kwargs):
+        """Live rides; archived ones are listed, per user and paginated, by ``history``."""
+        # users live on the default database; one query each instead of one per ride
+        queryset = self.filter_queryset(self.get_queryset()).prefetch_related('driver__profile')
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_serializer(page, many=True).data)
+        return Response(self.get_serializer(queryset, many=True).data)
+
+    def retrieve(self, request, *args, **kwargs):
+        return Response(self.get_serializer(self.get_ride()).data)
+
     @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def available(self, request):
-        """List available unassigned ride requests for drivers to view."""
-        qs = RideRequest.objects.filter(driver__isnull=True, status='requested')
+        """List available unassigned ride requests in the driver's city.
+
+        With ``?near=lat,lng`` (the driver's position) the rides nearest to it
+        (see ``_pickup_candidates``) each get a ``pickup_eta_s`` and the list
+        is ordered by it, unroutable rides last. Otherwise rides come oldest
+        first. Either way, pass ``?page=`` (and optionally ``page_size``) for a
+        paginated response.
+        """
+        qs = (RideRequest.objects.filter(city=current_city(), driver__isnull=True, status='requested')
+              .order_by('requested_at', 'id'))
+        near = parse_point(request.query_params.get('near'))
+        router = get_router() if near else None
+        if router is not None:
+            rides = _pickup_candidates(qs, near)
+            located = [r for r in rides if r.origin_lat is not None and r.origin_lng is not None]
+            routes = router.routes_from(near, [(r.origin_lat, r.origin_lng) for r in located])
+            etas = {r.pk: round(route.seconds) for r, route in zip(located, routes) if route is not None}
+            rides.sort(key=lambda r: (r.pk not in etas, etas.get(r.pk, 0)))
+            paginator = HistoryPagination() if 'page' in request.query_params else None
+            if paginator is not None:
+                rides = paginator.paginate_queryset(rides, request, view=self)
+            data = self.get_serializer(rides, many=True).data
+            for item in data:
+                item['pickup_eta_s'] = etas.get(item['id'])
+            return paginator.get_paginated_response(data) if paginator is not None else Response(data)
+        if 'page' in request.query_params:
+            paginator = HistoryPagination()
+            page = paginator.paginate_queryset(qs, request, view=self)
+            return paginator.get_paginated_response(self.get_serializer(page, many=True).data)
         page = self.paginate_queryset(qs)
         if page is not None:
             serializer = self.get_serializer(page, many=True)
@@ -36,18 +109,10 @@ class RideRequestViewSet(viewsets.ModelViewSet):
     def accept(self, request, pk=None):
         """Driver accepts a ride request; assigns themselves as the driver."""
         ride = self.get_object()
-        user = request.user
-        # ensure user is a driver by profile
-        profile = getattr(user, 'profile', None)
-        if profile is None or profile.role != 'driver':
-            return Response({'detail': 'Only drivers can accept rides.'}, status=403)
-        if ride.driver is not None:
-            return Response({'detail': 'Ride already assigned.'}, status=400)
-        ride.driver = user
-        ride.status = 'assigned'
-        from django.utils import timezone
-        ride.assigned_at = timezone.now()
-        ride.save()
+        try:
+            accept_ride(ride, request.user)
+        except RideActionError as exc:
+            return Response({'detail': exc.detail}, status=exc.status)
         return Response({'detail': 'Ride assigned to you.'})
 
     @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated, IsRider])
@@ -59,49 +124,73 @@ class RideRequestViewSet(viewsets.ModelViewSet):
         - the driver assigned to the ride
         """
         ride = self.get_object()
-        user = request.user
-        # Only the rider or the assigned driver may mark completed
-        if ride.rider != user and ride.driver != user:
-            return Response({'detail': 'Only the rider or assigned driver can mark this ride completed.'}, status=403)
-        if ride.status == 'completed':
-            return Response({'detail': 'Ride already completed.'}, status=400)
-        from django.utils import timezone
-        ride.status = 'completed'
-        ride.completed_at = timezone.now()
-        ride.save()
-
-        # Notify admins that the ride was marked completed
         try:
-            driver_name = ''
-            driver_phone = ''
-            if ride.driver:
-                profile = getattr(ride.driver, 'profile', None)
-                driver_name = getattr(profile, 'full_name', ride.driver.username) if profile else ride.driver.username
-                driver_phone = getattr(profile, 'phone', '') if profile else ''
-            subject = f'Ride marked completed: #{ride.id} by {request.user.username}'
-            message = (
-                f'Ride ID: {ride.id}\n'
-                f'Completed by: {request.user.username} (id={request.user.id})\n'
-                f'Rider: {ride.rider.username} (id={ride.rider.id})\n'
-                f'Driver: {driver_name} (phone: {driver_phone})\n'
-                f'Origin: {ride.origin}\n'
-                f'Destination: {ride.destination}\n'
-                f'Requested at: {ride.requested_at}\n'
-                f'Completed at: {ride.completed_at}\n'
-            )
-            mail_admins(subject, message)
-        except Exception:
-            pass
-
+            complete_ride(ride, request.user)
+        except RideActionError as exc:
+            return Response({'detail': exc.detail}, status=exc.status)
         return Response({'detail': 'Ride marked as completed.'})
 
+    @action(detail=True, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def cancel(self, request, pk=None):
+        """Rider cancels their own ride before it is completed."""
+        ride = self.get_object()
+        try:
+            cancel_ride(ride, request.user)
+        except RideActionError as exc:
+            return Response({'detail': exc.detail}, status=exc.status)
+        return Response({'detail': 'Ride cancelled.'})
+
+    @action(detail=False, methods=['post'], permission_classes=[permissions.IsAuthenticated])
+    def batch(self, request):
+        """Apply an ordered list of ride operations, each with a client idempotency key.
+
+        See ``rides.batch`` for the request and response format.
+        """
+        # only batch clients need it; keeps it out of every worker's boot
+        from .batch import BatchError, apply_operations
+        try:
+            results = apply_operations(request.user, request.data.get('operations'), self.get_serializer_context())
+        except BatchError as exc:
+            return Response({'detail': str(exc)}, status=400)
+        return Response({'results': results})
+
+    @action(detail=False, methods=['get'], permission_classes=[permissions.IsAuthenticated])
+    def history(self, request):
+        """The user's rides as rider or driver, newest first, including archived rides."""
+        from .archive import ride_history
+        paginator = HistoryPagination()
+        page = paginator.paginate_queryset(ride_history(request.user), request, view=self)
+        serializer = RideHistorySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=True, methods=['get'], permission_classes=[permissions.IsAuthenticated])
     def status(self, request, pk=None):
         """Return minimal status information for a ride: status and is_completed boolean."""
-        ride = self.get_object()
+        ride = self.get_ride()
         return Response({'id': ride.id, 'status': ride.status, 'is_completed': ride.status == 'completed'})
 
 
+def _pickup_candidates(qs, near):
+    """The rides of ``qs`` worth routing to from ``near``.
+
+    The ``NEARBY_CANDIDATES`` closest in a straight line within
+    ``NEARBY_RADIUS_M`` (``ROUTING`` settings), topped up with the oldest
+    rides that have no coordinates. Only ids and coordinates of the rides in
+    the bounding box are read to pick them.
+    """
+    config = routing_settings()
+    limit = config['NEARBY_CANDIDATES']
+    south, west, north, east = bounding_box(*near, config['NEARBY_RADIUS_M'])
+    boxed = (qs.filter(origin_lat__range=(south, north), origin_lng__range=(west, east))
+             .values_list('pk', 'origin_lat', 'origin_lng'))
+    nearest = heapq.nsmallest(limit, boxed, key=lambda row: haversine_m(*near, row[1], row[2]))
+    pks = [pk for pk, _, _ in nearest]
+    if len(pks) < limit:
+        pks += qs.filter(origin_lat__isnull=True).values_list('pk', flat=True)[:limit - len(pks)]
+    rides = qs.in_bulk(pks)
+    return [rides[pk] for pk in pks if pk in rides]
+
+
 @login_required
 def create_ride(request):
     """Create a new RideRequest from a simple web form. Only riders may create requests."""
@@ -112,16 +201,38 @@ def create_ride(request):
     if request.method == 'POST':
         origin = request.POST.get('origin')
         destination = request.POST.get('destination')
+        scheduled_at = _parse_scheduled_at(request.POST.get('scheduled_at'))
+        if scheduled_at is not None and scheduled_at <= timezone.now():
+            return render(request, 'core/rider_dashboard.html', rider_context(request.user, error='Scheduled time must be in the future.'))
         if origin and destination:
-            ride = RideRequest.objects.create(
+            ride = RideRequest(
                 rider=request.user,
                 origin=origin,
                 destination=destination,
-                status='requested',
-                requested_at=timezone.now()
+                status='scheduled' if scheduled_at else 'requested',
+                requested_at=timezone.now(),
+                scheduled_at=scheduled_at,
             )
+            # the form fills origin coordinates from the browser's location when allowed
+            origin_point = parse_point(request.POST.get('origin_point'))
+            if origin_point:
+                ride.origin_lat, ride.origin_lng = origin_point
+            geocode_ride(ride)
+            estimate_ride(ride)
+            ride.save()
             return redirect('rider_dashboard')
         else:
-            return render(request, 'core/rider_dashboard.html', {'rides': request.user.ride_requests.all(), 'error': 'Origin and destination required.'})
+            return render(request, 'core/rider_dashboard.html', rider_context(request.user, error='Origin and destination required.'))
 
     return redirect('rider_dashboard')
+
+
+def _parse_scheduled_at(value):
+    """Parse an optional ``datetime-local`` form value in the current timezone."""
+    from django.utils.dateparse import parse_datetime
+    if not value:
+        return None
+    dt = parse_datetime(value)
+    if dt is not None and timezone.is_naive(dt):
+        dt = timezone.make_aware(dt)
+    return dt
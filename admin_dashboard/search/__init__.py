@@ -0,0 +1 @@
+# search app package
@@ -0,0 +1,9 @@
+from django.contrib import admin
+from .models import PickupSpot
+
+
+@admin.register(PickupSpot)
+class PickupSpotAdmin(admin.ModelAdmin):
+    list_display = ('name', 'normalized', 'count')
+    search_fields = ('^normalized',)
+    ordering = ('-count',)
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.db.models.signals import post_migrate
+
+
+class SearchConfig(AppConfig):
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'search'
+
+    def ready(self):
+        # Table rebuilds in later migrations drop SQLite triggers; reinstall them.
+        from .fts import ensure_installed
+        post_migrate.connect(ensure_installed, sender=self)
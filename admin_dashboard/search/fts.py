@@ -0,0 +1,149 @@
+"""Full-text indexes over ride (live and archived) origins/destinations and profile names/phones.
+
+SQLite: FTS5 external-content tables that store only the index and read the
+text from the source table. Triggers on the source table keep them in sync,
+including bulk ``update()``/``delete()`` calls that bypass Django signals.
+
+Postgres: ``pg_trgm`` GIN indexes on the same columns, queried with the
+``%`` similarity operator.
+
+Other backends fall back to ``icontains`` scans.
+"""
+import re
+
+from django.apps import apps
+from django.db import connections
+
+# kind -> (model label, FTS table name, indexed columns)
+INDEXES = {
+    'rides': ('rides.RideRequest', 'search_ride_fts', ('origin', 'destination')),
+    # archiving deletes the live row (dropping it from search_ride_fts) and inserts this one
+    'archived_rides': ('rides.ArchivedRide', 'search_archivedride_fts', ('origin', 'destination')),
+    'users': ('accounts.Profile', 'search_profile_fts', ('full_name', 'phone')),
+}
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def _source_table(kind):
+    return apps.get_model(INDEXES[kind][0])._meta.db_table
+
+
+def _sqlite_statements(kind):
+    table = _source_table(kind)
+    _, fts, columns = INDEXES[kind]
+    cols = ', '.join(columns)
+    new_vals = ', '.join(f'new.{c}' for c in columns)
+    old_vals = ', '.join(f'old.{c}' for c in columns)
+    return [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts} USING fts5("
+        f"{cols}, content='{table}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2', prefix='2 3')",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ai AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_ad AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); END",
+        # only fire when an indexed column changes, not on status updates
+        f"CREATE TRIGGER IF NOT EXISTS {fts}_au AFTER UPDATE OF {cols} ON {table} BEGIN "
+        f"INSERT INTO {fts}({fts}, rowid, {cols}) VALUES ('delete', old.id, {old_vals}); "
+        f"INSERT INTO {fts}(rowid, {cols}) VALUES (new.id, {new_vals}); END",
+    ]
+
+
+def _postgres_statements(kind):
+    table = _source_table(kind)
+    _, fts, columns = INDEXES[kind]
+    return [
+        f'CREATE INDEX IF NOT EXISTS {fts}_{col}_trgm ON "{table}" USING gin ("{col}" gin_trgm_ops)'
+        for col in columns
+    ]
+
+
+def install(connection, rebuild=False, kinds=None):
+    """Create the search indexes (idempotent). Returns True if anything was missing.
+
+    ``kinds`` limits this to some indexes, e.g. on a city database that only
+    holds rides (see ``core.cities``).
+    """
+    kinds = list(INDEXES if kinds is None else kinds)
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            missing = False
+            for kind in kinds:
+                fts = INDEXES[kind][1]
+                cursor.execute("SELECT count(*) FROM sqlite_master WHERE type = 'trigger' AND name LIKE %s",
+                               [f'{fts}_a_'])
+                kind_missing = cursor.fetchone()[0] < 3
+                for sql in _sqlite_statements(kind):
+                    cursor.execute(sql)
+                if rebuild or kind_missing:
+                    cursor.execute(f"INSERT INTO {fts}({fts}) VALUES ('rebuild')")
+                missing = missing or kind_missing
+            return missing
+        if connection.vendor == 'postgresql':
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for kind in kinds:
+                for sql in _postgres_statements(kind):
+                    cursor.execute(sql)
+    return False
+
+
+def uninstall(connection, kinds=None):
+    with connection.cursor() as cursor:
+        for kind in (INDEXES if kinds is None else kinds):
+            _, fts, columns = INDEXES[kind]
+            if connection.vendor == 'sqlite':
+                for suffix in ('ai', 'ad', 'au'):
+                    cursor.execute(f'DROP TRIGGER IF EXISTS {fts}_{suffix}')
+                cursor.execute(f'DROP TABLE IF EXISTS {fts}')
+            elif connection.vendor == 'postgresql':
+                for col in columns:
+                    cursor.execute(f'DROP INDEX IF EXISTS {fts}_{col}_trgm')
+
+
+def ensure_installed(using='default', **kwargs):
+    """post_migrate hook: reinstall triggers dropped by SQLite table rebuilds."""
+    connection = connections[using]
+    tables = connection.introspection.table_names()
+    kinds = [kind for kind in INDEXES if _source_table(kind) in tables]
+    if kinds:
+        install(connection, kinds=kinds)
+
+
+def match_expression(term):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    tokens = _TOKEN_RE.findall(term)
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search(kind, term, limit=20, using='default'):
+    """Return ``[(pk, score), ...]`` best match first for ``kind`` (a key of ``INDEXES``)."""
+    model_label, fts, columns = INDEXES[kind]
+    term = term.strip()
+    if not term:
+        return []
+    connection = connections[using]
+
+    if connection.vendor == 'sqlite':
+        expression = match_expression(term)
+        if not expression:
+            return []
+        sql = f'SELECT rowid, -bm25({fts}) FROM {fts} WHERE {fts} MATCH %s ORDER BY bm25({fts}) LIMIT %s'
+        params = [expression, limit]
+    elif connection.vendor == 'postgresql':
+        table = _source_table(kind)
+        score = 'GREATEST(' + ', '.join(f'similarity("{c}", %s)' for c in columns) + ')'
+        where = ' OR '.join(f'"{c}" %% %s' for c in columns)  # pg_trgm similarity operator
+        sql = f'SELECT id, {score} AS score FROM "{table}" WHERE {where} ORDER BY score DESC LIMIT %s'
+        params = [term] * len(columns) * 2 + [limit]
+    else:
+        from django.db.models import Q
+        model = apps.get_model(model_label)
+        query = Q()
+        for col in columns:
+            query |= Q(**{f'{col}__icontains': term})
+        return [(pk, 0.0) for pk in model.objects.using(using).filter(query).values_list('pk', flat=True)[:limit]]
+
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return [(row[0], float(row[1])) for row in cursor.fetchall()]
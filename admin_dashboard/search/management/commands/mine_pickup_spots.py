@@ -0,0 +1,53 @@
+from collections import Counter, defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from core.cities import for_each_shard
+from rides.models import ArchivedRide, RideRequest
+from search.models import PickupSpot
+from search.normalize import normalize_place
+
+
+def count_origins(using, chunk_size):
+    """``(uses per normalized origin, {normalized: uses per spelling})`` over the rides on ``using``."""
+    counts = Counter()
+    spellings = defaultdict(Counter)
+    for model in (RideRequest, ArchivedRide):
+        origins = model.objects.using(using).values_list('origin', flat=True).iterator(chunk_size=chunk_size)
+        for origin in origins:
+            key = normalize_place(origin)
+            if key:
+                counts[key] += 1
+                spellings[key][origin.strip()] += 1
+    return counts, spellings
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the pickup-spot autocomplete table from historical ride origins.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--min-count', type=int, default=2,
+                            help='Ignore origins used fewer times than this.')
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        counts = Counter()
+        spellings = defaultdict(Counter)
+        # rides live on their city's database; count each shard's origins, then merge
+        for shard_counts, shard_spellings in for_each_shard(
+                lambda using: count_origins(using, options['chunk_size'])).values():
+            counts.update(shard_counts)
+            for key, names in shard_spellings.items():
+                spellings[key].update(names)
+
+        spots = [
+            # display the most common spelling of each normalized name
+            PickupSpot(normalized=key[:255], name=spellings[key].most_common(1)[0][0][:255], count=n)
+            for key, n in counts.items() if n >= options['min_count']
+        ]
+        # swap the whole table in one transaction so readers never see a partial rebuild
+        with transaction.atomic():
+            PickupSpot.objects.all().delete()
+            PickupSpot.objects.bulk_create(spots, batch_size=1000)
+        self.stdout.write(f'Stored {len(spots)} pickup spot(s).')
@@ -0,0 +1,24 @@
+from django.db import migrations
+
+
+def create_indexes(apps, schema_editor):
+    from search import fts
+    fts.install(schema_editor.connection, rebuild=True)
+
+
+def drop_indexes(apps, schema_editor):
+    from search import fts
+    fts.uninstall(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0001_initial'),
+        ('rides', '0007_riderequest_admin_search_indexes'),
+        ('accounts', '0005_profile_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_indexes, drop_indexes),
+    ]
@@ -0,0 +1,23 @@
+from django.db import migrations
+
+
+def create_index(apps, schema_editor):
+    from search import fts
+    fts.install(schema_editor.connection, rebuild=True, kinds=['archived_rides'])
+
+
+def drop_index(apps, schema_editor):
+    from search import fts
+    fts.uninstall(schema_editor.connection, kinds=['archived_rides'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('search', '0002_fulltext_indexes'),
+        ('rides', '0014_recreate_admin_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_index, drop_index),
+    ]
@@ -0,0 +1,16 @@
+from django.db import models
+
+
+class PickupSpot(models.Model):
+    """Popular pickup location mined from historical ride origins (see ``mine_pickup_spots``)."""
+    name = models.CharField(max_length=255)
+    normalized = models.CharField(max_length=255, unique=True)
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['-count'], name='pickupspot_count_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.count})"
@@ -0,0 +1,13 @@
+import re
+import unicodedata
+
+_NON_WORD_RE = re.compile(r'[^\w\s]+', re.UNICODE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def normalize_place(text):
+    """Canonical form of a place name: lowercase, no accents or punctuation, single spaces."""
+    text = unicodedata.normalize('NFKD', text or '')
+    text = ''.join(ch for ch in text if not unicodedata.combining(ch))
+    text = _NON_WORD_RE.sub(' ', text.lower())
+    return _SPACE_RE.sub(' ', text).strip()
@@ -0,0 +1,25 @@
+from rest_framework import serializers
+
+from accounts.serializers import ProfileSerializer
+from rides.serializers import RideRequestSerializer
+from .models import PickupSpot
+
+
+class RideSearchSerializer(RideRequestSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(RideRequestSerializer.Meta):
+        fields = RideRequestSerializer.Meta.fields + ('score',)
+
+
+class ProfileSearchSerializer(ProfileSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(ProfileSerializer.Meta):
+        fields = ProfileSerializer.Meta.fields + ('full_name', 'is_driver_approved', 'score')
+
+
+class PickupSpotSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = PickupSpot
+        fields = ('name', 'count')
@@ -0,0 +1,7 @@
+from django.urls import path
+from .views import search, pickup_spots
+
+urlpatterns = [
+	path('', search, name='search'),
+	path('places/', pickup_spots, name='search_places'),
+]
@@ -0,0 +1,67 @@
+from django.db import router
+from rest_framework import permissions
+from rest_framework.decorators import api_view, permission_classes
+from rest_framework.response import Response
+
+from accounts.models import Profile
+from rides.models import RideRequest
+from . import fts
+from .models import PickupSpot
+from .normalize import normalize_place
+from .serializers import PickupSpotSerializer, ProfileSearchSerializer, RideSearchSerializer
+
+MAX_LIMIT = 100
+
+
+def _limit(request, default):
+    try:
+        return max(1, min(MAX_LIMIT, int(request.query_params.get('limit', default))))
+    except ValueError:
+        return default
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAdminUser])
+def search(request):
+    """Ranked free-text search for staff.
+
+    ``?q=<text>&type=rides|users&limit=N``. Rides match on origin/destination
+    (in the city being administered, see ``core.cities``), users on full
+    name/phone. Results are ordered best match first.
+    """
+    kind = request.query_params.get('type', 'rides')
+    if kind not in ('rides', 'users'):
+        return Response({'detail': 'type must be "rides" or "users".'}, status=400)
+    model = RideRequest if kind == 'rides' else Profile
+    hits = fts.search(kind, request.query_params.get('q', ''), limit=_limit(request, 20),
+                      using=router.db_for_read(model))
+    scores = dict(hits)
+
+    if kind == 'rides':
+        objects = RideRequest.objects.prefetch_related('rider', 'driver__profile').in_bulk(scores)
+        serializer_class = RideSearchSerializer
+    else:
+        objects = Profile.objects.select_related('user').in_bulk(scores)
+        serializer_class = ProfileSearchSerializer
+
+    results = []
+    for pk, score in hits:
+        obj = objects.get(pk)
+        if obj is not None:
+            obj.score = score
+            results.append(obj)
+    return Response({'results': serializer_class(results, many=True).data})
+
+
+@api_view(['GET'])
+@permission_classes([permissions.IsAuthenticated])
+def pickup_spots(request):
+    """Autocomplete popular pickup spots by prefix: ``?q=<prefix>&limit=N``."""
+    prefix = normalize_place(request.query_params.get('q', ''))
+    if not prefix:
+        return Response({'results': []})
+    # an explicit range keeps the lookup on the unique index on every backend
+    spots = (PickupSpot.objects
+             .filter(normalized__gte=prefix, normalized__lt=prefix + '\uffff')
+             .order_by('-count')[:_limit(request, 10)])
+    return Response({'results': PickupSpotSerializer(spots, many=True).data})